@@ -0,0 +1,96 @@
+# finance_api/benchmarks/bench_cum_corr.py
+"""
+Compare the former per-row safe_corr loop of metrics.py with expanding_corr.
+
+Usage:
+    python -m finance_api.benchmarks.bench_cum_corr [n_days ...]
+
+Each size is a panel of 10 tickers with n_days days each; the loop runs once
+per ticker, expanding_corr once for the whole panel.
+
+Reference run (pandas 3.0, CPython 3.11), best of 3, ms for the panel:
+
+        days        loop   running sums   speedup   max |diff|
+          30       120.0          4.50       27x      3.3e-16
+         100       468.5          3.20      146x      3.3e-16
+       1 000     4 962.8          9.64      515x      5.6e-16
+      10 000    46 271.1         48.17      961x      3.9e-16
+
+The loop grows quadratically with the history, the running sums linearly.
+"""
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+
+from finance_api.utils.rolling_stats import expanding_corr
+
+N_TICKERS = 10
+
+
+def safe_corr(x, y):
+    if len(x) < 2 or x.isnull().all() or y.isnull().all():
+        return np.nan
+    return np.corrcoef(x.fillna(0), y.fillna(0))[0,1]
+
+
+def legacy_cum_corr(merged: pd.DataFrame) -> list:
+    """The O(n²) loop metrics.py ran for each ticker."""
+    cum_corrs = []
+    for i in range(2, len(merged)+1):
+        x = merged['daily_return'].iloc[:i]
+        y = merged['mean_sentiment'].iloc[:i]
+        cum_corrs.append(safe_corr(x, y))
+    return [np.nan] + cum_corrs
+
+
+def make_panel(n_days: int, seed: int = 0) -> pd.DataFrame:
+    """Merged (ticker, date) frame shaped like metrics.py's, returns with a leading NaN."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for k in range(N_TICKERS):
+        returns = rng.normal(0, 0.015, n_days)
+        returns[0] = np.nan
+        frames.append(pd.DataFrame({
+            "ticker": f"T{k}",
+            "daily_return": returns,
+            "mean_sentiment": np.clip(rng.normal(0.1, 0.4, n_days) + 5 * returns, -1, 1),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def best_of(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(sizes):
+    print(f"{'days':>8} {'loop':>11} {'running sums':>13} {'speedup':>8} {'max |diff|':>11}")
+    for n_days in sizes:
+        panel = make_panel(n_days)
+        by_ticker = [group for _, group in panel.groupby('ticker', sort=False)]
+
+        def loop():
+            return np.concatenate([legacy_cum_corr(group) for group in by_ticker])
+
+        def engine():
+            return expanding_corr(panel['daily_return'], panel['mean_sentiment'], groups=panel['ticker'])
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expected, got = loop(), engine()
+            assert np.array_equal(np.isnan(expected), np.isnan(got)), "NaN positions changed"
+            diff = np.nanmax(np.abs(expected - got))
+            loop_ms = best_of(loop, repeat=1 if n_days > 2000 else 3)
+        engine_ms = best_of(engine)
+
+        print(f"{n_days:>8} {loop_ms:>11.1f} {engine_ms:>13.2f} {loop_ms / engine_ms:>7.0f}x {diff:>11.1e}")
+
+
+if __name__ == "__main__":
+    run([int(n) for n in sys.argv[1:]] or [30, 100, 1000, 10000])
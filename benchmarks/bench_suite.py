@@ -0,0 +1,428 @@
+# finance_api/benchmarks/bench_suite.py
+"""
+Benchmark suite of the API endpoints and of the metrics / analysis scripts
+on synthetic data/ directories (see synthetic_data.py) at multiples of
+today's volume.
+
+Usage:
+    python -m finance_api.benchmarks.bench_suite run [--scales 1,10,100,1000] [--requests 200]
+        [--layout text|snapshot|partitioned] [--output bench_results.json] [--baseline baseline.json]
+    python -m finance_api.benchmarks.bench_suite compare bench_results.json baseline.json [--threshold 0.25]
+
+For each scale, the data is generated once under --work-dir (reused while
+scale, seed and end day are the same) and compiled to the chosen layout.
+Each endpoint and each script is then measured in its own process, working
+directory on the synthetic data, caches of data/.cache emptied:
+
+    endpoints   `--requests` sequential requests through an in-process client
+                (fastapi.testclient), cycling through the query mix of ENDPOINTS;
+                latency of the first request, p50 / p95 / p99, throughput
+    scripts     metrics.py, metrics_bysource.py and analysis.py run `--repeat`
+                times on the synthetic files (their data paths rewritten, each run
+                in a fresh temporary directory); first, min and median time
+
+plus the peak RSS of the process. /stocks is served by the snapshot price
+provider (PRICE_PROVIDER=snapshot), so no request leaves the machine.
+
+Results are saved as JSON. `compare` (or `run --baseline`) flags the
+metrics that got worse than the baseline by more than --threshold (with a
+small absolute margin for sub-millisecond noise) and exits with status 1 if
+any did.
+
+Reference run (pandas 3.0, CPython 3.11, 1 core), text layout, --requests 200:
+
+    p50 ms / peak RSS MB            1x            10x           100x
+    /stocks                     7.4 / 106     7.7 / 159     9.5 / 717
+    /company_metrics            1.9 / 100     1.5 / 123     1.8 / 321
+    /search                     3.4 / 105     6.4 / 188    83.8 / 1037
+    /get_new_sentiments         4.8 /  97     3.7 / 104     5.2 / 190
+    /get_reddit_sentiments      5.5 /  98     3.7 / 102     5.4 / 159
+
+    first request, s
+    /stocks                       0.43          2.59          28.6
+    /company_metrics              0.23          1.03          15.1
+    /search                       1.19          8.84          97.9
+
+    scripts, median s
+    metrics.py                    0.13          1.66          14.0
+    metrics_bysource.py           0.14          1.04          12.0
+    analysis.py                   0.15          0.32           2.8
+
+Windowed endpoints stay flat; the first request (parsing the whole history)
+and the scripts grow with it. 1000x (about 3.3 GB of files) needs several
+GB of memory for the text layout.
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+import datetime as dt
+from urllib.parse import quote
+import numpy as np
+
+from finance_api.benchmarks.synthetic_data import COMPANIES, generate, read_manifest
+
+
+SCALES = (1, 10, 100, 1000)
+WORK_DIR = os.path.join(tempfile.gettempdir(), "finance_api_bench")
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAYOUTS = ("text", "snapshot", "partitioned")
+CACHE_DIRS = (".snapshots", ".partitions", ".cache")
+
+_NAMES = [name for name, _ in COMPANIES.values()]
+
+# Query mix of each endpoint (requests cycle through the list)
+ENDPOINTS = {
+    "/": ["/"],
+    "/tickers": ["/tickers"],
+    "/metrics": ["/metrics"],
+    "/stocks": [
+        f"/stocks?ticker={quote(ticker)}&period={period}&interval={interval}"
+        for period, interval in [("1d", "15m"), ("7d", "1h"), ("1mo", "1d")] for ticker in COMPANIES
+    ],
+    "/stocks/batch": [
+        f"/stocks/batch?period={period}&interval={interval}"
+        for period, interval in [("1d", "15m"), ("7d", "1h"), ("1mo", "1d")]
+    ] + ["/stocks/batch?tickers=AAPL,TSLA,MC.PA"],
+    "/dashboard": [
+        f"/dashboard?period={period}&interval={interval}"
+        for period, interval in [("1d", "15m"), ("7d", "1h"), ("1mo", "1d")]
+    ] + ["/dashboard?tickers=AAPL,TSLA,MC.PA"],
+    "/company_metrics": ["/company_metrics"] + [f"/company_metrics?ticker={quote(ticker)}" for ticker in COMPANIES],
+    "/search": [
+        f"/search?q={quote(query)}" + (f"&company={quote(ticker)}" if ticker else "")
+        for query in ["earnings", '"profit warning"', "fed rates", '"record high" shares']
+        for ticker in [None, "AAPL", "TSLA"]
+    ],
+    "/get_new_sentiments": [f"/get_new_sentiments?ticker={quote(name)}&period={p}" for p in ("7j", "30j") for name in _NAMES],
+    "/get_reddit_sentiments": [
+        f"/get_reddit_sentiments?company_name={quote(name)}&days_back={d}" for d in (7, 30) for name in _NAMES
+    ],
+    "/get_news_sentiments_google": [
+        f"/get_news_sentiments_google?company_name={quote(name)}&days_back={d}" for d in (7, 30) for name in _NAMES
+    ],
+}
+
+SCRIPTS = ("metrics.py", "metrics_bysource.py", "analysis.py")
+
+# Compared metrics: (direction, absolute change below which it is noise)
+METRICS = {
+    "p50_ms": ("lower", 1.0),
+    "p95_ms": ("lower", 1.0),
+    "p99_ms": ("lower", 2.0),
+    "throughput_rps": ("higher", 0.0),
+    "median_s": ("lower", 0.02),
+    "peak_rss_mb": ("lower", 10.0),
+}
+
+# The scripts' hard-coded r"...\finance_api\data\<file>" paths
+_DATA_PATH = re.compile(r'r"[^"]*\\finance_api\\data\\([^"]+)"')
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (None where `resource` is missing, e.g. Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KB on Linux, bytes on macOS
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+# -----------------------------
+# --- Measurements (child process) ---
+# -----------------------------
+
+def measure_endpoint(path: str, requests: int) -> dict:
+    """Latencies of `requests` requests of the query mix of `path` (working directory: the workspace)."""
+    from fastapi.testclient import TestClient
+
+    start = time.perf_counter()
+    from finance_api.main import app
+    import_s = time.perf_counter() - start
+
+    client = TestClient(app)
+    urls = ENDPOINTS[path]
+    latencies, errors = [], 0
+    for i in range(requests + 1):
+        start = time.perf_counter()
+        response = client.get(urls[i % len(urls)])
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+
+    first, warm = latencies[0], np.array(latencies[1:])
+    p50, p95, p99 = np.percentile(warm, [50, 95, 99])
+    return {
+        "requests": requests,
+        "errors": errors,
+        "import_s": round(import_s, 3),
+        "first_ms": round(first, 2),
+        "p50_ms": round(p50, 2),
+        "p95_ms": round(p95, 2),
+        "p99_ms": round(p99, 2),
+        "mean_ms": round(warm.mean(), 2),
+        "throughput_rps": round(1000 * len(warm) / warm.sum(), 1),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def script_source(name: str, data_dir: str) -> str:
+    """Source of utils/<name> reading its files from data_dir."""
+    with open(os.path.join(PACKAGE_DIR, "utils", name), "r", encoding="utf-8") as f:
+        source = f.read()
+    return _DATA_PATH.sub(lambda m: repr(os.path.join(data_dir, *m.group(1).split("\\"))), source)
+
+
+def measure_script(name: str, data_dir: str, repeat: int) -> dict:
+    """
+    Run a script `repeat` times on data_dir. Each run works in a fresh
+    temporary directory, so no run finds the outputs or caches of the previous one.
+    """
+    import pandas  # noqa: F401  (not part of the timings)
+
+    code = compile(script_source(name, os.path.abspath(data_dir)), name, "exec")
+    timings = []
+    cwd = os.getcwd()
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory() as out:
+            os.chdir(out)
+            try:
+                start = time.perf_counter()
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    exec(code, {"__name__": "__main__"})
+                timings.append(time.perf_counter() - start)
+            finally:
+                os.chdir(cwd)
+    return {
+        "runs": repeat,
+        "first_s": round(timings[0], 3),
+        "min_s": round(min(timings), 3),
+        "median_s": round(float(np.median(timings)), 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+# -----------------------------
+# --- Orchestration ---
+# -----------------------------
+
+def prepare(work_dir: str, scale: int, seed: int, end: dt.date, layout: str) -> dict:
+    """Workspace of a scale (<work_dir>/x<scale>/finance_api/data), generated if needed and compiled to `layout`."""
+    workspace = os.path.join(work_dir, f"x{scale}")
+    data_dir = os.path.join(workspace, "finance_api", "data")
+    manifest = read_manifest(data_dir)
+    if manifest is None or (manifest["scale"], manifest["seed"], manifest["end"]) != (scale, seed, end.isoformat()):
+        shutil.rmtree(data_dir, ignore_errors=True)
+        start = time.perf_counter()
+        manifest = generate(data_dir, scale, seed, end)
+        print(f"x{scale}: data generated in {time.perf_counter() - start:.1f}s")
+
+    for name in CACHE_DIRS:
+        shutil.rmtree(os.path.join(data_dir, name), ignore_errors=True)
+    start = time.perf_counter()
+    if layout == "snapshot":
+        from finance_api.utils.snapshot import build_all
+        build_all(data_dir)
+    elif layout == "partitioned":
+        from finance_api.utils.partitions import build_all
+        build_all(data_dir)
+    return {"workspace": workspace, "data_dir": data_dir, "manifest": manifest,
+            "layout_build_s": round(time.perf_counter() - start, 3)}
+
+
+def run_child(workspace: str, args: list) -> dict:
+    """Run one measurement in a fresh process (cold caches, own peak RSS)."""
+    shutil.rmtree(os.path.join(workspace, "finance_api", "data", ".cache"), ignore_errors=True)
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(PACKAGE_DIR), env.get("PYTHONPATH")]))
+    env.setdefault("PRICE_PROVIDER", "snapshot")
+    with tempfile.TemporaryDirectory() as tmp:
+        result_path = os.path.join(tmp, "result.json")
+        subprocess.run(
+            [sys.executable, "-m", "finance_api.benchmarks.bench_suite", "measure", *args, "--result", result_path],
+            cwd=workspace, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def run(scales=SCALES, requests: int = 200, repeat: int = 3, layout: str = "text", seed: int = 0,
+        end: dt.date = None, work_dir: str = WORK_DIR, endpoints=None, scripts=None) -> dict:
+    end = end or dt.datetime.now(dt.timezone.utc).date()
+    endpoints = list(endpoints or ENDPOINTS)
+    scripts = list(scripts or SCRIPTS)
+    results = {
+        "meta": {
+            "created_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pandas": __import__("pandas").__version__,
+            "numpy": np.__version__,
+            "seed": seed,
+            "end": end.isoformat(),
+            "layout": layout,
+            "requests": requests,
+            "repeat": repeat,
+        },
+        "scales": {},
+    }
+    for scale in scales:
+        prepared = prepare(work_dir, scale, seed, end, layout)
+        entry = results["scales"][str(scale)] = {
+            "data": prepared["manifest"]["files"],
+            "layout_build_s": prepared["layout_build_s"],
+            "endpoints": {},
+            "scripts": {},
+        }
+        for path in endpoints:
+            stats = entry["endpoints"][path] = run_child(prepared["workspace"], ["endpoint", path, "--requests", str(requests)])
+            print(f"x{scale:<5} {path:<30} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms  "
+                  f"p99 {stats['p99_ms']:8.2f} ms  {stats['throughput_rps']:8.1f} req/s  "
+                  f"first {stats['first_ms']:9.1f} ms  RSS {stats['peak_rss_mb']} MB"
+                  + (f"  ⚠️ {stats['errors']} errors" if stats["errors"] else ""))
+        for name in scripts:
+            stats = entry["scripts"][name] = run_child(
+                prepared["workspace"], ["script", name, "--data-dir", prepared["data_dir"], "--repeat", str(repeat)]
+            )
+            print(f"x{scale:<5} {name:<30} median {stats['median_s']:8.3f} s  first {stats['first_s']:8.3f} s  "
+                  f"RSS {stats['peak_rss_mb']} MB")
+    return results
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.25) -> list:
+    """
+    Metrics worse than the baseline by more than `threshold` (relative) and
+    their noise margin (absolute), for every (scale, endpoint or script) in both.
+
+    Returns:
+        list of dicts: scale, name, metric, baseline, current, change
+    """
+    regressions = []
+    for scale, entry in current["scales"].items():
+        base_entry = baseline["scales"].get(scale)
+        if base_entry is None:
+            continue
+        for kind in ("endpoints", "scripts"):
+            for name, stats in entry[kind].items():
+                base_stats = base_entry[kind].get(name)
+                if base_stats is None:
+                    continue
+                for metric, (direction, margin) in METRICS.items():
+                    value, base = stats.get(metric), base_stats.get(metric)
+                    if value is None or not base:
+                        continue
+                    worse = value - base if direction == "lower" else base - value
+                    if worse > margin and worse > threshold * base:
+                        regressions.append({
+                            "scale": scale, "name": name, "metric": metric,
+                            "baseline": base, "current": value, "change": round((value - base) / base, 3),
+                        })
+    return regressions
+
+
+def report_regressions(regressions: list):
+    if not regressions:
+        print("✅ No regression against the baseline")
+        return
+    print(f"❌ {len(regressions)} regression(s) against the baseline:")
+    for r in regressions:
+        print(f"   x{r['scale']:<5} {r['name']:<30} {r['metric']:<15} {r['baseline']:>10} -> {r['current']:<10} ({r['change']:+.0%})")
+
+
+def _uncovered_routes() -> list:
+    """GET routes of the app missing from ENDPOINTS."""
+    from finance_api.main import app
+
+    return sorted(
+        route.path for route in app.routes
+        if "GET" in getattr(route, "methods", ()) and route.path not in ENDPOINTS
+        and route.path not in ("/openapi.json", "/docs", "/docs/oauth2-redirect", "/redoc")
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks of the endpoints and scripts on synthetic data")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="measure and save the results")
+    run_parser.add_argument("--scales", default=",".join(map(str, SCALES)))
+    run_parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    run_parser.add_argument("--repeat", type=int, default=3, help="runs per script")
+    run_parser.add_argument("--layout", choices=LAYOUTS, default="text")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--end", type=dt.date.fromisoformat, default=None, help="last day of the data (default: today, UTC)")
+    run_parser.add_argument("--endpoints", default=None, help="comma-separated paths (default: all)")
+    run_parser.add_argument("--scripts", default=None, help="comma-separated script names (default: all)")
+    run_parser.add_argument("--work-dir", default=WORK_DIR)
+    run_parser.add_argument("--output", default="bench_results.json")
+    run_parser.add_argument("--baseline", default=None, help="results to compare with")
+    run_parser.add_argument("--threshold", type=float, default=0.25)
+
+    compare_parser = commands.add_parser("compare", help="flag regressions of saved results")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+
+    measure_parser = commands.add_parser("measure", help=argparse.SUPPRESS)
+    measure_parser.add_argument("kind", choices=("endpoint", "script"))
+    measure_parser.add_argument("name")
+    measure_parser.add_argument("--requests", type=int, default=200)
+    measure_parser.add_argument("--repeat", type=int, default=3)
+    measure_parser.add_argument("--data-dir", default=os.path.join("finance_api", "data"))
+    measure_parser.add_argument("--result", required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "measure":
+        if args.kind == "endpoint":
+            stats = measure_endpoint(args.name, args.requests)
+        else:
+            stats = measure_script(args.name, args.data_dir, args.repeat)
+        with open(args.result, "w", encoding="utf-8") as f:
+            json.dump(stats, f)
+        return 0
+
+    if args.command == "compare":
+        with open(args.results, "r", encoding="utf-8") as f:
+            current = json.load(f)
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        report_regressions(regressions)
+        return 1 if regressions else 0
+
+    uncovered = _uncovered_routes()
+    if uncovered:
+        print(f"⚠️ Endpoints without a query mix (not measured): {', '.join(uncovered)}")
+    results = run(
+        scales=[int(s) for s in args.scales.split(",") if s.strip()],
+        requests=args.requests, repeat=args.repeat, layout=args.layout, seed=args.seed, end=args.end,
+        work_dir=args.work_dir,
+        endpoints=args.endpoints.split(",") if args.endpoints else None,
+        scripts=args.scripts.split(",") if args.scripts else None,
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"✅ Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        report_regressions(regressions)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,37 @@
+# finance_api/benchmarks/local_model.py
+"""
+Small BERT classifier built locally (random weights, no download) for the
+sentiment benchmarks. Its vocabulary comes from the news texts so that
+tokenization looks like real input.
+"""
+import os
+import re
+import tempfile
+import pandas as pd
+import torch
+
+NEWS_CSV = os.path.join("finance_api", "data", "news_sentiment_raw.csv")
+
+
+def load_texts(path: str = NEWS_CSV) -> list:
+    return pd.read_csv(path)["Text"].fillna("").astype(str).tolist()
+
+
+def build_local_model(texts, hidden_size: int = 256, layers: int = 4, heads: int = 4,
+                      vocab_size: int = 8000, seed: int = 0):
+    """(model, tokenizer) of a BERT sequence classifier with 3 labels."""
+    from transformers import BertConfig, BertForSequenceClassification, BertTokenizerFast
+
+    counts = pd.Series([w for t in texts for w in re.findall(r"[a-z]+", t.lower())]).value_counts()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + counts.index[:vocab_size].tolist()
+    vocab_file = os.path.join(tempfile.mkdtemp(prefix="local_bert_"), "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab))
+    tokenizer = BertTokenizerFast(vocab_file)
+
+    torch.manual_seed(seed)
+    config = BertConfig(
+        vocab_size=len(vocab), hidden_size=hidden_size, num_hidden_layers=layers,
+        num_attention_heads=heads, intermediate_size=4 * hidden_size, num_labels=3,
+    )
+    return BertForSequenceClassification(config).eval(), tokenizer
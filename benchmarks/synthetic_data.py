@@ -0,0 +1,312 @@
+# finance_api/benchmarks/synthetic_data.py
+"""
+Deterministic synthetic data/ directory at a multiple of today's volume.
+
+    python -m finance_api.benchmarks.synthetic_data <data_dir> [--scale 10] [--seed 0] [--end 2025-10-17]
+
+Writes the files the API and the scripts read, with the same shapes:
+
+    stocks.json                  5-minute bars of the 10 tickers (market hours, weekdays)
+    sentiment_compact.json       daily sentiment per ticker, global and by source
+    reddit/reddit_data.json      posts grouped by company
+    stock_news_google.json       Google News articles
+    news_sentiment_raw.csv       NewsAPI articles with their FinBERT label
+
+Scale 1 matches the files of the repository (30 days of prices and posts,
+7 days of Google News, 15 days of NewsAPI articles, same rates per day).
+A scale k keeps the rates and makes every history k times longer, ending on
+`end`: a query over the last days finds as many rows at any scale, only the
+size of what is stored grows. Scale 1000 is about 3.3 GB of files.
+
+The content only depends on (scale, seed, end). Texts are drawn from a small
+finance vocabulary, so that full-text queries such as "profit warning" match.
+"""
+import os
+import csv
+import sys
+import json
+import argparse
+import datetime as dt
+import numpy as np
+
+
+COMPANIES = {
+    "AAPL": ("Apple", "us"),
+    "MSFT": ("Microsoft", "us"),
+    "AMZN": ("Amazon", "us"),
+    "GOOGL": ("Alphabet (Google)", "us"),
+    "TSLA": ("Tesla", "us"),
+    "MC.PA": ("LVMH", "paris"),
+    "TTE.PA": ("TotalEnergies", "paris"),
+    "SAN.PA": ("Sanofi", "paris"),
+    "AIR.PA": ("Airbus", "paris"),
+    "SU.PA": ("Schneider Electric", "paris"),
+}
+
+# Opening time (UTC) and number of 5-minute bars of each market
+MARKETS = {"us": ((13, 30), 78), "paris": ((7, 0), 102)}
+
+# Volume of scale 1: (days of history, items per day over all companies)
+HISTORY = {
+    "stocks": (30, None),
+    "compact": (30, None),
+    "reddit": (30, 7),
+    "google": (7, 58),
+    "news": (15, 65),
+}
+
+COMPACT_SOURCES = {"google": 0.4, "reddit": 0.5, "news media": 0.7}  # share of days with data
+
+FILES = {
+    "stocks": "stocks.json",
+    "compact": "sentiment_compact.json",
+    "reddit": os.path.join("reddit", "reddit_data.json"),
+    "google": "stock_news_google.json",
+    "news": "news_sentiment_raw.csv",
+}
+MANIFEST = "synthetic.json"
+
+WORDS = (
+    "the market shares stock investors earnings revenue quarter growth guidance analysts price "
+    "target rating upgrade downgrade buy sell hold dividend buyback margin demand supply chain "
+    "outlook forecast results beat miss expectations profit warning rates inflation fed ecb "
+    "bonds yields rally selloff volatility record high low week month year deal acquisition "
+    "merger launch product sales china europe us tariffs regulators lawsuit ceo cfo board "
+    "strategy costs jobs layoffs investment ai chips cloud electric vehicles energy oil gas "
+    "luxury aircraft orders deliveries drug trial approval patent data center capacity strong "
+    "weak solid mixed surprise shock fears hopes gains losses up down higher lower after before "
+    "amid despite as on in of to for with by from and or but not new big first"
+).split()
+PHRASES = ["profit warning", "record high", "price target", "share buyback", "rate cut", "supply chain"]
+LABELS = np.array(["negative", "neutral", "positive"])
+
+
+def _rng(seed: int, scale: int, name: str) -> np.random.Generator:
+    # One stream per file, so that each file does not depend on the others
+    return np.random.default_rng([seed, scale, sum(name.encode())])
+
+
+def _days(end: dt.date, n_days: int) -> list:
+    return [end - dt.timedelta(days=n_days - 1 - i) for i in range(n_days)]
+
+
+class _Texts:
+    """Random texts from WORDS (Zipf-like frequencies), with a few PHRASES."""
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        weights = 1.0 / np.arange(1, len(WORDS) + 1)
+        self.p = weights / weights.sum()
+        self.words = np.array(WORDS, dtype=object)
+
+    def batch(self, n: int, mean_words: int, prefix=None) -> list:
+        lengths = np.maximum(3, self.rng.poisson(mean_words, n))
+        words = self.words[self.rng.choice(len(WORDS), size=int(lengths.sum()), p=self.p)]
+        phrases = self.rng.choice(len(PHRASES), size=n)
+        with_phrase = self.rng.random(n) < 0.15
+        ends = np.cumsum(lengths)
+        texts = []
+        for i, end in enumerate(ends):
+            text = " ".join(words[end - lengths[i]:end])
+            if prefix is not None:
+                text = f"{prefix[i]} {text}"
+            if with_phrase[i]:
+                text = f"{text} {PHRASES[phrases[i]]}"
+            texts.append(text)
+        return texts
+
+
+def _day_items(rng, days, per_day: float):
+    """(day, companies (tickers), sorted seconds of the day) of the items of each day."""
+    tickers = np.array(list(COMPANIES), dtype=object)
+    for day in days:
+        n = rng.poisson(per_day)
+        yield day, tickers[rng.integers(0, len(tickers), n)], np.sort(rng.integers(0, 86400, n))
+
+
+def _clock(seconds) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+# -----------------------------
+# --- Writers ---
+# -----------------------------
+
+def write_stocks(path: str, scale: int, seed: int, end: dt.date) -> int:
+    rng = _rng(seed, scale, "stocks")
+    days = [day for day in _days(end, HISTORY["stocks"][0] * scale) if day.weekday() < 5]
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"updated_at": "%sT20:00:00Z", "tickers": {' % end.isoformat())
+        for k, (ticker, (name, market)) in enumerate(COMPANIES.items()):
+            (hour, minute), n_bars = MARKETS[market]
+            times = [f"{(hour * 60 + minute + 5 * i) // 60:02d}:{(minute + 5 * i) % 60:02d}:00" for i in range(n_bars)]
+            returns = rng.normal(0, 0.0015, len(days) * n_bars)
+            close = np.round(rng.uniform(50, 500) * np.exp(np.cumsum(returns)), 2)
+            change = np.zeros(len(close))
+            change[1:] = np.round((close[1:] / close[:-1] - 1) * 100, 3)
+            volume = rng.integers(0, 2_000_000, len(close))
+            f.write(("," if k else "") + json.dumps(ticker) + ': {"name": ' + json.dumps(name) + ', "data": [')
+            # One day of bars per write keeps memory flat at any scale
+            for d, day in enumerate(days):
+                date = day.isoformat()
+                offset = d * n_bars
+                f.write(("," if d else "") + ",".join(
+                    f'{{"date": "{date}", "time": "{times[i]}", "close": {close[offset + i]}, '
+                    f'"volume": {volume[offset + i]}, "change_pct": {change[offset + i]}}}'
+                    for i in range(n_bars)
+                ))
+            f.write("]}")
+            count += len(close)
+        f.write("}}")
+    return count
+
+
+def write_compact(path: str, scale: int, seed: int, end: dt.date) -> int:
+    rng = _rng(seed, scale, "compact")
+    dates = np.array([day.isoformat() for day in _days(end, HISTORY["compact"][0] * scale)], dtype=object)
+    data, count = {}, 0
+
+    def records(selected, totals, counts):
+        means = np.round(totals / np.maximum(counts.sum(axis=1), 1), 4)
+        return [
+            {"date": date, "mean_sentiment": float(mean), "n_positive": int(c[2]), "n_neutral": int(c[1]), "n_negative": int(c[0])}
+            for date, mean, c in zip(dates[selected], means[selected], counts[selected])
+        ]
+
+    for ticker in COMPANIES:
+        pooled_totals, pooled_counts = np.zeros(len(dates)), np.zeros((len(dates), 3), dtype=np.int64)
+        by_source = {}
+        for source, share in COMPACT_SOURCES.items():
+            present = rng.random(len(dates)) < share
+            counts = rng.poisson(2, (len(dates), 3)) * present[:, None]
+            present &= counts.sum(axis=1) > 0
+            totals = (counts[:, 2] - counts[:, 0]) * rng.uniform(0.3, 1.0, len(dates))
+            by_source[source] = records(present, totals, counts)
+            pooled_totals += np.where(present, totals, 0)
+            pooled_counts += counts
+        data[ticker] = {"global": records(pooled_counts.sum(axis=1) > 0, pooled_totals, pooled_counts), "by_source": by_source}
+        count += len(data[ticker]["global"])
+
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"tickers": {ticker: name for ticker, (name, _) in COMPANIES.items()}, "data": data}, f, ensure_ascii=False)
+    return count
+
+
+def write_reddit(path: str, scale: int, seed: int, end: dt.date) -> int:
+    rng = _rng(seed, scale, "reddit")
+    n_days, per_day = HISTORY["reddit"]
+    texts = _Texts(rng)
+    posts = {ticker: [] for ticker in COMPANIES}
+    for day, tickers, seconds in _day_items(rng, _days(end, n_days * scale), per_day):
+        n = len(tickers)
+        titles, bodies = texts.batch(n, 9), texts.batch(n, 260)
+        scores, comments, sentiments = rng.integers(0, 500, n), rng.integers(0, 200, n), rng.uniform(-1, 1, n)
+        for i, ticker in enumerate(tickers):
+            posts[ticker].append({
+                "title": titles[i], "selftext": bodies[i], "score": int(scores[i]), "num_comments": int(comments[i]),
+                "date": day.isoformat(), "hour": _clock(seconds[i]), "sentiment": round(float(sentiments[i]), 4),
+            })
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for k, (ticker, company_posts) in enumerate(posts.items()):
+            f.write(("," if k else "") + '{"company": ' + json.dumps(COMPANIES[ticker][0]) + ', "posts": [')
+            f.write(",".join(json.dumps(post, ensure_ascii=False) for post in company_posts))
+            f.write("]}")
+        f.write("]")
+    return sum(len(company_posts) for company_posts in posts.values())
+
+
+def write_google(path: str, scale: int, seed: int, end: dt.date) -> int:
+    rng = _rng(seed, scale, "google")
+    n_days, per_day = HISTORY["google"]
+    texts = _Texts(rng)
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for day, tickers, seconds in _day_items(rng, _days(end, n_days * scale), per_day):
+            names = [COMPANIES[ticker][0] for ticker in tickers]
+            titles, summaries = texts.batch(len(tickers), 12, prefix=names), texts.batch(len(tickers), 65)
+            scores, keywords = np.round(rng.uniform(-1, 1, len(tickers)), 4), rng.integers(0, 20, len(tickers))
+            for i, ticker in enumerate(tickers):
+                score = float(scores[i])
+                f.write(("," if count else "") + json.dumps({
+                    "ticker": ticker, "company": names[i], "title": f"{titles[i]} - news.example.com",
+                    "url": f"https://news.example.com/{day.isoformat()}/{count}", "source": "news.google.com",
+                    "published_at": f"{day.isoformat()}T{_clock(seconds[i])}+00:00",
+                    "summary": summaries[i], "content_snippet": summaries[i][:200],
+                    "keyword_score": int(keywords[i]), "sentiment_method": "vader", "sentiment_score": score,
+                    "sentiment_label": "positive" if score >= 0.05 else "negative" if score <= -0.05 else "neutral",
+                }, ensure_ascii=False))
+                count += 1
+        f.write("]")
+    return count
+
+
+def write_news(path: str, scale: int, seed: int, end: dt.date) -> int:
+    rng = _rng(seed, scale, "news")
+    n_days, per_day = HISTORY["news"]
+    texts = _Texts(rng)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Company", "Text", "URL", "PublishedAt", "Sentiment", "SentimentScore"])
+        for day, tickers, seconds in _day_items(rng, _days(end, n_days * scale), per_day):
+            bodies = texts.batch(len(tickers), 40)
+            labels, scores = LABELS[rng.integers(0, 3, len(tickers))], rng.uniform(0.5, 1.0, len(tickers))
+            writer.writerows(
+                [COMPANIES[ticker][0], bodies[i], f"https://www.example.com/{day.isoformat()}/{count + i}",
+                 f"{day.isoformat()} {_clock(seconds[i])}+00:00", labels[i], float(scores[i])]
+                for i, ticker in enumerate(tickers)
+            )
+            count += len(tickers)
+    return count
+
+
+WRITERS = {
+    "stocks": write_stocks,
+    "compact": write_compact,
+    "reddit": write_reddit,
+    "google": write_google,
+    "news": write_news,
+}
+
+
+def generate(data_dir: str, scale: int = 1, seed: int = 0, end: dt.date = None) -> dict:
+    """
+    Write every file into data_dir. Returns the manifest: scale, seed, end and
+    {file: {"rows", "bytes"}}; it is also saved as data_dir/synthetic.json.
+    """
+    end = end or dt.datetime.now(dt.timezone.utc).date()
+    files = {}
+    for name, writer in WRITERS.items():
+        path = os.path.join(data_dir, FILES[name])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        rows = writer(path, scale, seed, end)
+        files[FILES[name].replace(os.sep, "/")] = {"rows": rows, "bytes": os.path.getsize(path)}
+    manifest = {"scale": scale, "seed": seed, "end": end.isoformat(), "files": files}
+    with open(os.path.join(data_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def read_manifest(data_dir: str):
+    """The manifest of a generated directory, None if there is none."""
+    try:
+        with open(os.path.join(data_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic data/ directory")
+    parser.add_argument("data_dir")
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", type=dt.date.fromisoformat, default=None, help="last day (default: today, UTC)")
+    args = parser.parse_args(sys.argv[1:])
+    manifest = generate(args.data_dir, args.scale, args.seed, args.end)
+    for name, info in manifest["files"].items():
+        print(f"✅ {name}: {info['rows']} lignes, {info['bytes'] / 1e6:.1f} Mo")
@@ -1,17 +1,37 @@
 # finance_api/main.py
 from fastapi import FastAPI, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from typing import Literal
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 import os
+import threading
 
 from finance_api.utils.fetch_data_fin import fetch_stock_data, to_json_format
 from finance_api.utils.fetch_news_data import filter_sentiments
 from finance_api.utils.fetch_reddit_data import filter_and_analyze_posts
 from finance_api.utils.fetch_google_data import filter_news_by_company
+from finance_api.utils.dashboard import dashboard, parse_tickers, stocks_batch
+from finance_api.utils.executors import offload
+from finance_api.utils.http_cache import conditional, window_version
+from finance_api.utils.price_cache import get_price_cache
+from finance_api.utils.metrics_engine import get_metrics_engine
+from finance_api.utils.search_index import get_search_index
+from finance_api.utils.sentiment_store import CLOCKS
+from finance_api.utils.serialization import SafeJSONResponse
+from finance_api.utils.instrumentation import PROMETHEUS_CONTENT_TYPE, TimingMiddleware, render
 
 
-app = FastAPI(title="Finance Data API", version="1.0")
+@asynccontextmanager
+async def lifespan(app):
+    # The search index is built in the background: the first /search does not pay for it
+    threading.Thread(target=get_search_index().refresh, name="search-index-warmup", daemon=True).start()
+    yield
+
+
+# Every payload is encoded once, NaN/inf/numpy/Timestamp-safe (orjson if installed)
+app = FastAPI(title="Finance Data API", version="1.0", default_response_class=SafeJSONResponse, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +41,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Duration, status and bytes of every request by route (INSTRUMENTATION_ENABLED=0 to turn off)
+app.add_middleware(TimingMiddleware)
+
+# Blocking handlers run on bounded "io" / "cpu" executors (@offload): identical
+# in-flight requests share one computation, 503 when an executor is saturated.
+# @conditional adds ETag / Last-Modified from the data version, 304 answers and
+# compressed bodies cached per version.
+
 TICKERS = {
     "AAPL": "Apple",
     "MSFT": "Microsoft",
@@ -39,75 +67,201 @@ def root():
     return {
         "message": "📊 Welcome to the Finance Data API",
         "available_endpoints": {
-            "/stocks": "Get stock data by ticker and period",
+            "/stocks": "Get stock data by ticker and period (format=columnar for column arrays)",
+            "/stocks/batch": "Stock data of several tickers in one response",
+            "/dashboard": "Prices, sentiment by source and metrics of several tickers in one response",
+            "/company_metrics": "Sentiment/return correlation and volatility by source and window",
+            "/search": "Full-text search of news and Reddit posts (words and \"phrases\"), with their sentiment",
+            "/metrics": "Request and per-stage timings, rows and cache counters (Prometheus text format)",
         },
         "example_usage": "/stocks?ticker=TSLA&period=7d"
     }
 
 
+def stocks_version(ticker, period, interval, format):
+    """Version des barres servies depuis le cache de prix (None si elles doivent être rafraîchies)."""
+    if ticker not in TICKERS:
+        return None  # unknown ticker, never cached
+    return get_price_cache().cached_version(ticker, period, interval)
+
 @app.get("/stocks")
+@conditional(stocks_version)
+@offload("io")
 def get_stock_data(
     ticker: str = Query(...), 
     period: Literal["1d", "3d", "7d", "1mo"] = "7d",
-    interval: Literal["15m", "1h", "1d"] = "1h"
+    interval: Literal["15m", "1h", "1d"] = "1h",
+    format: Literal["rows", "columnar"] = "rows"
 ):
     if ticker not in TICKERS:
         return {"error": f"Ticker '{ticker}' non reconnu."}
 
     df = fetch_stock_data(ticker, period, interval)
-    return to_json_format(ticker, TICKERS[ticker], df)
+    return SafeJSONResponse(to_json_format(ticker, TICKERS[ticker], df, format))
+
+@app.get("/stocks/batch")
+@offload("io")
+def get_stock_data_batch(
+    tickers: str = Query(None, description="Tickers séparés par des virgules (ex: AAPL,TSLA), tous si absent"),
+    period: Literal["1d", "3d", "7d", "1mo"] = "7d",
+    interval: Literal["15m", "1h", "1d"] = "1h",
+    format: Literal["rows", "columnar"] = "rows"
+):
+    """Cours de plusieurs tickers, récupérés en parallèle (même contenu que /stocks pour chacun)."""
+    try:
+        selected = parse_tickers(tickers) if tickers is not None else list(TICKERS)
+    except ValueError as e:
+        return SafeJSONResponse({"error": str(e)}, status_code=400)
+    return SafeJSONResponse(stocks_batch(selected, TICKERS, period, interval, format))
+
+@app.get("/dashboard")
+@offload("cpu")
+def get_dashboard(
+    tickers: str = Query(None, description="Tickers séparés par des virgules (ex: AAPL,TSLA), tous si absent"),
+    period: Literal["1d", "3d", "7d", "1mo"] = "7d",
+    interval: Literal["15m", "1h", "1d"] = "1h"
+):
+    """
+    Cours, sentiment agrégé par source sur la même période et corrélation /
+    volatilité de plusieurs tickers en une réponse. Chaque source est chargée
+    une fois, le travail par ticker est fait en parallèle.
+    """
+    try:
+        selected = parse_tickers(tickers) if tickers is not None else list(TICKERS)
+        return SafeJSONResponse(dashboard(selected, TICKERS, period, interval))
+    except ValueError as e:
+        return SafeJSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        return SafeJSONResponse({"error": str(e)}, status_code=500)
+
+@app.get("/metrics")
+def get_metrics():
+    """Histogrammes de latence et compteurs, au format texte Prometheus."""
+    return Response(render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.get("/tickers")
 def get_tickers():
     return [{"ticker": t, "name": n} for t, n in TICKERS.items()]
 
 
+@app.get("/company_metrics")
+@offload("cpu")
+def get_company_metrics(
+    ticker: str = Query(None, description="Ticker (ex: AAPL), toutes les entreprises si absent"),
+    windows: str = Query("global,7d,15d", description="Fenêtres séparées par des virgules, ex: global,7d,30d,90d")
+):
+    """
+    Corrélation sentiment/rendement et volatilité, globales et par source,
+    pour chaque fenêtre. Calculées à la demande, mémorisées par version des données.
+    """
+    try:
+        metrics = get_metrics_engine().compute([w.strip() for w in windows.split(",") if w.strip()])
+    except ValueError as e:
+        return SafeJSONResponse({"error": str(e)}, status_code=400)
+
+    if ticker is None:
+        return SafeJSONResponse(metrics)
+    if ticker not in TICKERS:
+        return {"error": f"Ticker '{ticker}' non reconnu."}
+    if TICKERS[ticker] not in metrics:
+        return SafeJSONResponse({"message": "Aucune donnée pour cette entreprise."})
+    return SafeJSONResponse(metrics[TICKERS[ticker]])
+
+
+@app.get("/search")
+@offload("cpu")
+def search(
+    q: str = Query(..., description='Mots et "phrases exactes", ex: tariff "profit warning"'),
+    company: str = Query(None, description="Entreprise ou ticker (ex: Apple, AAPL)"),
+    source: Literal["news", "google", "reddit"] = Query(None, description="Source des textes"),
+    date_from: str = Query(None, description="Date de début incluse (YYYY-MM-DD)"),
+    date_to: str = Query(None, description="Date de fin incluse (YYYY-MM-DD)"),
+    limit: int = Query(20, ge=1, le=200, description="Nombre de résultats"),
+):
+    """
+    Articles et posts contenant tous les mots / phrases de la requête, classés
+    par pertinence (BM25), avec le sentiment agrégé de tous les résultats.
+    """
+    if company in TICKERS:
+        company = TICKERS[company]
+    try:
+        result = get_search_index().search(q, company, source, date_from, date_to, limit)
+    except ValueError as e:
+        return SafeJSONResponse({"error": str(e)}, status_code=400)
+    except Exception as e:
+        return SafeJSONResponse({"error": str(e)}, status_code=500)
+    return SafeJSONResponse(result)
+
+
 CSV_PATH = os.path.join("finance_api", "data", "news_sentiment_raw.csv")
+REDDIT_PATH = "finance_api/data/reddit/reddit_data.json"
+GOOGLE_PATH = "finance_api/data/stock_news_google.json"
+
+
+# Version of the rows a sentiment response is built from: @conditional passes
+# the same `now` to the version and to the handler (news: local time, others: UTC)
+def news_version(ticker, period, now):
+    return window_version(CSV_PATH, "news", ticker.upper(), now - timedelta(days=int(period.replace("j", ""))), now)
+
+def reddit_version(company_name, days_back, now):
+    return window_version(REDDIT_PATH, "reddit", company_name.lower(), now - timedelta(days=days_back), now)
+
+def google_version(company_name, days_back, now):
+    return window_version(GOOGLE_PATH, "google", company_name.lower(), now - timedelta(days=days_back), now)
 
 
 @app.get("/get_new_sentiments")
+@conditional(news_version, clock=CLOCKS["news"])
+@offload("io")
 def get_sentiments(
     ticker: str = Query(..., description="Ticker ou nom de l'entreprise (ex: AAPL)"),
-    period: str = Query("7j", description="Période en jours, ex: 7j ou 30j")
+    period: str = Query("7j", description="Période en jours, ex: 7j ou 30j"),
+    now: datetime = None
 ):
     """
     Retourne les sentiments d'une entreprise sur une période donnée.
     """
     try:
-        df = filter_sentiments(CSV_PATH, ticker, period)
+        df = filter_sentiments(CSV_PATH, ticker, period, now)
         if df.empty:
-            return JSONResponse({"message": "Aucun article trouvé pour cette période."})
+            return SafeJSONResponse({"message": "Aucun article trouvé pour cette période."})
         
-        return df.to_dict(orient="records")
+        return SafeJSONResponse(df.to_dict(orient="records"))
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return SafeJSONResponse({"error": str(e)}, status_code=500)
 
 
 
 @app.get("/get_reddit_sentiments")
+@conditional(reddit_version, clock=CLOCKS["reddit"])
+@offload("io")
 def get_reddit_sentiments(
     company_name: str = Query(..., description="Nom de l'entreprise"),
-    days_back: int = Query(7, description="Nombre de jours dans le passé")
+    days_back: int = Query(7, description="Nombre de jours dans le passé"),
+    now: datetime = None
 ):
     # Path to the single JSON containing all companies
-    file_path = "finance_api/data/reddit/reddit_data.json"
+    file_path = REDDIT_PATH
 
     try:
-        result = filter_and_analyze_posts(file_path, company_name, days_back)
-        return JSONResponse(result)
+        result = filter_and_analyze_posts(file_path, company_name, days_back, now)
+        return SafeJSONResponse(result)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
+        return SafeJSONResponse({"error": str(e)}, status_code=500)
     
 
 # FastAPI endpoint
 @app.get("/get_news_sentiments_google")
+@conditional(google_version, clock=CLOCKS["google"])
+@offload("io")
 def get_news_sentiments(
     company_name: str = Query(..., description="Company name"),
-    days_back: int = Query(7, description="Number of days to look back")
+    days_back: int = Query(7, description="Number of days to look back"),
+    now: datetime = None
 ):
-    file_path = "finance_api/data/stock_news_google.json"  # path to your JSON file
+    file_path = GOOGLE_PATH  # path to your JSON file
     try:
-        result = filter_news_by_company(file_path, company_name, days_back)
-        return JSONResponse(result)
+        result = filter_news_by_company(file_path, company_name, days_back, now)
+        return SafeJSONResponse(result)
     except Exception as e:
-        return JSONResponse({"error": str(e)}, status_code=500)
\ No newline at end of file
+        return SafeJSONResponse({"error": str(e)}, status_code=500)
\ No newline at end of file
@@ -1,49 +1,100 @@
-import requests
+import os
 import pandas as pd
 from datetime import datetime, timedelta
 
-# Your API key
-API_KEY = "c682a0eeff664f1b83715929492c7007"
+from finance_api.sentiment import score_texts
+from finance_api.utils.score_cache import get_score_cache
+from finance_api.utils.news_ingest import ingest_news
+from finance_api.utils.article_store import ArticleStore
+from finance_api.utils.sentiment_aggregates import get_sentiment_aggregates
+from finance_api.utils.sentiment_store import IndexedSource
+from finance_api.utils.near_duplicates import score_deduplicated
 
-# List of 10 companies/tickers
-companies = ["AAPL", "MSFT", "AMZN", "GOOGL", "TSLA",
-           "MC.PA", "TTE.PA", "SAN.PA", "AIR.PA", "SU.PA"]
+# The 10 tickers -> company as written in the Company column of news_sentiment_raw.csv.
+# It is the NewsAPI query, the store's company key (watermarks) and the served key:
+# rows must never be keyed by ticker, or a company would appear under two names.
+NEWS_COMPANIES = {
+    "AAPL": "Apple",
+    "MSFT": "Microsoft",
+    "AMZN": "Amazon",
+    "GOOGL": "Google OR Alphabet",
+    "TSLA": "Tesla",
+    "MC.PA": "LVMH OR Moet Hennessy",
+    "TTE.PA": "TotalEnergies",
+    "SAN.PA": "Sanofi",
+    "AIR.PA": "Airbus",
+    "SU.PA": "Schneider Electric",
+}
+companies = list(NEWS_COMPANIES.values())
 
-# Date range: last month
+# Append-only article store; the existing CSV seeds it on the first run
+store = ArticleStore()
+if store.count("news") == 0 and os.path.exists(store.sources["news"]["path"]):
+    store.import_file("news")
+
+# Date range: from each company's watermark (newest article stored),
+# or the last month for a company never fetched
 end_date = datetime.today()
 start_date = end_date - timedelta(days=30)
-from_date = start_date.strftime("%Y-%m-%d")
 to_date = end_date.strftime("%Y-%m-%d")
-
-# Prepare a list to store all articles
-all_articles = []
-
-# Loop through each company
+from_dates = {}
 for company in companies:
-    url = (
-    f"https://newsapi.org/v2/everything?"
-    f"q={company}&"
-    f"from={from_date}&"
-    f"to={to_date}&"
-    f"sortBy=publishedAt&"
-    f"pageSize=100&"
-    f"language=en&"  # <-- filter English articles
-    f"apiKey={API_KEY}"
-    )
-
-    response = requests.get(url)
-    data = response.json()
-
-    # Check if articles exist
-    articles = data.get("articles", [])
-    for article in articles:
-        all_articles.append({
-            "Company": company,
-            "Title": article.get("title"),
-            "Summary": article.get("description"),
-            "URL": article.get("url"),
-            "PublishedAt": article.get("publishedAt")
-        })
+    watermark = store.watermark("news", company)
+    from_dates[company] = watermark.rstrip("Z") if watermark else start_date.strftime("%Y-%m-%d")
+
+# Fetch all companies and pages concurrently (API key: NEWSAPI_KEY),
+# articles are streamed to a JSON Lines file as pages arrive
+ARTICLES_PATH = os.path.join("finance_api", "data", ".cache", "newsapi_articles.jsonl")
+stats = ingest_news(companies, from_dates, to_date, ARTICLES_PATH)
+print(f"Fetched {stats['articles']} articles in {stats['seconds']:.1f}s "
+      f"({stats['requests']} requests, {stats['retries']} retries, {stats['errors']} errors)")
 
 # Convert to DataFrame
-df = pd.DataFrame(all_articles)
+if stats["articles"]:
+    df = pd.read_json(ARTICLES_PATH, lines=True, dtype=False)
+else:
+    df = pd.DataFrame(columns=["Company", "Title", "Summary", "URL", "PublishedAt"])
+
+# Drop articles without summary, and articles already stored
+# (the watermark article itself is returned again by the API)
+df["Summary"] = df["Summary"].fillna("").astype(str)
+df = df[df["Summary"].str.strip() != ""]
+df = df.drop_duplicates(subset=["Company", "URL"])
+df = df[~pd.Series(store.known("news", df.to_dict(orient="records")), index=df.index, dtype=bool)]
+df = df.reset_index(drop=True)
+
+# Score summaries: one article per cluster of near-duplicates (syndicated stories),
+# articles seen on a previous run come from the score cache
+sentiments, dedup = score_deduplicated(df["Summary"], score_texts)
+print(f"Near-duplicates: {dedup['texts']} articles in {dedup['clusters']} clusters "
+      f"(dedup ratio {dedup['dedup_ratio']:.1%})")
+df["Sentiment"] = [s[0] for s in sentiments]
+df["SentimentScore"] = [s[1] for s in sentiments]
+
+stats = get_score_cache().stats()
+print(f"Scored {len(df)} articles: {stats['hits']} from cache, {stats['misses']} by the model")
+
+# Append the new articles in the CSV's layout, then rewrite the CSV only if something was added
+df["Text"] = df["Title"].fillna("").astype(str) + ". " + df["Summary"]
+df["PublishedAt"] = pd.to_datetime(df["PublishedAt"], utc=True).astype(str)
+columns = ["Company", "Text", "URL", "PublishedAt", "Sentiment", "SentimentScore"]
+added = store.append("news", df[columns].to_dict(orient="records"))
+
+# One naming convention in Company before the CSV is rewritten
+unexpected = sorted(set(store.companies("news")) - set(companies))
+if unexpected:
+    raise SystemExit(f"❌ Company values outside NEWS_COMPANIES in the news store: {unexpected}")
+
+written = store.materialize("news")
+print(f"Stored {added} new articles ({store.count('news')} in total), "
+      f"{'rewrote' if written else 'kept'} {store.sources['news']['path']}")
+
+# Partitioned layout of the CSV (if built): only the days that received articles are rewritten
+news_source = IndexedSource(store.sources["news"]["path"], "news")
+if written and news_source.partitions.exists():
+    partitions = news_source.partition()
+    print(f"Rewrote {partitions['written']} partitions ({partitions['unchanged']} unchanged)")
+
+# Fold the new articles into the materialized (company, source, day) aggregates
+folded = get_sentiment_aggregates().sync(store)
+print(f"Folded {folded} articles into the sentiment aggregates")
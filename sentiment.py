@@ -0,0 +1,364 @@
+# finance_api/sentiment.py
+"""
+Batched FinBERT sentiment scoring.
+
+Same model and labels as `analyze_sentiment` in models/FinBert.ipynb, but
+texts are tokenized once, grouped by length so each batch is padded only to
+its longest text, and run under torch.inference_mode().
+
+    scorer = SentimentScorer.from_pretrained(batch_size=32, num_threads=4)
+    for label, score in scorer.score(df["Summary"]):
+        ...
+
+The forward pass runs on one of BACKENDS, chosen with `backend=` or the
+SENTIMENT_BACKEND environment variable:
+    eager      full-precision PyTorch model
+    int8       dynamic int8 quantization of the Linear layers
+    onnx       graph exported to ONNX and run by onnxruntime (optional dependency)
+    onnx-int8  same graph with int8 dynamic quantization by onnxruntime
+Use `backend_agreement` to check a backend against eager mode, and
+benchmarks/bench_sentiment_backends.py for throughput and latency.
+
+`CascadeScorer` puts a VADER lexicon pass in front of the transformer: only
+texts whose compound score falls in an ambiguity band are escalated.
+"""
+import os
+import tempfile
+from typing import Iterable, Iterator, List, NamedTuple, Tuple
+
+import torch
+import torch.nn.functional as F
+
+from finance_api.utils.score_cache import CachedScorer, get_score_cache
+
+
+MODEL_NAME = "yiyanghkust/finbert-tone"
+
+# Order of the notebook's analyze_sentiment (index of the model output -> label)
+SENTIMENT_LABELS = ["positive", "neutral", "negative"]
+
+BACKENDS = ("eager", "int8", "onnx", "onnx-int8")
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", "eager")
+
+
+# -----------------------------
+# --- Inference backends ---
+# -----------------------------
+# Each builder returns forward(input_ids, attention_mask) -> logits tensor.
+
+def _eager_backend(model, **_):
+    def forward(input_ids, attention_mask):
+        return model(input_ids=input_ids, attention_mask=attention_mask).logits
+    return forward
+
+
+def _int8_backend(model, **_):
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return _eager_backend(quantized)
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Exportable wrapper: tensors in, logits out."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def _onnx_backend(model, onnx_path: str = None, num_threads: int = None, quantize: bool = False, **_):
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise ImportError("The 'onnx' sentiment backends require onnxruntime (pip install onnxruntime)") from e
+
+    if onnx_path is None:
+        onnx_path = os.path.join(tempfile.mkdtemp(prefix="finbert_"), "model.onnx")
+    if not os.path.exists(onnx_path):
+        sample = torch.ones(1, 8, dtype=torch.long)
+        dynamic = {0: "batch", 1: "sequence"}
+        torch.onnx.export(
+            _LogitsOnly(model).eval(), (sample, sample), onnx_path,
+            input_names=["input_ids", "attention_mask"], output_names=["logits"],
+            dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic, "logits": {0: "batch"}},
+            dynamo=False,
+        )
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.splitext(onnx_path)[0] + ".int8.onnx"
+        if not os.path.exists(quantized_path):
+            quantize_dynamic(onnx_path, quantized_path, weight_type=QuantType.QInt8)
+        onnx_path = quantized_path
+
+    options = ort.SessionOptions()
+    if num_threads:
+        options.intra_op_num_threads = num_threads
+    session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+
+    def forward(input_ids, attention_mask):
+        logits = session.run(None, {
+            "input_ids": input_ids.numpy().astype("int64"),
+            "attention_mask": attention_mask.numpy().astype("int64"),
+        })[0]
+        return torch.from_numpy(logits)
+    return forward
+
+
+_BACKEND_BUILDERS = {
+    "eager": _eager_backend,
+    "int8": _int8_backend,
+    "onnx": _onnx_backend,
+    "onnx-int8": lambda model, **kwargs: _onnx_backend(model, quantize=True, **kwargs),
+}
+
+
+class SentimentScorer:
+    """
+    Scores texts in length-bucketed batches with dynamic padding.
+
+    Args:
+        model: sequence classification model with 3 labels
+        tokenizer: tokenizer matching the model
+        batch_size (int): texts per forward pass
+        max_length (int): truncation length, in tokens
+        num_threads (int): torch CPU threads (None: torch default)
+        bucket_batches (int): batches tokenized and sorted by length together
+        model_id (str): identifies the model in caches (default: its name or path)
+        backend (str): one of BACKENDS (default: SENTIMENT_BACKEND)
+        onnx_path (str): where the "onnx" backend exports the graph (reused if present)
+    """
+
+    def __init__(self, model, tokenizer, batch_size: int = 32, max_length: int = 512,
+                 num_threads: int = None, bucket_batches: int = 8, model_id: str = None,
+                 backend: str = None, onnx_path: str = None):
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.bucket_batches = bucket_batches
+        self.backend = backend or SENTIMENT_BACKEND
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown sentiment backend '{self.backend}', expected one of {BACKENDS}")
+        base_id = model_id or getattr(model.config, "_name_or_path", "") or "local"
+        # Quantized/exported scores may differ slightly: keep them apart in caches
+        self.model_id = base_id if self.backend == "eager" else f"{base_id}#{self.backend}"
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self._run = _BACKEND_BUILDERS[self.backend](self.model, onnx_path=onnx_path, num_threads=num_threads)
+
+    @classmethod
+    def from_pretrained(cls, model_name: str = MODEL_NAME, **kwargs) -> "SentimentScorer":
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name)
+        return cls(model, tokenizer, **kwargs)
+
+    def _forward(self, encoded: List[List[int]]) -> torch.Tensor:
+        """Probabilities for a batch of token id lists, padded to its longest one."""
+        batch = self.tokenizer.pad({"input_ids": encoded}, padding=True, return_tensors="pt")
+        with torch.inference_mode():
+            logits = self._run(batch["input_ids"], batch["attention_mask"])
+        return F.softmax(logits, dim=1)
+
+    def score_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """(label, probability of the label) for each text, in input order."""
+        if not texts:
+            return []
+        encoded = self.tokenizer(list(texts), truncation=True, max_length=self.max_length)["input_ids"]
+
+        # Length buckets: consecutive texts of the sorted order share a batch
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        results = [None] * len(encoded)
+        for start in range(0, len(order), self.batch_size):
+            indices = order[start:start + self.batch_size]
+            probs = self._forward([encoded[i] for i in indices])
+            scores, labels = probs.max(dim=1)
+            for i, label, score in zip(indices, labels.tolist(), scores.tolist()):
+                results[i] = (SENTIMENT_LABELS[label], score)
+        return results
+
+    def score(self, texts: Iterable[str]) -> Iterator[Tuple[str, float]]:
+        """
+        Lazily score an iterable of texts, yielding (label, score) in input order.
+
+        Texts are consumed `batch_size * bucket_batches` at a time.
+        """
+        window = self.batch_size * self.bucket_batches
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) == window:
+                yield from self.score_batch(chunk)
+                chunk = []
+        yield from self.score_batch(chunk)
+
+
+def backend_agreement(reference: SentimentScorer, candidate: SentimentScorer, texts: List[str]) -> dict:
+    """
+    Compare a candidate backend with a reference (normally eager) on the same texts.
+
+    Returns the share of identical labels and the mean/max absolute score difference.
+    """
+    texts = list(texts)
+    expected = reference.score_batch(texts)
+    actual = candidate.score_batch(texts)
+    same = sum(e[0] == a[0] for e, a in zip(expected, actual))
+    diffs = [abs(e[1] - a[1]) for e, a in zip(expected, actual)]
+    return {
+        "backend": candidate.backend,
+        "texts": len(texts),
+        "label_agreement": same / len(texts) if texts else 1.0,
+        "mean_score_diff": sum(diffs) / len(diffs) if diffs else 0.0,
+        "max_score_diff": max(diffs, default=0.0),
+    }
+
+
+# -----------------------------
+# --- VADER -> FinBERT cascade ---
+# -----------------------------
+
+# Same neutral zone as the Reddit compound scores in utils/analysis.py
+VADER_NEUTRAL_THRESHOLD = 0.05
+DEFAULT_AMBIGUITY_BAND = (-0.5, 0.5)
+
+
+class CascadeResult(NamedTuple):
+    label: str
+    score: float
+    tier: str        # "vader" or "finbert"
+    compound: float  # VADER compound score, always computed
+
+
+def vader_label(compound: float) -> str:
+    if compound > VADER_NEUTRAL_THRESHOLD:
+        return "positive"
+    if compound < -VADER_NEUTRAL_THRESHOLD:
+        return "negative"
+    return "neutral"
+
+
+class CascadeScorer:
+    """
+    Scores every text with VADER and escalates the ambiguous ones to the transformer.
+
+    A text is escalated when band[0] <= compound <= band[1]. Lexicon results
+    use |compound| as score; escalated ones the transformer's probability.
+
+    Args:
+        transformer: scorer with score_batch(texts), e.g. SentimentScorer or
+            CachedScorer (default: the shared FinBERT scorer, loaded on first escalation)
+        band (tuple): (low, high) compound range sent to the transformer
+        window (int): texts scored together by `score`
+    """
+
+    def __init__(self, transformer=None, band: Tuple[float, float] = DEFAULT_AMBIGUITY_BAND,
+                 window: int = 256):
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+        self.analyzer = SentimentIntensityAnalyzer()
+        self._transformer = transformer
+        self.band = band
+        self.window = window
+        self.n_texts = 0
+        self.n_escalated = 0
+
+    @property
+    def transformer(self):
+        if self._transformer is None:
+            self._transformer = get_scorer()
+        return self._transformer
+
+    def escalates(self, compound: float) -> bool:
+        return self.band[0] <= compound <= self.band[1]
+
+    def score_batch(self, texts: List[str]) -> List[CascadeResult]:
+        texts = list(texts)
+        compounds = [self.analyzer.polarity_scores(text or "")["compound"] for text in texts]
+        results = [CascadeResult(vader_label(c), abs(c), "vader", c) for c in compounds]
+
+        escalated = [i for i, c in enumerate(compounds) if self.escalates(c)]
+        if escalated:
+            scored = self.transformer.score_batch([texts[i] for i in escalated])
+            for i, (label, score) in zip(escalated, scored):
+                results[i] = CascadeResult(label, score, "finbert", compounds[i])
+
+        self.n_texts += len(texts)
+        self.n_escalated += len(escalated)
+        return results
+
+    def score(self, texts: Iterable[str]) -> Iterator[CascadeResult]:
+        """Lazily score an iterable of texts, in input order."""
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) == self.window:
+                yield from self.score_batch(chunk)
+                chunk = []
+        yield from self.score_batch(chunk)
+
+    def stats(self) -> dict:
+        return {
+            "texts": self.n_texts,
+            "escalated": self.n_escalated,
+            "escalation_rate": self.n_escalated / self.n_texts if self.n_texts else 0.0,
+            "band": list(self.band),
+        }
+
+
+def cascade_agreement(cascade: CascadeScorer, texts: List[str]) -> dict:
+    """
+    Compare the cascade with running the transformer on every text.
+
+    Reports the escalation rate, the overall label agreement and the
+    agreement of the lexicon tier alone (texts VADER kept). The cascade's
+    counters (stats) are left as they were.
+    """
+    texts = list(texts)
+    baseline = cascade.transformer.score_batch(texts)
+    counters = (cascade.n_texts, cascade.n_escalated)
+    try:
+        results = cascade.score_batch(texts)
+    finally:
+        cascade.n_texts, cascade.n_escalated = counters
+
+    kept = [(r, b) for r, b in zip(results, baseline) if r.tier == "vader"]
+    same = sum(r.label == b[0] for r, b in zip(results, baseline))
+    return {
+        "texts": len(texts),
+        "escalation_rate": (len(texts) - len(kept)) / len(texts) if texts else 0.0,
+        "label_agreement": same / len(texts) if texts else 1.0,
+        "lexicon_tier_agreement": sum(r.label == b[0] for r, b in kept) / len(kept) if kept else 1.0,
+    }
+
+
+_SCORER = None
+
+
+def get_scorer(**kwargs) -> SentimentScorer:
+    """Process-wide FinBERT scorer, loaded on first use."""
+    global _SCORER
+    if _SCORER is None:
+        _SCORER = SentimentScorer.from_pretrained(**kwargs)
+    return _SCORER
+
+
+def analyze_sentiment(text: str) -> Tuple[str, float]:
+    """Drop-in replacement for the notebook function: (label, score) of one text."""
+    return get_scorer().score_batch([text])[0]
+
+
+def score_texts(texts: Iterable[str], use_cache: bool = True, **kwargs) -> Iterator[Tuple[str, float]]:
+    """
+    (label, score) for each text with the shared scorer.
+
+    With use_cache, texts already scored by this model are read from the
+    persistent score cache and only the new ones go through the model.
+    """
+    scorer = get_scorer(**kwargs)
+    if use_cache:
+        scorer = CachedScorer(scorer, get_score_cache())
+    return scorer.score(texts)
@@ -0,0 +1,39 @@
+# finance_api/tests/conftest.py
+"""
+The code imports itself as `finance_api` (the repository checkout) and reads
+its data relative to the checkout's parent directory ("finance_api/data/...").
+The checkout is registered under that name when its directory is named
+otherwise, and `workspace` gives tests such a parent directory.
+"""
+import os
+import sys
+import types
+import importlib.util
+
+import pytest
+
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(PACKAGE_DIR, "data")
+
+if importlib.util.find_spec("finance_api") is None:
+    if os.path.basename(PACKAGE_DIR) == "finance_api":
+        sys.path.insert(0, os.path.dirname(PACKAGE_DIR))
+    else:
+        package = types.ModuleType("finance_api")
+        package.__path__ = [PACKAGE_DIR]
+        sys.modules["finance_api"] = package
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """
+    Temporary parent directory holding `finance_api/data` (a copy of the
+    repository's data/), made the working directory.
+    """
+    import shutil
+
+    data_dir = tmp_path / "finance_api" / "data"
+    shutil.copytree(DATA_DIR, data_dir, ignore=shutil.ignore_patterns(".*"))
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
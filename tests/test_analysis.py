@@ -0,0 +1,144 @@
+# finance_api/tests/test_analysis.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_api.utils import analysis
+from finance_api.utils.sentiment_aggregates import COMPACT_SOURCES, COMPANIES
+
+
+DATA = os.path.join("finance_api", "data")
+
+REDDIT = pd.DataFrame({
+    "company": ["Apple", "apple", "APPLE", "Unknown"],
+    "date": ["2024-05-01T10:00:00", "2024-05-01T18:00:00", "2024-05-02T09:00:00", "2024-05-01T10:00:00"],
+    "sentiment": [0.6, -0.02, -0.4, 0.9],
+    "title": ["a", "b", "c", "d"],
+    "selftext": [None, "", "x", None],
+})
+NEWS = pd.DataFrame({
+    "Company": ["Apple", "Tesla", "Tesla"],
+    "PublishedAt": ["2024-05-01T08:00:00Z", "2024-05-01T08:00:00Z", "2024-05-01T09:00:00Z"],
+    "Sentiment": ["negative", "positive", "bogus"],
+    "Text": ["e", "f", "g"],
+})
+GOOGLE = pd.DataFrame({
+    "company": ["apple"],
+    "published_at": ["2024-05-01T23:30:00Z"],
+    "sentiment_score": [0.25],
+    "title": ["h"],
+})
+
+
+@pytest.fixture
+def daily():
+    return analysis.aggregate_daily(analysis.build_sentiment_frame(COMPANIES, REDDIT, NEWS, GOOGLE))
+
+
+def test_one_row_per_company_source_day(daily):
+    rows = {(r.company, r.source, r.day.strftime("%Y-%m-%d")): r for r in daily.itertuples()}
+    assert sorted(rows) == [
+        ("Apple", "news", "2024-05-01"), ("Apple", "news_google", "2024-05-01"),
+        ("Apple", "reddit", "2024-05-01"), ("Apple", "reddit", "2024-05-02"),
+        ("Tesla", "news", "2024-05-01"),
+    ]
+    # Reddit scores become 1 / 0 / -1, companies are matched whatever their case
+    apple = rows[("Apple", "reddit", "2024-05-01")]
+    assert (apple.total, apple.count, apple.n_positive, apple.n_neutral, apple.n_negative) == (1, 2, 1, 1, 0)
+    # Unknown labels are left out of the mean and the counts
+    tesla = rows[("Tesla", "news", "2024-05-01")]
+    assert (tesla.mean, tesla.count, tesla.n_positive, tesla.n_neutral) == (1.0, 1, 1, 0)
+
+
+def test_daily_sentiment_json(daily):
+    output = analysis.to_daily_sentiment_json(daily, COMPANIES, ["reddit", "news", "news_google"])
+    assert [(o["company"], o["source"]) for o in output] == [
+        ("Apple", "reddit"), ("Apple", "news"), ("Apple", "news_google"), ("Tesla", "news"),
+    ]
+    assert output[0]["daily_sentiment"] == [
+        {"Date": "2024-05-01", "AvgSentiment": 0.5}, {"Date": "2024-05-02", "AvgSentiment": -1.0},
+    ]
+
+
+def test_compact_json_pools_the_sources(daily):
+    compact = analysis.to_compact_json(daily, COMPANIES)
+    assert compact["tickers"]["AAPL"] == "Apple" and set(compact["data"]) == {"AAPL", "TSLA"}
+
+    apple = compact["data"]["AAPL"]
+    # Keys and order of sentiment_compact.json
+    assert list(apple["by_source"]) == [key for key in COMPACT_SOURCES.values()]
+    assert apple["by_source"]["google"] == [
+        {"date": "2024-05-01", "mean_sentiment": 0.25, "n_positive": 1, "n_neutral": 0, "n_negative": 0},
+    ]
+    # 2024-05-01: reddit 1 + 0, news -1, google 0.25
+    assert apple["global"][0] == {"date": "2024-05-01", "mean_sentiment": round(0.25 / 4, 4),
+                                  "n_positive": 2, "n_neutral": 1, "n_negative": 1}
+    assert list(compact["data"]["TSLA"]["by_source"]) == ["news media"]
+
+
+def _reference(rows, column, values):
+    """Per-company daily mean, one frame per company and source (the former script)."""
+    df = rows.assign(Date=pd.to_datetime(rows[column], utc=True).dt.tz_convert(None).dt.strftime("%Y-%m-%d"),
+                     value=values)
+    return df.groupby("Date")["value"].mean().reset_index().rename(columns={"value": "AvgSentiment"})
+
+
+def test_repository_data_matches_the_per_company_computation(workspace, monkeypatch):
+    monkeypatch.setattr(analysis, "REDDIT_PATH", os.path.join(DATA, "reddit", "reddit_data.json"))
+    monkeypatch.setattr(analysis, "NEWS_PATH", os.path.join(DATA, "news_sentiment_raw.csv"))
+    monkeypatch.setattr(analysis, "NEWS_GOOGLE_PATH", os.path.join(DATA, "stock_news_google.json"))
+    reddit, news, google = analysis.load_sources()
+    daily = analysis.aggregate_daily(analysis.build_sentiment_frame(COMPANIES, reddit, news, google))
+    output = {(o["company"], o["source"]): o["daily_sentiment"]
+              for o in analysis.to_daily_sentiment_json(daily, COMPANIES, ["reddit", "news", "news_google"])}
+
+    def check(company, source, rows, column, values):
+        expected = _reference(rows, column, values)
+        result = pd.DataFrame(output[(company, source)])
+        assert result["Date"].tolist() == expected["Date"].tolist()
+        np.testing.assert_allclose(result["AvgSentiment"], expected["AvgSentiment"])
+
+    rows = reddit[reddit["company"].str.lower() == "apple"]
+    score = rows["sentiment"].astype(float)
+    check("Apple", "reddit", rows, "date", np.where(score > 0.05, 1, np.where(score < -0.05, -1, 0)))
+    rows = news[news["Company"].str.lower() == "tesla"]
+    check("Tesla", "news", rows, "PublishedAt", rows["Sentiment"].map({"positive": 1, "neutral": 0, "negative": -1}))
+    rows = google[google["company"].str.lower() == "apple"]
+    check("Apple", "news_google", rows, "published_at", rows["sentiment_score"].astype(float))
+
+
+def test_rewritten_files_are_reflected_in_the_outputs(workspace, monkeypatch):
+    import json
+
+    news_path = os.path.join(DATA, "news_sentiment_raw.csv")
+    monkeypatch.setattr(analysis, "REDDIT_PATH", os.path.join(DATA, "reddit", "reddit_data.json"))
+    monkeypatch.setattr(analysis, "NEWS_PATH", news_path)
+    monkeypatch.setattr(analysis, "NEWS_GOOGLE_PATH", os.path.join(DATA, "stock_news_google.json"))
+
+    def apple_news():
+        analysis.main()
+        with open("all_companies_daily_sentiment.json", encoding="utf-8") as f:
+            daily = next(o for o in json.load(f) if (o["company"], o["source"]) == ("Apple", "news"))
+        with open("sentiment_compact.json", encoding="utf-8") as f:
+            compact = json.load(f)["data"]["AAPL"]["by_source"]["news media"]
+        return daily["daily_sentiment"], compact
+
+    before, _ = apple_news()
+    assert any(day["AvgSentiment"] != -1.0 for day in before)
+
+    # Every Apple article relabeled negative, half of them removed
+    news = pd.read_csv(news_path)
+    apple = news.index[news["Company"].str.lower() == "apple"]
+    news.loc[apple, "Sentiment"] = "negative"
+    news = news.drop(apple[::2])
+    news.to_csv(news_path, index=False)
+
+    after, compact = apple_news()
+    assert all(day["AvgSentiment"] == -1.0 for day in after)
+    assert sum(day["n_negative"] for day in compact) == len(apple) - len(apple[::2])
+    assert sum(day["n_positive"] + day["n_neutral"] for day in compact) == 0
+    # The report writes its two files and nothing else
+    assert sorted(os.listdir(workspace)) == ["all_companies_daily_sentiment.json", "finance_api", "sentiment_compact.json"]
+    assert not os.path.exists(os.path.join(DATA, ".cache"))
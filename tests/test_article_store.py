@@ -0,0 +1,95 @@
+# finance_api/tests/test_article_store.py
+import json
+
+import pandas as pd
+import pytest
+
+from finance_api.utils.article_store import SOURCES, ArticleStore, article_key, published_at, read_rows
+
+
+def _news(url, company="Apple", when="2024-05-01T10:00:00Z", text="t"):
+    return {"Company": company, "Text": text, "URL": url, "PublishedAt": when,
+            "Sentiment": "neutral", "SentimentScore": 0.5}
+
+
+@pytest.fixture
+def store(tmp_path):
+    sources = {name: {**spec, "path": str(tmp_path / f"{name}.{'csv' if name == 'news' else 'json'}")}
+               for name, spec in SOURCES.items()}
+    return ArticleStore(str(tmp_path / "articles.sqlite"), sources)
+
+
+def test_keys_and_times():
+    assert article_key({"URL": "https://a"}, SOURCES["news"]) == "https://a"
+    reddit = {"company": "Apple", "title": "t", "selftext": "", "date": "2024-05-01", "hour": "09:30"}
+    assert article_key(reddit, SOURCES["reddit"]).startswith("sha256:")
+    assert article_key(reddit, SOURCES["reddit"]) == article_key(dict(reddit), SOURCES["reddit"])
+    assert published_at(reddit, SOURCES["reddit"]) == "2024-05-01T09:30:00Z"
+    assert published_at({"PublishedAt": "2024-05-01T12:00:00+02:00"}, SOURCES["news"]) == "2024-05-01T10:00:00Z"
+    assert published_at({"PublishedAt": None}, SOURCES["news"]) is None
+
+
+def test_append_is_deduplicated_per_company(store):
+    assert store.append("news", [_news("u1"), _news("u2"), _news("u1")]) == 2
+    # Same URL under another company is another article
+    assert store.append("news", [_news("u1", company="Tesla"), _news("u2")]) == 1
+    assert store.count("news") == 3
+    assert store.companies("news") == ["Apple", "Tesla"]
+    assert store.known("news", [_news("u1"), _news("u3"), _news("u2", company="Tesla")]) == [True, False, False]
+
+
+def test_watermarks_only_move_forward(store):
+    store.append("news", [_news("u1", when="2024-05-02T00:00:00Z"), _news("u2", when="2024-05-01T00:00:00Z")])
+    assert store.watermark("news", "Apple") == "2024-05-02T00:00:00Z"
+    store.append("news", [_news("u3", when="2024-04-01T00:00:00Z")])
+    assert store.watermarks("news") == {"Apple": "2024-05-02T00:00:00Z"}
+    assert store.watermark("news", "Tesla") is None
+
+
+def test_rows_and_versions(store):
+    store.append("news", [_news("u1", when="2024-05-01T00:00:00Z"), _news("u2", when="2024-05-03T00:00:00Z")])
+    version = store.version("news")
+    store.append("news", [_news("u3", company="Tesla")])
+
+    assert [r["URL"] for r in store.rows("news")] == ["u1", "u2", "u3"]
+    assert [r["URL"] for r in store.rows("news", company="Apple", since="2024-05-02T00:00:00Z")] == ["u2"]
+    assert [(seq > version, row["URL"]) for seq, row in store.rows_since("news", version)] == [(True, "u3")]
+    assert store.version("google") == 0
+
+
+def test_materialize_only_when_changed(store):
+    path = store.sources["news"]["path"]
+    store.append("news", [_news("u1"), _news("u2")])
+    assert store.materialize("news") is True
+    assert store.materialize("news") is False
+    assert pd.read_csv(path)["URL"].tolist() == ["u1", "u2"]
+
+    store.append("news", [_news("u1")])  # nothing new
+    assert store.materialize("news") is False
+    store.append("news", [_news("u3")])
+    assert store.materialize("news") is True
+    assert store.import_file("news") == 0
+
+
+def test_reddit_round_trip(store):
+    path = store.sources["reddit"]["path"]
+    posts = [{"company": "Apple", "posts": [{"title": "a", "selftext": "", "date": "2024-05-01", "hour": "10:00"}]},
+             {"company": "Tesla", "posts": [{"title": "b", "selftext": "x", "date": "2024-05-02", "hour": "11:00"}]}]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(posts, f)
+
+    assert store.import_file("reddit") == 2
+    assert store.import_file("reddit") == 0
+    assert store.materialize("reddit", force=True) is True
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == posts
+    assert [row["company"] for row in read_rows("reddit", sources=store.sources)] == ["Apple", "Tesla"]
+
+
+def test_repository_files_import(workspace, tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.sqlite"))
+    for source in SOURCES:
+        rows = read_rows(source)
+        added = store.import_file(source)
+        assert 0 < added <= len(rows)
+        assert store.import_file(source) == 0
@@ -0,0 +1,78 @@
+# finance_api/tests/test_batch_scoring.py
+import os
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from finance_api.utils import batch_scoring
+
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="module")
+def tiny_model_dir(tmp_path_factory):
+    """Randomly initialized 3-label BERT saved as a local model directory (no download)."""
+    directory = tmp_path_factory.mktemp("tiny_model")
+    vocab = directory / "vocab.txt"
+    words = "apple tesla shares stock record profit loss sales the a of and to in".split()
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *words]) + "\n")
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(vocab))
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=tokenizer.vocab_size, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=32, max_position_embeddings=64, num_labels=3,
+    )
+    transformers.BertForSequenceClassification(config).save_pretrained(directory)
+    tokenizer.save_pretrained(directory)
+    return str(directory)
+
+
+@pytest.fixture
+def scoring(workspace, tiny_model_dir, monkeypatch):
+    # Worker processes are spawned: they import the package under its name from sys.path
+    if os.path.basename(PACKAGE_DIR) != "finance_api":
+        link = workspace / "importable" / "finance_api"
+        link.parent.mkdir()
+        link.symlink_to(PACKAGE_DIR, target_is_directory=True)
+        monkeypatch.syspath_prepend(str(link.parent))
+
+    def run(name, workers, checkpoint_dir=None):
+        report = batch_scoring.run(
+            sources=("google",), workers=workers, chunk_size=64, batch_size=8, max_length=64,
+            model=tiny_model_dir, checkpoint_dir=str(workspace / (checkpoint_dir or name)),
+            output=str(workspace / f"{name}.jsonl"), log=lambda message: None,
+        )
+        with open(report["output"], encoding="utf-8") as f:
+            return report, f.read()
+
+    return run
+
+
+def test_chunks_follow_the_files(workspace):
+    chunks = batch_scoring.make_chunks(("google",), chunk_size=64)
+    assert all(0 < len(chunk["texts"]) <= 64 for chunk in chunks)
+    assert len({chunk["id"] for chunk in chunks}) == len(chunks)
+    settings = {"model": "m"}
+    assert batch_scoring.fingerprint(chunks[0], settings) != batch_scoring.fingerprint(chunks[0], {"model": "n"})
+    assert batch_scoring.make_chunks(("google",), chunk_size=64) == chunks
+
+
+def test_output_is_the_same_with_other_workers_and_after_resume(scoring, workspace):
+    one, output = scoring("one", workers=1)
+    two, same = scoring("two", workers=2)
+    assert one["resumed"] == 0 and one["texts_scored"] == len(output.splitlines())
+    assert same == output
+
+    # Resume: only the missing and the stale chunks are scored again
+    chunks = batch_scoring.make_chunks(("google",), chunk_size=64)
+    os.remove(batch_scoring.checkpoint_path(str(workspace / "one"), chunks[0]))
+    with open(batch_scoring.checkpoint_path(str(workspace / "one"), chunks[1]), "w") as f:
+        f.write('{"fingerprint": "stale", "results": []}')
+
+    resumed, same = scoring("resumed", workers=1, checkpoint_dir="one")
+    assert resumed["resumed"] == one["chunks"] - 2
+    assert resumed["texts_scored"] == len(chunks[0]["texts"]) + len(chunks[1]["texts"])
+    assert same == output
@@ -0,0 +1,86 @@
+# finance_api/tests/test_dashboard.py
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from finance_api.utils import price_cache, sentiment_store
+from finance_api.utils.dashboard import parse_tickers, window_days
+from finance_api.utils.fetch_google_data import filter_news_by_company
+from finance_api.utils.fetch_news_data import filter_sentiments
+from finance_api.utils.fetch_reddit_data import filter_and_analyze_posts
+from finance_api.utils.http_cache import get_body_cache
+from finance_api.utils.metrics_engine import get_metrics_engine
+
+
+# Shortly after the newest rows of the repository's data
+NOW = datetime(2025, 10, 16)
+
+
+@pytest.fixture
+def client(workspace, monkeypatch):
+    from finance_api import main
+
+    monkeypatch.setattr(price_cache, "_CACHE", price_cache.PriceCache(price_cache.SnapshotProvider()))
+    for kind in sentiment_store.CLOCKS:
+        monkeypatch.setitem(sentiment_store.CLOCKS, kind, lambda: NOW)
+    get_body_cache().clear()
+    return TestClient(main.app)
+
+
+def test_parse_tickers_and_window_days():
+    assert parse_tickers(" aapl,TSLA ,,AAPL") == ["AAPL", "TSLA"]
+    with pytest.raises(ValueError):
+        parse_tickers(" , ")
+    assert (window_days("1d"), window_days("7d"), window_days("1mo")) == (1, 7, 30)
+
+
+def test_batch_holds_what_stocks_returns(client):
+    response = client.get("/stocks/batch", params={"tickers": "aapl,NOPE,TSLA,AAPL", "period": "3d"})
+    assert response.status_code == 200
+    batch = response.json()
+    assert (batch["period"], batch["interval"]) == ("3d", "1h")
+    assert list(batch["tickers"]) == ["AAPL", "NOPE", "TSLA"]
+    assert batch["tickers"]["NOPE"] == {"error": "Ticker 'NOPE' non reconnu."}
+    for ticker in ("AAPL", "TSLA"):
+        assert batch["tickers"][ticker] == client.get("/stocks", params={"ticker": ticker, "period": "3d"}).json()
+
+    columnar = client.get("/stocks/batch", params={"tickers": "MSFT", "format": "columnar"}).json()
+    assert columnar["tickers"]["MSFT"] == client.get("/stocks", params={"ticker": "MSFT", "format": "columnar"}).json()
+
+    assert client.get("/stocks/batch", params={"tickers": " , "}).status_code == 400
+    # All the tickers when none is given
+    assert list(client.get("/stocks/batch").json()["tickers"]) == [t["ticker"] for t in client.get("/tickers").json()]
+
+
+def test_dashboard_matches_the_single_ticker_endpoints(client):
+    response = client.get("/dashboard", params={"tickers": "AAPL,tsla,NOPE", "period": "1mo"})
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["days"], body["windows"]) == (30, ["global", "30d"])
+    assert list(body["tickers"]) == ["AAPL", "TSLA", "NOPE"]
+    assert body["tickers"]["NOPE"] == {"error": "Ticker 'NOPE' non reconnu."}
+
+    metrics = get_metrics_engine().compute(["global", "30d"])
+    for ticker, name in (("AAPL", "Apple"), ("TSLA", "Tesla")):
+        entry = body["tickers"][ticker]
+        assert entry["name"] == name
+        assert entry["prices"] == client.get("/stocks", params={"ticker": ticker, "period": "1mo"}).json()["data"]
+        assert entry["metrics"] == metrics[name]
+
+        sentiment = entry["sentiment"]
+        assert sentiment["news"]["count"] == len(filter_sentiments(
+            "finance_api/data/news_sentiment_raw.csv", name, "30j", NOW))
+        assert sentiment["reddit"]["count"] == filter_and_analyze_posts(
+            "finance_api/data/reddit/reddit_data.json", name.lower(), 30, NOW).get("num_posts", 0)
+        assert sentiment["google"]["count"] == filter_news_by_company(
+            "finance_api/data/stock_news_google.json", name.lower(), 30, NOW).get("num_articles", 0)
+        for summary in sentiment.values():
+            assert summary["n_positive"] + summary["n_neutral"] + summary["n_negative"] == summary["count"]
+            if summary["count"]:
+                assert -1 <= summary["mean_sentiment"] <= 1
+            else:
+                assert summary["mean_sentiment"] is None
+    assert body["tickers"]["AAPL"]["sentiment"]["reddit"]["count"] > 0
+
+    assert client.get("/dashboard", params={"tickers": ","}).status_code == 400
@@ -0,0 +1,78 @@
+# finance_api/tests/test_executors.py
+import asyncio
+import threading
+from collections import Counter
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from finance_api.utils import executors
+from finance_api.utils.executors import RETRY_AFTER_SECONDS, BoundedExecutor, Saturated, offload
+
+
+def test_bounded_executor_refuses_beyond_workers_and_queue():
+    executor = BoundedExecutor("test", workers=1, max_queue=1)
+    release = threading.Event()
+    running = [executor.submit(release.wait), executor.submit(release.wait)]
+    assert executor.pending == 2
+    with pytest.raises(Saturated):
+        executor.submit(release.wait)
+    assert executor.pending == 2
+
+    release.set()
+    for future in running:
+        future.result(timeout=5)
+    assert executor.submit(lambda x: x + 1, 1).result(timeout=5) == 2
+    assert executor.pending == 0
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """/slow?name=.. blocks until state["release"] is set, one io worker and no queue."""
+    monkeypatch.setitem(executors._EXECUTORS, "io", BoundedExecutor("io", workers=1, max_queue=0))
+    state = {"calls": Counter(), "release": threading.Event()}
+    app = FastAPI()
+
+    @app.get("/slow")
+    @offload("io")
+    def slow(name: str, size: int = 1):
+        state["calls"][name] += 1
+        state["release"].wait(5)
+        return {"name": name, "size": size}
+
+    app.state.test = state
+    return app
+
+
+async def _burst(app, params: list, wait: float = 0.3):
+    """Responses of concurrent GET /slow, the handler being released after `wait` seconds."""
+    state = app.state.test
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        requests = [asyncio.create_task(client.get("/slow", params=p)) for p in params]
+        await asyncio.sleep(wait)
+        state["release"].set()
+        return await asyncio.gather(*requests)
+
+
+def test_identical_requests_share_one_call(app):
+    # size=1 is the default: the same validated parameters
+    responses = asyncio.run(_burst(app, [{"name": "a"}] * 4 + [{"name": "a", "size": "1"}]))
+    assert [r.status_code for r in responses] == [200] * 5
+    assert all(r.json() == {"name": "a", "size": 1} for r in responses)
+    assert app.state.test["calls"] == {"a": 1}
+
+    # Once finished, the call is not remembered
+    asyncio.run(_burst(app, [{"name": "a"}], wait=0))
+    assert app.state.test["calls"] == {"a": 2}
+
+
+def test_saturated_executor_answers_503_at_once(app):
+    responses = asyncio.run(_burst(app, [{"name": "a"}, {"name": "a"}, {"name": "b"}]))
+    assert [r.status_code for r in responses] == [200, 200, 503]
+    shed = responses[2]
+    assert shed.headers["Retry-After"] == str(RETRY_AFTER_SECONDS)
+    assert "error" in shed.json()
+    # The shed request never ran, the identical one did not take a slot
+    assert app.state.test["calls"] == {"a": 1}
+    assert executors.get_executor("io").pending == 0
@@ -0,0 +1,148 @@
+# finance_api/tests/test_http_cache.py
+import gzip
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI, Query
+from fastapi.testclient import TestClient
+
+from finance_api.utils import price_cache
+from finance_api.utils.executors import offload
+from finance_api.utils.http_cache import ENCODERS, accepted_encoding, conditional, get_body_cache
+from finance_api.utils.serialization import SafeJSONResponse
+
+
+@pytest.fixture
+def app():
+    """
+    /items?name=..&size=..  versioned by state["version"] (None: unknown name)
+    /window?days=..         rows of the last N days on a pinned clock
+    """
+    state = {"version": 1, "calls": [], "clock": datetime(2024, 5, 1, 12, 0, 0, 999), "versions": []}
+    get_body_cache().clear()
+    app = FastAPI()
+
+    def items_version(name, size):
+        if name == "missing":
+            return None
+        return (state["version"], name), 1714557600
+
+    @app.get("/items")
+    @conditional(items_version)
+    @offload("io")
+    def items(name: str = Query(...), size: int = 10):
+        state["calls"].append(name)
+        if name == "broken":
+            return SafeJSONResponse({"error": "broken"}, status_code=500)
+        if name == "missing":
+            return SafeJSONResponse({"error": "unknown"}, status_code=404)
+        return {"name": name, "values": list(range(size))}
+
+    def window_version(days, now):
+        state["versions"].append(now)
+        return (days, now.isoformat()), None
+
+    @app.get("/window")
+    @conditional(window_version, clock=lambda: state["clock"])
+    @offload("io")
+    def window(days: int = 7, now: datetime = None):
+        return {"days": days, "end": now.isoformat()}
+
+    app.state.test = state
+    return app
+
+
+def test_etag_and_not_modified(app):
+    client, state = TestClient(app), app.state.test
+    first = client.get("/items", params={"name": "a"})
+    assert first.status_code == 200
+    assert first.headers["ETag"] and first.headers["Last-Modified"] == "Wed, 01 May 2024 10:00:00 GMT"
+
+    again = client.get("/items", params={"name": "a"}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 304 and again.content == b""
+    since = client.get("/items", params={"name": "a"}, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert since.status_code == 304
+    assert state["calls"] == ["a"]
+
+    state["version"] = 2
+    changed = client.get("/items", params={"name": "a"}, headers={"If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200 and changed.headers["ETag"] != first.headers["ETag"]
+    assert state["calls"] == ["a", "a"]
+
+
+def test_bodies_are_cached_per_version_and_parameters(app):
+    client, state = TestClient(app), app.state.test
+    assert client.get("/items", params={"name": "a"}).json() == client.get("/items", params={"name": "a"}).json()
+    client.get("/items", params={"name": "a", "size": 3})
+    assert state["calls"] == ["a", "a"]
+
+
+def test_large_bodies_are_compressed(app):
+    client = TestClient(app)
+    response = client.get("/items", params={"name": "a", "size": 2000}, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert response.json()["values"] == list(range(2000))
+
+    # The tag of a compressed body still validates
+    again = client.get("/items", params={"name": "a", "size": 2000},
+                       headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+    small = client.get("/items", params={"name": "a", "size": 2}, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    plain = client.get("/items", params={"name": "a", "size": 2000}, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert len(gzip.compress(plain.content)) < len(plain.content)
+
+
+def test_errors_are_never_cached(app):
+    client, state = TestClient(app), app.state.test
+    for _ in range(2):
+        response = client.get("/items", params={"name": "broken"})
+        assert response.status_code == 500 and "ETag" not in response.headers
+    for _ in range(2):
+        response = client.get("/items", params={"name": "missing"})
+        assert response.status_code == 404 and "ETag" not in response.headers
+    assert state["calls"] == ["broken", "broken", "missing", "missing"]
+
+
+def test_version_and_handler_share_the_pinned_clock(app):
+    client, state = TestClient(app), app.state.test
+    first = client.get("/window", params={"days": 7, "now": "2000-01-01T00:00:00"})
+    assert first.json() == {"days": 7, "end": "2024-05-01T12:00:00"}
+    assert state["versions"] == [datetime(2024, 5, 1, 12, 0, 0)]
+
+    # Same second: same tag; the window moved: new tag
+    state["clock"] = datetime(2024, 5, 1, 12, 0, 0, 500000)
+    assert client.get("/window", params={"days": 7}).headers["ETag"] == first.headers["ETag"]
+    state["clock"] = datetime(2024, 5, 1, 12, 0, 1)
+    moved = client.get("/window", params={"days": 7}, headers={"If-None-Match": first.headers["ETag"]})
+    assert moved.status_code == 200 and moved.json()["end"] == "2024-05-01T12:00:01"
+
+    assert "now" not in {p["name"] for p in app.openapi()["paths"]["/window"]["get"]["parameters"]}
+
+
+@pytest.mark.parametrize("header,expected", [
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0", "identity"),
+    ("*", next(iter(ENCODERS))),
+    (None, "identity"),
+])
+def test_accepted_encoding(header, expected):
+    assert accepted_encoding(header) == expected
+
+
+def test_unknown_ticker_is_an_error_never_cached(workspace, monkeypatch):
+    from finance_api import main
+
+    monkeypatch.setattr(price_cache, "_CACHE", price_cache.PriceCache(price_cache.SnapshotProvider()))
+    get_body_cache().clear()
+    client = TestClient(main.app)
+
+    for _ in range(2):
+        response = client.get("/stocks", params={"ticker": "NOPE"})
+        assert response.status_code == 200 and "ETag" not in response.headers
+        assert response.json() == {"error": "Ticker 'NOPE' non reconnu."}
+    response = client.get("/stocks", params={"ticker": "AAPL", "period": "7d", "interval": "1h"})
+    assert response.status_code == 200 and response.json()["ticker"] == "AAPL"
@@ -0,0 +1,117 @@
+# finance_api/tests/test_instrumentation.py
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from finance_api.utils import instrumentation
+from finance_api.utils.instrumentation import (
+    CACHE_REQUESTS, REQUESTS, ROWS_RETURNED, ROWS_SCANNED, STAGE_DURATION,
+    Registry, TimingMiddleware, cache_lookup, count, get_registry, render, rows, set_enabled, span,
+)
+
+
+@pytest.fixture
+def registry():
+    set_enabled(True)
+    get_registry().reset()
+    yield get_registry()
+    set_enabled(True)
+    get_registry().reset()
+
+
+def _samples(text: str) -> dict:
+    """{series: value} of a Prometheus exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            series, value = line.rsplit(" ", 1)
+            samples[series] = float(value)
+    return samples
+
+
+def test_histograms_are_cumulative():
+    registry = Registry(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        registry.observe(STAGE_DURATION, value, stage="load")
+    registry.inc(REQUESTS, route="/a", status="200")
+    registry.inc(REQUESTS, 2, route="/a", status="200")
+
+    samples = _samples(registry.render())
+    name = STAGE_DURATION
+    assert samples[f'{name}_bucket{{stage="load",le="0.1"}}'] == 1
+    assert samples[f'{name}_bucket{{stage="load",le="1.0"}}'] == 3
+    assert samples[f'{name}_bucket{{stage="load",le="+Inf"}}'] == 4
+    assert samples[f'{name}_count{{stage="load"}}'] == 4
+    assert samples[f'{name}_sum{{stage="load"}}'] == pytest.approx(4.05)
+    assert samples[f'{REQUESTS}{{route="/a",status="200"}}'] == 3
+    assert f"# TYPE {name} histogram" in registry.render()
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.inc(REQUESTS, route='say "hi"\\\n')
+    assert f'{REQUESTS}{{route="say \\"hi\\"\\\\\\n"}} 1' in registry.render()
+
+
+def test_rows_are_attributed_to_the_current_stage(registry):
+    with span("load"):
+        rows(scanned=100, returned=7)
+        with span("filter"):
+            rows(returned=2)
+        rows(returned=1)
+    rows(scanned=5)
+    cache_lookup("price", hit=True)
+    count(CACHE_REQUESTS, 2, cache="price", result="miss")
+
+    samples = _samples(render())
+    assert samples[f'{ROWS_SCANNED}{{stage="load"}}'] == 100
+    assert samples[f'{ROWS_RETURNED}{{stage="load"}}'] == 8
+    assert samples[f'{ROWS_RETURNED}{{stage="filter"}}'] == 2
+    assert samples[f'{ROWS_SCANNED}{{stage="none"}}'] == 5
+    assert samples[f'{CACHE_REQUESTS}{{cache="price",result="hit"}}'] == 1
+    assert samples[f'{CACHE_REQUESTS}{{cache="price",result="miss"}}'] == 2
+    assert samples[f'{STAGE_DURATION}_count{{stage="load"}}'] == 1
+
+
+def test_disabled_instrumentation_records_nothing(registry):
+    set_enabled(False)
+    assert span("load") is span("other")
+    with span("load"):
+        rows(scanned=1)
+    count(REQUESTS)
+    assert "disabled" in render()
+    set_enabled(True)
+    assert render() == ""
+
+
+def test_middleware_times_requests_by_route_template(registry):
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+
+    @app.get("/items/{name}")
+    def item(name: str):
+        with span("item.load"):
+            rows(scanned=3, returned=1)
+        return {"name": name}
+
+    client = TestClient(app)
+    client.get("/items/a")
+    client.get("/items/b")
+    client.get("/missing")
+
+    samples = _samples(render())
+    assert samples[f'{REQUESTS}{{route="/items/{{name}}",method="GET",status="200"}}'] == 2
+    assert samples[f'{REQUESTS}{{route="unmatched",method="GET",status="404"}}'] == 1
+    assert samples[f'{instrumentation.REQUEST_DURATION}_count{{route="/items/{{name}}"}}'] == 2
+    assert samples[f'{instrumentation.RESPONSE_BYTES}{{route="/items/{{name}}"}}'] == 2 * len(b'{"name":"a"}')
+    assert samples[f'{ROWS_SCANNED}{{stage="item.load"}}'] == 6
+
+
+def test_metrics_endpoint(registry):
+    from finance_api import main
+
+    client = TestClient(main.app)
+    client.get("/tickers")
+    response = client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert f'{REQUESTS}{{route="/tickers",method="GET",status="200"}} 1' in response.text
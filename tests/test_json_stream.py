@@ -0,0 +1,145 @@
+# finance_api/tests/test_json_stream.py
+import io
+import json
+import math
+import os
+
+import pytest
+
+from finance_api.utils.json_stream import JsonReader, read_compact, read_records, read_reddit, read_stocks
+
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+SMALL_CHUNKS = (1, 3, 7, 9, 21, 63)
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b):
+        return True
+    return a == b
+
+
+def _records(df) -> list:
+    """Rows as dicts without the nulls a column adds for fields a record lacks."""
+    rows = []
+    for row in df.to_dict(orient="records"):
+        rows.append({k: v for k, v in row.items() if not (v is None or (isinstance(v, float) and math.isnan(v)))})
+    return rows
+
+
+def _clean(record: dict) -> dict:
+    return {k: v for k, v in record.items() if v is not None}
+
+
+def _assert_rows(df, expected: list):
+    actual = _records(df)
+    assert len(actual) == len(expected)
+    for got, want in zip(actual, expected):
+        assert got.keys() == want.keys()
+        assert all(_same(got[k], want[k]) for k in want)
+
+
+@pytest.mark.parametrize("text", [
+    '[101.25, -3e-5, 0.5, 12, 1E+3, true, null, "a,b", {"x": 1.75}]',
+    '{"a": 101.25, "b": [1.5e10, -0.0], "c": "x"}',
+])
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_scalars_split_across_chunks(text, chunk_size):
+    reader = JsonReader(io.StringIO(text), chunk_size)
+    if text.startswith("["):
+        values = []
+        for _ in reader.iter_array():
+            values.append(reader.value())
+    else:
+        values = {}
+        for key in reader.iter_object():
+            values[key] = reader.value()
+    assert values == json.loads(text)
+
+
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_stocks_matches_json_load(chunk_size):
+    path = os.path.join(DATA_DIR, "stocks.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    df, meta = read_stocks(path, chunk_size=chunk_size)
+    expected = [
+        {"ticker": ticker, **_clean(bar)}
+        for ticker, entry in data["tickers"].items() for bar in entry.get("data", [])
+    ]
+    assert meta["updated_at"] == data.get("updated_at")
+    _assert_rows(df, expected)
+
+
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_compact_matches_json_load(chunk_size):
+    path = os.path.join(DATA_DIR, "sentiment_compact.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    df, meta = read_compact(path, chunk_size=chunk_size)
+    expected = []
+    for ticker, scopes in data["data"].items():
+        for day in scopes.get("global", []):
+            expected.append({"ticker": ticker, "scope": "global", **_clean(day)})
+        for source, days in scopes.get("by_source", {}).items():
+            for day in days:
+                expected.append({"ticker": ticker, "scope": "by_source", "source": source, **_clean(day)})
+    assert meta["tickers"] == data["tickers"]
+    _assert_rows(df, expected)
+
+
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_reddit_matches_json_load(chunk_size):
+    path = os.path.join(DATA_DIR, "reddit", "reddit_data.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    df, meta = read_reddit(path, chunk_size=chunk_size)
+    expected = [
+        {"entry": i, "company": entry["company"], **_clean(post)}
+        for i, entry in enumerate(data) for post in entry.get("posts") or []
+    ]
+    assert meta["companies"] == [entry.get("company") for entry in data]
+    _assert_rows(df, expected)
+
+
+# The posts of unwanted companies are never decoded: invalid ones do not matter
+FILTERED_REDDIT = """[
+  {"company": "Apple", "posts": [{"title": "a", "n": 1}]},
+  {"posts": [{"title": not json}], "company": "Tesla"},
+  {"company": "Tesla", "posts": [{"title": not json either}]},
+  {"posts": [{"title": "b \\"]}", "n": 2.5}, {"title": "c"}], "company": "apple"}
+]"""
+
+
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_raw_returns_the_value_text(chunk_size):
+    text = '{"a": [1, {"b": "x]}"}], "c": 2.5}'
+    reader = JsonReader(io.StringIO(text), chunk_size)
+    values = {}
+    for key in reader.iter_object():
+        values[key] = reader.raw()
+    assert values == {"a": '[1, {"b": "x]}"}]', "c": "2.5"}
+
+
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_reddit_skips_unwanted_companies(tmp_path, chunk_size):
+    path = tmp_path / "reddit_data.json"
+    path.write_text(FILTERED_REDDIT, encoding="utf-8")
+    df, meta = read_reddit(str(path), companies=["APPLE"], chunk_size=chunk_size)
+    assert meta["companies"] == ["Apple", "Tesla", "Tesla", "apple"]
+    _assert_rows(df, [
+        {"entry": 0, "company": "Apple", "title": "a", "n": 1.0},
+        {"entry": 3, "company": "apple", "title": 'b "]}', "n": 2.5},
+        {"entry": 3, "company": "apple", "title": "c"},
+    ])
+    with pytest.raises(ValueError):
+        read_reddit(str(path), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize("chunk_size", SMALL_CHUNKS)
+def test_records_matches_json_load(chunk_size):
+    path = os.path.join(DATA_DIR, "stock_news_google.json")
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    df, _ = read_records(path, chunk_size=chunk_size)
+    _assert_rows(df, [_clean(record) for record in data])
@@ -0,0 +1,101 @@
+# finance_api/tests/test_metrics_engine.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_api.utils.metrics_engine import MetricsEngine, parse_window
+from finance_api.utils.snapshot import load_frame
+
+
+STOCKS = os.path.join("finance_api", "data", "stocks.json")
+SENTIMENT = os.path.join("finance_api", "data", "sentiment_compact.json")
+
+
+def safe_corr(x, y):
+    """Correlation or 0, as the former metrics_bysource.py."""
+    if len(x) < 2 or x.isnull().all() or y.isnull().all():
+        return 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        corr = np.corrcoef(x.fillna(0), y.fillna(0))[0, 1]
+    return 0.0 if np.isnan(corr) else corr
+
+
+def _merged(ticker, source=None):
+    """Daily prices of `ticker` joined to its global (or per-source) sentiment, one ticker at a time."""
+    stocks, _ = load_frame(STOCKS)
+    sentiment, _ = load_frame(SENTIMENT)
+    bars = stocks[stocks["ticker"] == ticker].assign(date=lambda df: pd.to_datetime(df["date"]))
+    daily = bars.groupby("date")["close"].agg(["last", "std"]).reset_index()
+    daily.columns = ["date", "close", "volatility"]
+    daily["daily_return"] = daily["close"].pct_change()
+
+    days = sentiment[(sentiment["ticker"] == ticker)
+                     & (sentiment["scope"] == ("global" if source is None else "by_source"))]
+    if source is not None:
+        days = days[days["source"] == source]
+    days = days.assign(date=pd.to_datetime(days["date"]))[["date", "mean_sentiment"]].sort_values("date")
+    return pd.merge(daily, days, on="date", how="inner")
+
+
+@pytest.fixture
+def engine(workspace):
+    return MetricsEngine(STOCKS, SENTIMENT)
+
+
+def test_parse_window():
+    assert parse_window("global") is None
+    assert parse_window("30d") == 30
+    for window in ("0d", "7", "1w", ""):
+        with pytest.raises(ValueError):
+            parse_window(window)
+
+
+def test_windows_match_the_per_ticker_computation(engine):
+    windows = ["global", "7d", "15d", "90d"]
+    metrics = engine.compute(windows)
+    assert "Apple" in metrics and "Tesla" in metrics
+
+    merged = _merged("AAPL")
+    apple = metrics["Apple"]
+    assert apple["correlation"]["global"] == pytest.approx(safe_corr(merged["daily_return"], merged["mean_sentiment"]))
+    for n in (7, 15, 90):
+        tail = merged.tail(n)
+        assert apple["correlation"][f"{n}d"] == pytest.approx(safe_corr(tail["daily_return"], tail["mean_sentiment"]))
+        expected = tail["volatility"].mean() if len(merged) >= n else merged["volatility"].mean()
+        assert apple["volatility"][f"{n}d"] == pytest.approx(expected)
+
+    source = next(iter(apple["by_source"]))
+    merged = _merged("AAPL", source).tail(7)
+    assert apple["by_source"][source]["corr_7d"] == pytest.approx(safe_corr(merged["daily_return"], merged["mean_sentiment"]))
+    assert apple["by_source"][source]["vol_7d"] == pytest.approx(merged["volatility"].mean())
+
+
+def test_extra_windows_leave_the_others_unchanged(engine):
+    default = engine.compute()
+    wider = engine.compute(["global", "7d", "15d", "30d", "90d"])
+    for company, metrics in default.items():
+        for window in ("global", "7d", "15d"):
+            assert wider[company]["correlation"][window] == metrics["correlation"][window]
+            assert wider[company]["volatility"][window] == metrics["volatility"][window]
+
+
+def test_results_are_memoized_per_data_version(engine):
+    first = engine.compute(["global", "7d"])
+    assert engine.compute(["global", "7d"]) is first
+    panel = engine._panel
+
+    # Another window list reuses the panel; a new file version rebuilds it
+    engine.compute(["30d"])
+    assert engine._panel is panel
+    st = os.stat(SENTIMENT)
+    os.utime(SENTIMENT, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    again = engine.compute(["global", "7d"])
+    assert again is not first and engine._panel is not panel
+    assert again == first
+
+
+def test_invalid_window_is_rejected(engine):
+    with pytest.raises(ValueError):
+        engine.compute(["global", "week"])
@@ -0,0 +1,74 @@
+# finance_api/tests/test_near_duplicates.py
+import numpy as np
+import pytest
+
+from finance_api.utils.near_duplicates import (
+    cluster_texts, dedup_report, jaccard, lsh_bands, minhash_signatures, score_deduplicated, shingles,
+)
+
+
+STORY = "Apple shares rose 3% on Tuesday after the company reported record iPhone sales in China."
+
+TEXTS = [
+    STORY,
+    "Tesla recalls 2,000 vehicles over a faulty seat belt warning, regulators said on Monday.",
+    STORY.upper() + "  ",                              # case and whitespace only
+    STORY.replace("Tuesday", "Tuesday morning"),       # syndicated, slightly reworded
+    "Airbus delivered fewer jets than expected in the third quarter.",
+    None,
+    "",
+]
+
+
+def test_shingles_ignore_case_and_whitespace():
+    assert np.array_equal(shingles("Hello   World"), shingles("hello world"))
+    assert len(shingles("abc", size=5)) == 1
+    assert len(shingles(None)) == 0 and len(shingles("   ")) == 0
+    assert jaccard(shingles(STORY), shingles(STORY)) == 1.0
+    assert jaccard(shingles(""), shingles("")) == 0.0
+
+
+def test_minhash_estimates_jaccard():
+    a, b = shingles(STORY), shingles(TEXTS[3])
+    signatures = minhash_signatures([a, b, shingles(None)], num_perm=256)
+    estimate = (signatures[0] == signatures[1]).mean()
+    assert estimate == pytest.approx(jaccard(a, b), abs=0.1)
+    assert (signatures[2] == np.iinfo(np.uint64).max).all()
+
+
+@pytest.mark.parametrize("threshold", [0.5, 0.8, 0.9])
+def test_bands_cover_the_permutations(threshold):
+    bands, rows = lsh_bands(threshold)
+    assert bands * rows == 128
+    # The S-curve rises around the threshold: pairs just above it are almost always candidates
+    def probability(similarity):
+        return 1 - (1 - similarity ** rows) ** bands
+
+    assert probability(threshold + 0.05) > 0.95
+    assert probability(threshold - 0.2) < 0.25
+
+
+def test_near_duplicates_share_a_representative():
+    labels = cluster_texts(TEXTS, threshold=0.8)
+    assert labels.tolist() == [0, 1, 0, 0, 4, 5, 6]
+    assert dedup_report(labels) == {"texts": 7, "clusters": 5, "duplicates": 2, "dedup_ratio": round(2 / 7, 4)}
+    assert dedup_report([]) == {"texts": 0, "clusters": 0, "duplicates": 0, "dedup_ratio": 0.0}
+
+
+def test_a_stricter_threshold_splits_reworded_copies():
+    labels = cluster_texts(TEXTS[:4], threshold=0.99)
+    assert labels.tolist() == [0, 1, 0, 3]
+
+
+def test_only_representatives_are_scored():
+    scored = []
+
+    def score(texts):
+        texts = list(texts)
+        scored.extend(texts)
+        return [f"score of {i}" for i in range(len(texts))]
+
+    results, report = score_deduplicated(TEXTS, score, threshold=0.8)
+    assert scored == [TEXTS[i] for i in (0, 1, 4, 5, 6)]
+    assert results == ["score of 0", "score of 1", "score of 0", "score of 0", "score of 2", "score of 3", "score of 4"]
+    assert report["clusters"] == 5
@@ -0,0 +1,89 @@
+# finance_api/tests/test_news_ingest.py
+import json
+import asyncio
+import functools
+
+import httpx
+import pytest
+
+from finance_api.utils import news_ingest
+from finance_api.utils.news_ingest import NewsIngester, PAGE_SIZE
+
+
+def _article(company, page, i):
+    return {"title": f"{company} p{page} #{i}", "description": "d", "url": f"https://x/{company}/{page}/{i}",
+            "publishedAt": "2024-05-01T10:00:00Z"}
+
+
+@pytest.fixture
+def newsapi(monkeypatch):
+    """
+    Stub NewsAPI behind a mock transport. `responses` maps (company, page) to
+    a list of status codes answered in turn (200 when exhausted); `delays`
+    holds the seconds a page takes.
+    """
+    state = {"total": 2 * PAGE_SIZE + 1, "responses": {}, "delays": {}, "seen": []}
+
+    async def handler(request):
+        company, page = request.url.params["q"], int(request.url.params["page"])
+        state["seen"].append((company, page))
+        await asyncio.sleep(state["delays"].get((company, page), 0))
+        statuses = state["responses"].get((company, page), [])
+        status = statuses.pop(0) if statuses else 200
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"})
+        articles = [_article(company, page, i) for i in range(2)]
+        return httpx.Response(200, json={"totalResults": state["total"], "articles": articles})
+
+    client = functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(news_ingest.httpx, "AsyncClient", client)
+    return state
+
+
+def _ingest(tmp_path, companies=("Apple", "Tesla"), **kwargs):
+    out = tmp_path / "articles.jsonl"
+    ingester = NewsIngester(api_key="key", rate=1000, backoff=0.001, **kwargs)
+    stats = asyncio.run(ingester.ingest(list(companies), "2024-04-01", "2024-05-01", str(out)))
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    return stats, rows
+
+
+def test_every_page_of_every_company(newsapi, tmp_path):
+    stats, rows = _ingest(tmp_path)
+
+    assert sorted(newsapi["seen"]) == [(c, p) for c in ("Apple", "Tesla") for p in (1, 2, 3)]
+    assert stats["articles"] == len(rows) == 12
+    assert rows[0].keys() == {"Company", "Title", "Summary", "URL", "PublishedAt"}
+    assert {(row["Company"], row["Title"].split()[1]) for row in rows} == {
+        (c, f"p{p}") for c in ("Apple", "Tesla") for p in (1, 2, 3)
+    }
+
+
+def test_pages_are_capped(newsapi, tmp_path):
+    stats, rows = _ingest(tmp_path, companies=["Apple"], max_pages=2)
+    assert sorted(newsapi["seen"]) == [("Apple", 1), ("Apple", 2)]
+    assert len(rows) == 4
+
+
+def test_retries_then_gives_up(newsapi, tmp_path):
+    newsapi["responses"] = {("Apple", 2): [429, 503], ("Apple", 3): [500] * 10, ("Tesla", 2): [426]}
+    stats, rows = _ingest(tmp_path, max_retries=2)
+
+    assert newsapi["seen"].count(("Apple", 2)) == 3
+    assert newsapi["seen"].count(("Apple", 3)) == 3
+    assert newsapi["seen"].count(("Tesla", 2)) == 1  # not retried
+    assert stats["retries"] == 4
+    assert stats["errors"] == 2
+    assert len(rows) == 8
+
+
+def test_pages_are_written_as_they_arrive(newsapi, tmp_path):
+    newsapi["delays"] = {("Apple", 2): 0.3}
+    _, rows = _ingest(tmp_path, companies=["Apple"])
+    assert [row["Title"].split()[1] for row in rows] == ["p1", "p1", "p3", "p3", "p2", "p2"]
+
+
+def test_api_key_is_required(monkeypatch):
+    monkeypatch.delenv("NEWSAPI_KEY", raising=False)
+    with pytest.raises(RuntimeError):
+        NewsIngester()
@@ -0,0 +1,107 @@
+# finance_api/tests/test_partitions.py
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from finance_api.utils.partitions import UNDATED, PartitionStore, build_all, day_of, partition_dir
+from finance_api.utils.price_cache import SnapshotProvider
+from finance_api.utils.sentiment_store import IndexedSource
+
+
+def _frames(extra_rows=()):
+    times = ["2024-05-01 09:00", "2024-05-01 15:00", "2024-05-02 10:00", None, "2024-05-03 11:00"]
+    # Partitions are snapshot tables: timestamps come back in nanoseconds
+    apple = pd.DataFrame({"time": pd.to_datetime(times).as_unit("ns"), "value": [1.0, 2.0, 3.0, 4.0, 5.0]},
+                         index=[0, 2, 4, 6, 8])
+    tesla = pd.DataFrame({"time": pd.to_datetime(["2024-05-02 12:00"]).as_unit("ns"), "value": [9.0]}, index=[1])
+    if extra_rows:
+        apple = pd.concat([apple, pd.DataFrame(list(extra_rows), index=range(10, 10 + len(extra_rows)))])
+    return {"Apple": apple, "Tesla/X": tesla}
+
+
+@pytest.fixture
+def store(tmp_path):
+    source = tmp_path / "source.json"
+    source.write_text("[]")
+    return PartitionStore(str(source), "time")
+
+
+def test_day_of():
+    assert day_of("2024-05-01 23:30") == "2024-05-01"
+    assert day_of(pd.Timestamp("2024-05-02 01:30", tz="Europe/Paris")) == "2024-05-01"
+
+
+def test_sync_writes_one_partition_per_key_and_day(store):
+    stats = store.sync(_frames())
+    assert stats == {"written": 5, "unchanged": 0, "removed": 0}
+    assert store.is_current()
+    assert sorted(store.keys()) == ["Apple", "Tesla/X"]
+    assert store.days("Apple") == ["2024-05-01", "2024-05-02", "2024-05-03"]
+    assert UNDATED in store.manifest()["keys"]["Apple"]
+    assert store.days("Unknown") is None
+    assert os.path.isdir(os.path.join(partition_dir(store.source_path), "Tesla%2FX"))
+
+
+def test_read_keeps_file_order_and_index(store):
+    frames = _frames()
+    store.sync(frames)
+    pd.testing.assert_frame_equal(store.read("Apple"), frames["Apple"], check_index_type=False)
+    assert store.read("Unknown") is None
+    assert store.read("Apple", ["2024-04-01"]).empty
+
+
+def test_window_opens_only_its_days(store):
+    store.sync(_frames())
+    window = store.window("Apple", datetime(2024, 5, 1, 12), datetime(2024, 5, 2, 23))
+    assert window["value"].tolist() == [2.0, 3.0]
+    assert window.index.tolist() == [2, 4]
+    assert store.window("Apple", start=datetime(2024, 5, 3))["value"].tolist() == [5.0]
+    assert store.window("Unknown", None, None) is None
+
+
+def test_resync_rewrites_only_changed_days(store):
+    store.sync(_frames())
+    late = {"time": pd.Timestamp("2024-05-03 16:00").as_unit("ns"), "value": 6.0}
+    stats = store.sync(_frames(extra_rows=[late]))
+    assert stats == {"written": 1, "unchanged": 4, "removed": 0}
+    assert store.read("Apple", ["2024-05-03"])["value"].tolist() == [5.0, 6.0]
+
+    frames = _frames()
+    del frames["Tesla/X"]
+    stats = store.sync(frames)
+    assert stats["removed"] == 1
+    assert store.keys() == ["Apple"]
+
+
+@pytest.mark.parametrize("name,kind", [
+    ("news_sentiment_raw.csv", "news"),
+    (os.path.join("reddit", "reddit_data.json"), "reddit"),
+    ("stock_news_google.json", "google"),
+])
+def test_partitioned_source_answers_like_the_file(workspace, name, kind):
+    path = os.path.join("finance_api", "data", name)
+    in_memory = IndexedSource(path, kind)
+    companies = list(in_memory._parse(path))
+    start, end = datetime(2000, 1, 1), datetime(2100, 1, 1)
+    expected = {company: in_memory.window(company, start, end) for company in companies}
+
+    build_all(os.path.join("finance_api", "data"))
+    partitioned = IndexedSource(path, kind)
+    assert partitioned.partitions.exists()
+    for company in companies:
+        window = partitioned.window(company, start, end)
+        assert window.index.tolist() == expected[company].index.tolist()
+        assert window.astype(str).values.tolist() == expected[company].astype(str).values.tolist()
+
+
+def test_partitioned_stocks_are_served_like_the_file(workspace):
+    path = os.path.join("finance_api", "data", "stocks.json")
+    expected = SnapshotProvider(path).fetch("AAPL", "1h", period="7d")
+    SnapshotProvider(path).partition()
+
+    provider = SnapshotProvider(path)
+    assert provider.partitioned()
+    expected = expected.set_axis(expected.index.as_unit("ns"))
+    pd.testing.assert_frame_equal(provider.fetch("AAPL", "1h", period="7d"), expected)
@@ -0,0 +1,123 @@
+# finance_api/tests/test_price_cache.py
+import pandas as pd
+import pytest
+
+from finance_api.utils.price_cache import (
+    PriceCache, PriceProvider, bar_start, merge_bars, normalize_bars, resample_bars, slice_period,
+)
+
+
+def _bars(times, closes, tz="UTC"):
+    index = pd.DatetimeIndex(pd.to_datetime(times)).tz_localize(tz)
+    return normalize_bars(pd.DataFrame({"Close": closes, "Volume": [100] * len(closes)}, index=index))
+
+
+class StubProvider(PriceProvider):
+    """Serves `bars` and records the calls; raises while `offline`."""
+
+    def __init__(self, bars):
+        self.bars = bars
+        self.calls = []
+        self.offline = False
+
+    def fetch(self, ticker, interval, period=None, start=None):
+        self.calls.append((ticker, interval, period, start))
+        if self.offline:
+            raise ConnectionError("offline")
+        if start is not None:
+            return self.bars[self.bars.index >= start]
+        return self.bars
+
+
+def test_providers_must_implement_fetch():
+    with pytest.raises(TypeError):
+        PriceProvider()
+
+
+def test_bars_are_anchored_per_exchange():
+    index = pd.DatetimeIndex(["2024-05-01 13:35", "2024-05-01 14:29", "2024-05-01 14:30"], tz="UTC")
+    # New York opens at 9:30 (13:30 UTC): hourly bars start at :30
+    assert bar_start(index, "AAPL", "1h").strftime("%H:%M").tolist() == ["13:30", "13:30", "14:30"]
+    # Paris opens at 9:00 (07:00 UTC in May)
+    assert bar_start(index, "MC.PA", "1h").strftime("%H:%M").tolist() == ["13:00", "14:00", "14:00"]
+    assert bar_start(index, "MC.PA", "1d").strftime("%Y-%m-%d %H:%M").tolist() == ["2024-04-30 22:00"] * 3
+
+
+def test_resample_keeps_last_close_and_sums_volume():
+    bars = _bars(["2024-05-01 13:30", "2024-05-01 13:35", "2024-05-01 14:30"], [1.0, 2.0, 3.0])
+    hourly = resample_bars(bars, "AAPL", "1h")
+    assert hourly["Close"].tolist() == [2.0, 3.0]
+    assert hourly["Volume"].tolist() == [200, 100]
+    assert resample_bars(bars, "AAPL", "5m") is bars
+
+
+def test_merge_replaces_the_partial_bar():
+    cached = _bars(["2024-05-01 13:30", "2024-05-01 14:30"], [1.0, 2.0])
+    new = _bars(["2024-05-01 14:30", "2024-05-01 15:30"], [2.5, 3.0])
+    merged = merge_bars(cached, new, "AAPL", "1h")
+    assert merged["Close"].tolist() == [1.0, 2.5, 3.0]
+    assert merge_bars(cached, new.iloc[:0], "AAPL", "1h") is cached
+
+    # Daily bars: a new timestamp within the same session replaces the day
+    daily = merge_bars(_bars(["2024-05-01 04:00"], [1.0]), _bars(["2024-05-01 20:00"], [1.5]), "AAPL", "1d")
+    assert daily["Close"].tolist() == [1.5]
+
+
+def test_slice_period_counts_sessions():
+    bars = _bars(["2024-05-01 14:00", "2024-05-02 14:00", "2024-05-03 14:00", "2024-05-03 15:00"], [1, 2, 3, 4])
+    assert slice_period(bars, "1d")["Close"].tolist() == [3, 4]
+    assert slice_period(bars, "3d")["Close"].tolist() == [1, 2, 3, 4]
+    assert slice_period(bars.iloc[:0], "7d").empty
+
+
+def test_stale_entries_refresh_from_the_high_water_mark():
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    times = [now - pd.Timedelta(hours=h) for h in (3, 2, 1)]
+    provider = StubProvider(normalize_bars(pd.DataFrame({"Close": [1.0, 2.0, 3.0], "Volume": [1, 1, 1]},
+                                                        index=pd.DatetimeIndex(times))))
+    cache = PriceCache(provider, seed_path=None, ttl={"1h": 0})
+
+    assert cache.get("AAPL", "1d", "1h")["Close"].tolist()[-1] == 3.0
+    assert provider.calls == [("AAPL", "1h", "1d", None)]
+    assert cache.high_water_mark("AAPL", "1h") == times[-1]
+
+    # The last bar moved and a new one started
+    provider.bars = normalize_bars(pd.DataFrame({"Close": [1.0, 2.0, 3.5, 4.0], "Volume": [1, 1, 1, 1]},
+                                                index=pd.DatetimeIndex([*times[:2], times[-1], now])))
+    bars = cache.get("AAPL", "1d", "1h")
+    assert provider.calls[-1] == ("AAPL", "1h", None, times[-1])
+    assert bars["Close"].tolist()[-2:] == [3.5, 4.0]
+
+
+def test_cached_bars_are_served_offline():
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    provider = StubProvider(normalize_bars(pd.DataFrame({"Close": [1.0], "Volume": [1]},
+                                                        index=pd.DatetimeIndex([now]))))
+    cache = PriceCache(provider, seed_path=None, ttl={"1h": 0})
+    cache.get("AAPL", "1d", "1h")
+
+    provider.offline = True
+    assert cache.get("AAPL", "1d", "1h")["Close"].tolist() == [1.0]
+    with pytest.raises(ConnectionError):
+        cache.get("TSLA", "1d", "1h")
+
+
+def test_fresh_entries_are_not_fetched_again():
+    now = pd.Timestamp.now(tz="UTC").floor("h")
+    provider = StubProvider(normalize_bars(pd.DataFrame({"Close": [1.0], "Volume": [1]},
+                                                        index=pd.DatetimeIndex([now]))))
+    cache = PriceCache(provider, seed_path=None, ttl={"1h": 3600})
+    assert cache.cached_version("AAPL", "1d", "1h") is None
+    cache.get("AAPL", "1d", "1h")
+    cache.get("AAPL", "1d", "1h")
+    assert len(provider.calls) == 1
+    version, _ = cache.cached_version("AAPL", "1d", "1h")
+    assert version[1:] == (1, now.value)
+
+
+def test_seed_from_stocks_json(workspace):
+    provider = StubProvider(None)
+    cache = PriceCache(provider, ttl={"1h": 10 ** 12})
+    bars = cache.get("AAPL", "7d", "1h")
+    assert not bars.empty and provider.calls == []
+    assert bars.index.tz is not None and bars.index.is_monotonic_increasing
@@ -0,0 +1,74 @@
+# finance_api/tests/test_rolling_stats.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_api.utils.rolling_stats import expanding_corr, rolling_corr, tail_corr, tail_mean
+
+
+def safe_corr(x, y):
+    """The per-prefix loop of metrics.py that the running sums replace."""
+    if len(x) < 2 or x.isnull().all() or y.isnull().all():
+        return np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.corrcoef(x.fillna(0), y.fillna(0))[0, 1]
+
+
+def _panel(seed=0, sizes=(40, 1, 25)):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i, size in enumerate(sizes):
+        x = pd.Series(rng.normal(0.001, 0.02, size))
+        y = pd.Series(rng.choice([-1.0, 0.0, 0.5, 1.0], size))
+        x[rng.random(size) < 0.1] = np.nan
+        y[rng.random(size) < 0.1] = np.nan
+        frames.append(pd.DataFrame({"group": f"T{i}", "x": x, "y": y}))
+    return pd.concat(frames, ignore_index=True)
+
+
+def _reference(panel, window=None):
+    expected = []
+    for _, group in panel.groupby("group", sort=False):
+        for i in range(len(group)):
+            first = 0 if window is None else max(0, i + 1 - window)
+            expected.append(safe_corr(group["x"].iloc[first:i + 1], group["y"].iloc[first:i + 1]))
+    return np.array(expected)
+
+
+def test_expanding_matches_the_prefix_loop():
+    panel = _panel()
+    result = expanding_corr(panel["x"], panel["y"], groups=panel["group"])
+    expected = _reference(panel)
+    assert np.isnan(result[0])
+    np.testing.assert_allclose(result, expected, atol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("window", [2, 5, 30])
+def test_rolling_matches_the_window_loop(window):
+    panel = _panel(seed=1)
+    result = rolling_corr(panel["x"], panel["y"], window, groups=panel["group"])
+    np.testing.assert_allclose(result, _reference(panel, window), atol=1e-9, equal_nan=True)
+
+
+def test_undefined_correlations_are_nan():
+    # Constant x, entirely null y, a single row
+    assert np.isnan(expanding_corr([0.1] * 5, [1, 2, 3, 4, 5])).all()
+    assert np.isnan(expanding_corr([1, 2, 3], [np.nan] * 3)).all()
+    assert np.isnan(expanding_corr([1.0], [2.0])).all()
+    # Nulls count as zeros once a window has a value
+    x, y = pd.Series([1, 2, np.nan]), pd.Series([1, 2, 3])
+    assert expanding_corr(x, y)[2] == pytest.approx(safe_corr(x, y))
+
+
+def test_tail_windows_match_the_last_rows():
+    panel = _panel(seed=2)
+    corrs = tail_corr(panel["x"], panel["y"], panel["group"], [None, 7, 15])
+    means = tail_mean(panel["y"], panel["group"], [None, 7])
+    for label, group in panel.groupby("group", sort=False):
+        for n in (None, 7, 15):
+            rows = group if n is None else group.tail(n)
+            expected = safe_corr(rows["x"], rows["y"])
+            assert corrs[n][label] == pytest.approx(expected, abs=1e-9, nan_ok=True)
+        assert means[7][label] == pytest.approx(group["y"].tail(7).mean(), nan_ok=True)
+        assert means[None][label] == pytest.approx(group["y"].mean(), nan_ok=True)
+    assert list(corrs[None].index) == ["T0", "T1", "T2"]
@@ -0,0 +1,64 @@
+# finance_api/tests/test_score_cache.py
+from finance_api.utils.score_cache import CachedScorer, ScoreCache, normalize_text, score_key
+
+
+class _Scorer:
+    model_id = "stub"
+
+    def __init__(self):
+        self.calls = []
+
+    def score_batch(self, texts):
+        self.calls.append(list(texts))
+        return [("positive" if "up" in text else "negative", float(len(text))) for text in texts]
+
+
+def test_normalized_variants_share_a_key():
+    assert normalize_text("  Shares\tup \n 5% today ") == "Shares up 5% today"
+    assert normalize_text(None) == ""
+    assert score_key("m", "a  b") == score_key("m", "a b")
+    assert score_key("m", "a b") != score_key("other", "a b")
+
+
+def test_get_many_returns_positions_of_hits(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"))
+    cache.put_many("m", [("up", "positive", 0.9), ("down", "negative", 0.8)])
+
+    assert cache.get_many("m", ["down", "new", "up", "down"]) == {
+        0: ("negative", 0.8), 2: ("positive", 0.9), 3: ("negative", 0.8),
+    }
+    assert cache.get_many("other model", ["up"]) == {}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["writes"], stats["size"]) == (3, 2, 2, 2)
+
+
+def test_scores_persist_across_instances(tmp_path):
+    path = str(tmp_path / "scores.sqlite")
+    cache = ScoreCache(path)
+    cache.put_many("m", [("up", "positive", 0.9)])
+    cache.close()
+    assert ScoreCache(path).get_many("m", ["up"]) == {0: ("positive", 0.9)}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ScoreCache(str(tmp_path / "scores.sqlite"), max_entries=2)
+    cache.put_many("m", [("a", "neutral", 0.1)])
+    cache.put_many("m", [("b", "neutral", 0.2)])
+    cache.get_many("m", ["a"])  # "b" is now the least recently used
+    cache.put_many("m", [("c", "neutral", 0.3)])
+
+    assert sorted(cache.get_many("m", ["a", "b", "c"])) == [0, 2]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size"] == 2
+
+
+def test_cached_scorer_scores_only_new_texts_once(tmp_path):
+    scorer = _Scorer()
+    cached = CachedScorer(scorer, ScoreCache(str(tmp_path / "scores.sqlite")), window=2)
+
+    first = list(cached.score(["up 1", "down", "up  1", "up 1"]))
+    assert scorer.calls == [["up 1", "down"]]
+    assert first == [("positive", 4.0), ("negative", 4.0), ("positive", 4.0), ("positive", 4.0)]
+
+    assert cached.score_batch(["down", "up 2"]) == [("negative", 4.0), ("positive", 4.0)]
+    assert scorer.calls[1:] == [["up 2"]]
@@ -0,0 +1,137 @@
+# finance_api/tests/test_search_index.py
+import json
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from finance_api.utils.article_store import SOURCES
+from finance_api.utils import search_index
+from finance_api.utils.search_index import SearchIndex, parse_day, parse_query, tokenize
+
+
+NEWS = [
+    {"Company": "Apple", "Text": "Apple shares rose after record iPhone sales", "URL": "u1",
+     "PublishedAt": "2024-05-01T10:00:00+00:00", "Sentiment": "positive", "SentimentScore": 0.9},
+    {"Company": "Apple", "Text": "Record losses? No, sales of the iPhone slowed", "URL": "u2",
+     "PublishedAt": "2024-05-03T10:00:00+00:00", "Sentiment": "negative", "SentimentScore": 0.8},
+    {"Company": "Tesla", "Text": "Tesla record deliveries", "URL": "u3",
+     "PublishedAt": "2024-05-02T10:00:00+00:00", "Sentiment": "neutral", "SentimentScore": 0.7},
+]
+
+GOOGLE = [
+    {"company": "Apple", "title": "iPhone sales record in China", "url": "g1",
+     "published_at": "2024-05-02T08:00:00Z", "sentiment_label": "positive", "sentiment_score": 0.6},
+]
+
+
+@pytest.fixture
+def sources(tmp_path):
+    specs = {
+        "news": {**SOURCES["news"], "path": str(tmp_path / "news.csv")},
+        "google": {**SOURCES["google"], "path": str(tmp_path / "google.json")},
+    }
+    _write_news(specs, NEWS)
+    with open(specs["google"]["path"], "w", encoding="utf-8") as f:
+        json.dump(GOOGLE, f)
+    return specs
+
+
+def _write_news(specs, rows):
+    pd.DataFrame(rows).to_csv(specs["news"]["path"], index=False)
+    # A rewrite within the same mtime tick must still be seen
+    st = os.stat(specs["news"]["path"])
+    os.utime(specs["news"]["path"], ns=(st.st_atime_ns, st.st_mtime_ns + len(rows) * 1_000_000))
+
+
+def _urls(result):
+    return [r["document"].get("URL") or r["document"].get("url") for r in result["results"]]
+
+
+def test_query_parsing():
+    assert tokenize("iPhone's Sales, 2024!") == ["iphone", "s", "sales", "2024"]
+    assert parse_query('record "iphone sales"') == [("record",), ("iphone", "sales")]
+    with pytest.raises(ValueError):
+        parse_query('  "" ')
+
+
+def test_date_bounds_are_parsed():
+    assert parse_day("2024-5-3") == "2024-05-03"
+    assert parse_day(None) is None
+    for value in ("2024-13-01", "03/05/2024", "2024-05-03T10:00", "tomorrow"):
+        with pytest.raises(ValueError):
+            parse_day(value)
+
+
+def test_every_clause_must_match(sources):
+    index = SearchIndex(sources)
+    assert sorted(_urls(index.search("record iphone"))) == ["g1", "u1", "u2"]
+    assert _urls(index.search("record tesla")) == ["u3"]
+    assert index.search("record nothing")["total_hits"] == 0
+
+
+def test_phrases_follow_positions(sources):
+    index = SearchIndex(sources)
+    assert sorted(_urls(index.search('"iphone sales"'))) == ["g1", "u1"]
+    assert _urls(index.search('"sales of the iphone"')) == ["u2"]
+
+
+def test_filters(sources):
+    index = SearchIndex(sources)
+    assert sorted(_urls(index.search("record", company="apple"))) == ["g1", "u1", "u2"]
+    assert sorted(_urls(index.search("record", source="news", company="Apple"))) == ["u1", "u2"]
+    assert _urls(index.search("record", date_from="2024-05-03")) == ["u2"]
+    assert sorted(_urls(index.search("record", date_to="2024-05-02"))) == ["g1", "u1", "u3"]
+    assert _urls(index.search("record", date_from="2024-5-3")) == ["u2"]
+    with pytest.raises(ValueError):
+        index.search("record", date_from="2024-05-32")
+    assert len(index.search("record", limit=1)["results"]) == 1
+    with pytest.raises(ValueError):
+        index.search("record", source="twitter")
+
+
+def test_sentiment_of_all_hits(sources):
+    result = SearchIndex(sources).search("record", limit=1)
+    assert result["total_hits"] == 4
+    assert result["sentiment"]["all"]["count"] == 4
+    assert result["sentiment"]["news"]["count"] == 3
+    assert result["sentiment"]["google"]["count"] == 1
+
+
+def test_more_frequent_term_ranks_first(sources):
+    rows = NEWS + [{**NEWS[2], "URL": "u4", "Text": "Tesla tesla tesla recall"}]
+    _write_news(sources, rows)
+    assert _urls(SearchIndex(sources).search("tesla"))[0] == "u4"
+
+
+def test_refresh_adds_removes_and_reindexes_changed_rows(sources):
+    index = SearchIndex(sources)
+    index.refresh()
+
+    rows = [dict(NEWS[0], Sentiment="negative", SentimentScore=0.95), NEWS[2],
+            {**NEWS[2], "URL": "u5", "Text": "Tesla robotaxi"}]
+    _write_news(sources, rows)
+    assert index.refresh() == {"news": (2, 2)}
+
+    assert _urls(index.search("robotaxi")) == ["u5"]
+    assert _urls(index.search("slowed")) == []
+    hit = index.search("iphone", source="news")["results"][0]
+    assert hit["document"]["Sentiment"] == "negative"
+    assert index.refresh() == {}
+
+
+def test_the_api_builds_the_index_at_startup(workspace, monkeypatch):
+    from fastapi.testclient import TestClient
+    from finance_api import main
+
+    monkeypatch.setattr(search_index, "_INDEX", None)
+    with TestClient(main.app) as client:
+        for thread in threading.enumerate():
+            if thread.name == "search-index-warmup":
+                thread.join()
+        assert set(search_index._INDEX._signatures) == {"news", "google", "reddit"}
+
+        assert client.get("/search", params={"q": "apple"}).status_code == 200
+        response = client.get("/search", params={"q": "apple", "date_to": "2024-02-30"})
+        assert response.status_code == 400 and "YYYY-MM-DD" in response.json()["error"]
@@ -0,0 +1,120 @@
+# finance_api/tests/test_sentiment.py
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("vaderSentiment")
+
+from finance_api.sentiment import CascadeScorer, SentimentScorer, cascade_agreement, SENTIMENT_LABELS
+from finance_api.utils.score_cache import CachedScorer, ScoreCache
+
+
+WORDS = "profit loss growth shares fell rose market strong weak record quarter the a of and".split()
+
+TEXTS = [
+    "profit rose",
+    "shares fell on weak quarter and the market fell",
+    "record",
+    "",
+    "growth of the market was strong and profit rose to a record quarter",
+    "loss",
+    "shares rose",
+]
+
+
+@pytest.fixture(scope="module")
+def tiny_model(tmp_path_factory):
+    """Randomly initialized 3-label BERT with a word-level vocabulary (no download)."""
+    vocab = tmp_path_factory.mktemp("tiny") / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *WORDS]) + "\n")
+    tokenizer = transformers.BertTokenizerFast(vocab_file=str(vocab))
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=tokenizer.vocab_size, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+        intermediate_size=32, max_position_embeddings=64, num_labels=3,
+    )
+    return transformers.BertForSequenceClassification(config), tokenizer
+
+
+def test_batched_scores_match_one_by_one(tiny_model):
+    model, tokenizer = tiny_model
+    scorer = SentimentScorer(model, tokenizer, batch_size=2, backend="eager")
+    single = [scorer.score_batch([text])[0] for text in TEXTS]
+    batched = scorer.score_batch(TEXTS)
+
+    assert [label for label, _ in batched] == [label for label, _ in single]
+    assert [score for _, score in batched] == pytest.approx([score for _, score in single], abs=1e-5)
+    assert all(label in SENTIMENT_LABELS and 1 / 3 <= score <= 1 for label, score in batched)
+
+
+def test_score_is_lazy_and_in_input_order(tiny_model):
+    model, tokenizer = tiny_model
+    scorer = SentimentScorer(model, tokenizer, batch_size=2, bucket_batches=1, backend="eager")
+    texts = TEXTS * 3
+    consumed = []
+    lazy = list(scorer.score(consumed.append(text) or text for text in texts))
+    expected = scorer.score_batch(texts)
+
+    assert len(consumed) == len(texts)
+    assert [label for label, _ in lazy] == [label for label, _ in expected]
+    assert [score for _, score in lazy] == pytest.approx([score for _, score in expected], abs=1e-5)
+    assert scorer.score_batch([]) == []
+
+
+def test_unknown_backend(tiny_model):
+    model, tokenizer = tiny_model
+    with pytest.raises(ValueError):
+        SentimentScorer(model, tokenizer, backend="fp4")
+
+
+def test_cached_scorer_scores_each_text_once(tiny_model, tmp_path):
+    model, tokenizer = tiny_model
+    scorer = SentimentScorer(model, tokenizer, backend="eager", model_id="tiny")
+    calls = []
+    score_batch = scorer.score_batch
+    scorer.score_batch = lambda texts: calls.append(list(texts)) or score_batch(texts)
+
+    cached = CachedScorer(scorer, ScoreCache(str(tmp_path / "scores.sqlite")))
+    first = cached.score_batch(["profit rose", "profit  rose", "loss"])
+    assert calls == [["profit rose", "loss"]]
+    assert first[0] == first[1]
+
+    assert cached.score_batch(["loss", "profit rose"]) == [first[2], first[0]]
+    assert len(calls) == 1
+
+
+class _StubTransformer:
+    model_id = "stub"
+
+    def __init__(self):
+        self.texts = []
+
+    def score_batch(self, texts):
+        self.texts.extend(texts)
+        return [("neutral", 0.9) for _ in texts]
+
+
+def test_cascade_escalates_only_the_ambiguous_band():
+    transformer = _StubTransformer()
+    cascade = CascadeScorer(transformer, band=(-0.5, 0.5))
+    texts = ["This is wonderful, great, excellent news!", "The report is on the table.",
+             "Terrible, awful, horrible disaster."]
+    results = cascade.score_batch(texts)
+
+    assert [r.tier for r in results] == ["vader", "finbert", "vader"]
+    assert [r.label for r in results] == ["positive", "neutral", "negative"]
+    assert transformer.texts == [texts[1]]
+    assert cascade.stats()["texts"] == 3 and cascade.stats()["escalated"] == 1
+    assert list(cascade.score(iter(texts))) == results
+
+
+def test_cascade_agreement_leaves_counters_untouched():
+    cascade = CascadeScorer(_StubTransformer())
+    cascade.score_batch(["good", "the"])
+    before = cascade.stats()
+
+    texts = ["Great, excellent results!", "A table.", "Terrible, awful, horrible disaster."]
+    report = cascade_agreement(cascade, texts)
+    assert report["texts"] == 3
+    assert report["escalation_rate"] == pytest.approx(1 / 3)
+    assert cascade.stats() == before
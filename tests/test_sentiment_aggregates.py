@@ -0,0 +1,111 @@
+# finance_api/tests/test_sentiment_aggregates.py
+import pytest
+
+from finance_api.utils.article_store import ArticleStore
+from finance_api.utils.sentiment_aggregates import SentimentAggregates, row_sentiment, sentiment_summary
+
+
+def _news(url, when, label, company="Apple"):
+    return {"Company": company, "Text": url, "URL": url, "PublishedAt": when, "Sentiment": label}
+
+
+NEWS = [
+    _news("u1", "2024-05-01T09:00:00Z", "positive"),
+    _news("u2", "2024-05-01T15:30:00Z", "negative"),
+    _news("u3", "2024-05-02T10:00:00Z", "neutral"),
+    _news("u4", "2024-05-01T09:10:00Z", "positive", company="Tesla"),
+]
+
+GOOGLE = [{"company": "apple", "title": "t", "url": "g1", "published_at": "2024-05-01T20:00:00Z", "sentiment_score": 0.25}]
+
+
+@pytest.fixture
+def aggregates(tmp_path):
+    return SentimentAggregates(str(tmp_path / "aggregates.sqlite"), granularities=("day", "hour"))
+
+
+def test_row_sentiment():
+    assert row_sentiment("news", {"Sentiment": "negative"}) == -1
+    assert row_sentiment("news", {"Sentiment": "bogus"}) is None
+    assert row_sentiment("reddit", {"sentiment": 0.3}) == 1
+    assert row_sentiment("reddit", {"sentiment": 0.01}) == 0
+    assert row_sentiment("google", {"sentiment_score": 0.42}) == 0.42
+    assert row_sentiment("google", {}) is None
+    assert sentiment_summary([1, None, -1, 0.02]) == {
+        "mean_sentiment": 0.0067, "count": 3, "n_positive": 1, "n_neutral": 1, "n_negative": 1,
+    }
+
+
+def test_fold_is_additive_and_idempotent(aggregates):
+    assert aggregates.fold("news", NEWS) == 4
+    assert aggregates.fold("news", NEWS[:2]) == 0
+    assert aggregates.get("apple", "2024-05-01", "news") == {
+        "mean_sentiment": 0.0, "count": 2, "n_positive": 1, "n_neutral": 0, "n_negative": 1,
+    }
+    aggregates.fold("google", GOOGLE)
+    assert aggregates.get("Apple", "2024-05-01")["count"] == 3
+    assert aggregates.get("Apple", "2024-05-03") is None
+
+    # Hourly buckets line up with the bars
+    assert aggregates.get("apple", "2024-05-01T15", "news", granularity="hour")["n_negative"] == 1
+    series = aggregates.series("apple", "news", granularity="hour")
+    assert series["bucket"].dt.strftime("%Y-%m-%d %H:%M").tolist() == [
+        "2024-05-01 09:00", "2024-05-01 15:00", "2024-05-02 10:00",
+    ]
+
+
+def test_retract_recomputes_only_its_buckets(aggregates):
+    aggregates.fold("news", NEWS)
+    assert aggregates.retract("news", [NEWS[1], _news("unknown", "2024-05-01T10:00:00Z", "positive")]) == 1
+    assert aggregates.get("apple", "2024-05-01", "news")["mean_sentiment"] == 1.0
+    assert aggregates.get("apple", "2024-05-01T15", "news", granularity="hour") is None
+
+    aggregates.retract("news", [NEWS[2]])
+    assert aggregates.series("apple", "news")["bucket"].dt.strftime("%Y-%m-%d").tolist() == ["2024-05-01"]
+    assert aggregates.get("tesla", "2024-05-01", "news")["count"] == 1
+
+
+def test_rescore_moves_rows_between_buckets(aggregates):
+    aggregates.fold("news", NEWS)
+    relabeled = [dict(row, Sentiment="negative") for row in NEWS[:2]]
+    assert aggregates.rescore("news", relabeled) == 2
+    assert aggregates.get("apple", "2024-05-01", "news")["mean_sentiment"] == -1.0
+
+    # A corrected time leaves the old day and enters the new one
+    moved = dict(NEWS[0], PublishedAt="2024-05-02T08:00:00Z")
+    aggregates.rescore("news", [moved])
+    assert aggregates.get("apple", "2024-05-01", "news")["count"] == 1
+    assert aggregates.get("apple", "2024-05-02", "news") == {
+        "mean_sentiment": 0.5, "count": 2, "n_positive": 1, "n_neutral": 1, "n_negative": 0,
+    }
+    assert aggregates.get("apple", "2024-05-01T09", "news", granularity="hour") is None
+
+
+def test_buckets_persist_and_other_connections_refresh(aggregates, tmp_path):
+    path = str(tmp_path / "aggregates.sqlite")
+    reader = SentimentAggregates(path)
+    version = reader.refresh()
+    assert reader.get("apple", "2024-05-01") is None
+
+    aggregates.fold("news", NEWS)
+    assert reader.refresh() > version
+    assert reader.get("apple", "2024-05-01")["count"] == 2
+    assert reader.refresh() == reader.refresh()
+
+    # A granularity enabled later is rebuilt from the stored rows
+    assert SentimentAggregates(path, granularities=("hour",)).get(
+        "apple", "2024-05-01T09", "news", granularity="hour")["count"] == 1
+    with pytest.raises(ValueError):
+        SentimentAggregates(path, granularities=("minute",))
+
+
+def test_sync_folds_only_the_new_store_rows(aggregates, tmp_path):
+    store = ArticleStore(str(tmp_path / "articles.sqlite"))
+    store.append("news", NEWS[:2])
+    assert aggregates.sync(store) == 2
+    store.append("news", NEWS)
+    assert aggregates.sync(store) == 2
+    assert aggregates.sync(store) == 0
+    assert not aggregates.complete()
+    frame = aggregates.frame()
+    assert frame["count"].sum() == 4 and set(frame["source"]) == {"news"}
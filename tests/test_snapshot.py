@@ -0,0 +1,122 @@
+# finance_api/tests/test_snapshot.py
+import os
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from finance_api.utils import snapshot
+from finance_api.utils.snapshot import (
+    encode_table, decode_table, load_columns, load_frame, read_table, read_text, snapshot_path, write_bytes,
+    write_snapshot,
+)
+
+
+SOURCES = [
+    "stocks.json",
+    "sentiment_compact.json",
+    os.path.join("reddit", "reddit_data.json"),
+    "stock_news_google.json",
+    "news_sentiment_raw.csv",
+]
+
+
+def _path(name):
+    return os.path.join("finance_api", "data", name)
+
+
+def _as_ns(df):
+    """Timestamps at the snapshot's resolution (pandas may parse text at a coarser one)."""
+    return df.apply(lambda c: c.dt.as_unit("ns") if pd.api.types.is_datetime64_any_dtype(c.dtype) else c)
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_snapshot_loads_the_same_frame_as_the_text_file(workspace, name):
+    path = _path(name)
+    expected, meta = read_text(path)
+    write_snapshot(path)
+
+    df, snapshot_meta = load_frame(path)
+    pd.testing.assert_frame_equal(df, _as_ns(expected))
+    assert snapshot_meta == json.loads(json.dumps(meta))
+
+
+def test_table_round_trip(tmp_path):
+    df = pd.DataFrame({
+        "i": np.arange(4, dtype=np.int64),
+        "f": [1.5, np.nan, -0.0, 3.25],
+        "b": [True, False, True, True],
+        "s": ["é", None, "", "x" * 100],
+        "c": ["AAPL", "AAPL", None, "TSLA"],
+        "t": pd.to_datetime(["2024-05-01 10:00", None, "2024-05-02 00:00", "2024-05-03 09:30"], utc=True),
+        "o": [[1, 2], {"a": 1}, None, "z"],
+    })
+    path = str(tmp_path / "table.snap")
+    write_bytes(path, encode_table(df, key="k"))
+
+    table, header = read_table(path)
+    assert header["key"] == "k"
+    assert table["i"].tolist() == [0, 1, 2, 3]
+    assert table["f"].isna().tolist() == [False, True, False, False]
+    assert table["b"].tolist() == [True, False, True, True]
+    assert table["s"].isna().tolist() == [False, True, False, False]
+    assert table["s"].dropna().tolist() == ["é", "", "x" * 100]
+    assert table["c"].isna().tolist() == [False, False, True, False]
+    assert table["c"].dropna().tolist() == ["AAPL", "AAPL", "TSLA"]
+    pd.testing.assert_series_equal(table["t"], _as_ns(df)["t"])
+    assert table["o"].tolist() == [[1, 2], {"a": 1}, None, "z"]
+
+    with pytest.raises(ValueError):
+        decode_table(b"not a snapshot", path)
+
+
+def test_repeated_loads_share_read_only_columns(workspace):
+    path = _path("stocks.json")
+    write_snapshot(path)
+
+    header, columns = load_columns(path)
+    assert load_columns(path)[1] is columns
+    assert not columns["close"].flags.writeable
+
+    first, _ = load_frame(path)
+    first["close"] = 0.0  # a caller's change stays in its own frame
+    first["extra"] = 1
+    second, _ = load_frame(path)
+    assert "extra" not in second.columns
+    assert second["close"].to_numpy().tolist() == columns["close"].tolist()
+
+
+def test_stale_snapshot_is_rebuilt(workspace):
+    path = _path("stock_news_google.json")
+    write_snapshot(path)
+    before, _ = load_frame(path)
+
+    with open(path, encoding="utf-8") as f:
+        records = json.load(f)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records[:5], f)
+
+    after, _ = load_frame(path)
+    assert len(before) == len(records)
+    assert len(after) == 5
+    assert read_table(snapshot_path(path))[1]["source"] == snapshot.source_signature(path)
+
+
+def test_tickers_filter(workspace):
+    path = _path("stocks.json")
+    expected, _ = read_text(path, tickers=["AAPL"])
+    write_snapshot(path)
+    df, _ = load_frame(path, tickers=["AAPL"])
+    assert set(df["ticker"]) == {"AAPL"}
+    pd.testing.assert_frame_equal(df, _as_ns(expected))
+
+
+@pytest.mark.filterwarnings("ignore:Could not infer format")
+def test_invalid_csv_dates_still_raise(workspace):
+    path = _path("news_sentiment_raw.csv")
+    df = pd.read_csv(path)
+    df.loc[0, "PublishedAt"] = "not a date"
+    df.to_csv(path, index=False)
+    with pytest.raises((ValueError, pd.errors.ParserError)):
+        write_snapshot(path)
@@ -1,156 +1,206 @@
+import os
 import pandas as pd
+import numpy as np
 import json
-from collections import defaultdict
+
+from finance_api.utils.snapshot import load_frame
+from finance_api.utils.sentiment_aggregates import COMPACT_SOURCES, COMPANIES, LABEL_VALUES, NEUTRAL_THRESHOLD
+from finance_api.utils.near_duplicates import NEAR_DUPLICATE_THRESHOLD, cluster_texts, dedup_report
 
 # -----------------------------
-# --- Load data files ---
+# --- Data files ---
 # -----------------------------
 
-# Reddit JSON
-with open(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\reddit\reddit_data.json", "r", encoding="utf-8") as f:
-    reddit_raw = json.load(f)
+REDDIT_PATH = r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\reddit\reddit_data.json"
+NEWS_GOOGLE_PATH = r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\stock_news_google.json"
+NEWS_PATH = r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\news_sentiment_raw.csv"
 
-# Google News JSON
-with open(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\stock_news_google.json", "r", encoding="utf-8") as f:
-    news_google_flat_list = json.load(f)
+# Article store source -> source name of the daily files
+STORE_SOURCES = {'reddit': 'reddit', 'news': 'news', 'google': 'news_google'}
 
-# CSV news
-news_df = pd.read_csv(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\news_sentiment_raw.csv")
-news_flat_list = news_df.to_dict(orient="records")
+def load_sources():
+    """Reddit posts (one row per post with its company), Google News and CSV news, from their columnar snapshot when available."""
+    return load_frame(REDDIT_PATH)[0], load_frame(NEWS_PATH)[0], load_frame(NEWS_GOOGLE_PATH)[0]
 
 # -----------------------------
-# --- Helper functions ---
+# --- Normalized frame: (company, source, timestamp, sentiment) ---
 # -----------------------------
 
-def flatten_reddit_json(reddit_json):
-    """Flatten nested Reddit JSON into a list of posts with company info."""
-    flat_list = []
-    for company_entry in reddit_json:
-        company_name = company_entry['company']
-        for post in company_entry.get('posts', []):
-            flat_post = post.copy()
-            flat_post['company'] = company_name
-            flat_list.append(flat_post)
-    return flat_list
-
-def group_by_company(flat_list, company_key='company'):
-    """Group a list of dicts by company name (case-insensitive)."""
-    grouped = defaultdict(list)
-    for item in flat_list:
-        key = item.get(company_key)
-        if key:
-            grouped[key.lower()].append(item)  # lowercase keys
-    return grouped
+def normalize_reddit(df):
+    """Reddit scores become -1 / 0 / 1 around the neutral threshold."""
+    score = df['sentiment'].astype(float)
+    return pd.DataFrame({
+        'company': df['company'],
+        'source': 'reddit',
+        'timestamp': pd.to_datetime(df['date']),
+        'sentiment': np.select([score > NEUTRAL_THRESHOLD, score < -NEUTRAL_THRESHOLD], [1, -1], 0),
+        'text': df['title'].fillna('') + '\n' + df['selftext'].fillna(''),
+    })
+
+def normalize_news(df):
+    """CSV labels become 1 / 0 / -1 (unknown labels: NaN)."""
+    return pd.DataFrame({
+        'company': df['Company'],
+        'source': 'news',
+        'timestamp': pd.to_datetime(df['PublishedAt']),
+        'sentiment': df['Sentiment'].map(LABEL_VALUES).astype(float),
+        'text': df['Text'],
+    })
+
+def normalize_news_google(df):
+    """Google News keeps its continuous sentiment_score."""
+    return pd.DataFrame({
+        'company': df['company'],
+        'source': 'news_google',
+        'timestamp': pd.to_datetime(df['published_at']),
+        'sentiment': df['sentiment_score'].astype(float),
+        'text': df['title'],
+    })
+
+def _naive(timestamps):
+    return timestamps.dt.tz_convert(None) if timestamps.dt.tz is not None else timestamps
+
+def build_sentiment_frame(companies, reddit, news, news_google):
+    """
+    All sources in one frame, restricted to the known companies (matched
+    case-insensitively), with a 'day' column.
+    """
+    frames = [normalize_reddit(reddit), normalize_news(news), normalize_news_google(news_google)]
+    for frame in frames:
+        frame['timestamp'] = _naive(frame['timestamp'])
+    df = pd.concat(frames, ignore_index=True)
+
+    names = {name.lower(): name for name in companies}
+    df['company'] = df['company'].str.lower().map(names)
+    df = df[df['company'].notna()]
+    df['day'] = df['timestamp'].dt.floor('D')
+    return df
 
 # -----------------------------
-# --- Daily sentiment functions ---
+# --- Near-duplicates (syndicated stories) ---
 # -----------------------------
 
-def compute_daily_sentiment_reddit(reddit_json):
-    df = pd.DataFrame(reddit_json)
-    if df.empty:
-        return pd.DataFrame(columns=['Date', 'AvgSentiment'])
-    
-    if 'date' not in df.columns:
-        raise ValueError("Reddit JSON must have a 'date' column")
-    
-    df['PublishedAt'] = pd.to_datetime(df['date'])
-    df['SentimentNumeric'] = df['sentiment'].apply(lambda s: 1 if s > 0.05 else (-1 if s < -0.05 else 0))
-    df['Date'] = df['PublishedAt'].dt.date
-    daily_sentiment = df.groupby('Date')['SentimentNumeric'].mean().reset_index()
-    daily_sentiment.rename(columns={'SentimentNumeric': 'AvgSentiment'}, inplace=True)
-    return daily_sentiment
-
-def compute_daily_sentiment_news(news_json):
-    df = pd.DataFrame(news_json)
-    if df.empty:
-        return pd.DataFrame(columns=['Date', 'AvgSentiment'])
-    
-    if 'PublishedAt' not in df.columns and 'published_at' in df.columns:
-        df['PublishedAt'] = pd.to_datetime(df['published_at'])
-    else:
-        df['PublishedAt'] = pd.to_datetime(df['PublishedAt'])
-    
-    if 'Sentiment' in df.columns:
-        df['SentimentNumeric'] = df['Sentiment'].map({'positive':1, 'neutral':0, 'negative':-1})
-    elif 'sentiment_score' in df.columns:
-        df['SentimentNumeric'] = df['sentiment_score']
-    else:
-        raise ValueError("News JSON must have 'Sentiment' or 'sentiment_score' column")
-    
-    df['Date'] = df['PublishedAt'].dt.date
-    daily_sentiment = df.groupby('Date')['SentimentNumeric'].mean().reset_index()
-    daily_sentiment.rename(columns={'SentimentNumeric': 'AvgSentiment'}, inplace=True)
-    return daily_sentiment
-
-def compute_daily_sentiment_news_google(news_json):
-    return compute_daily_sentiment_news(news_json)  # same as news
+# 1: a cluster of near-identical texts counts once in the daily means
+COLLAPSE_NEAR_DUPLICATES = os.environ.get("COLLAPSE_NEAR_DUPLICATES", "0") == "1"
+
+def collapse_near_duplicates(df, threshold=NEAR_DUPLICATE_THRESHOLD):
+    """
+    Keep the earliest item of each cluster of near-identical texts, per
+    (company, source). Returns the frame and a dedup report per source.
+    """
+    keep, labels = [], {}
+    for (_, source), group in df.sort_values('timestamp', kind='stable').groupby(['company', 'source'], sort=False):
+        group_labels = cluster_texts(group['text'].tolist(), threshold)
+        keep.extend(group.index[np.unique(group_labels)])
+        # Offset so that clusters of different companies stay distinct
+        offset = sum(len(l) for l in labels.get(source, []))
+        labels.setdefault(source, []).append(group_labels + offset)
+    reports = {source: dedup_report(np.concatenate(l)) for source, l in labels.items()}
+    return df.loc[sorted(keep)], reports
 
 # -----------------------------
-# --- Generate daily sentiment JSON per company ---
+# --- Daily aggregation (one grouped reduction) ---
 # -----------------------------
 
-def generate_daily_sentiment_json(company_name, reddit_json=[], news_json=[], news_google_json=[]):
+def aggregate_daily(df):
+    """
+    One row per (company, source, day): sum and count of the sentiment and
+    number of positive / neutral / negative items.
+    """
+    sentiment = df['sentiment']
+    df = df.assign(
+        n_positive=(sentiment > NEUTRAL_THRESHOLD).astype(int),
+        n_negative=(sentiment < -NEUTRAL_THRESHOLD).astype(int),
+    )
+    df['n_neutral'] = sentiment.notna().astype(int) - df['n_positive'] - df['n_negative']
+    return df.groupby(['company', 'source', 'day'], sort=True).agg(
+        total=('sentiment', 'sum'),
+        count=('sentiment', 'count'),
+        mean=('sentiment', 'mean'),
+        n_positive=('n_positive', 'sum'),
+        n_neutral=('n_neutral', 'sum'),
+        n_negative=('n_negative', 'sum'),
+    ).reset_index()
+
+def to_daily_sentiment_json(daily, companies, sources):
+    """Former output: [{source, company, daily_sentiment: [{Date, AvgSentiment}]}]."""
+    daily = daily.assign(Date=daily['day'].dt.strftime('%Y-%m-%d'))
+    groups = {key: rows for key, rows in daily.groupby(['company', 'source'], sort=False)}
     output = []
-
-    sources = [
-        ("reddit", reddit_json, compute_daily_sentiment_reddit),
-        ("news", news_json, compute_daily_sentiment_news),
-        ("news_google", news_google_json, compute_daily_sentiment_news_google)
-    ]
-
-    for source_name, data, func in sources:
-        if data:
-            daily_df = func(data)
-            
-            # Convert Date column to string for JSON
-            if not daily_df.empty:
-                daily_df['Date'] = daily_df['Date'].apply(lambda d: d.isoformat() if hasattr(d, 'isoformat') else str(d))
-
-            daily_list = daily_df.to_dict(orient='records')
-            output.append({
-                "source": source_name,
-                "company": company_name,
-                "daily_sentiment": daily_list
-            })
-
-    return output  # return as Python object
+    for company in companies:
+        for source in sources:
+            if (company, source) in groups:
+                rows = groups[(company, source)].rename(columns={'mean': 'AvgSentiment'})
+                output.append({
+                    "source": source,
+                    "company": company,
+                    "daily_sentiment": rows[['Date', 'AvgSentiment']].to_dict(orient='records'),
+                })
+    return output
+
+def to_compact_json(daily, companies):
+    """
+    sentiment_compact.json shape: per ticker, the daily mean and label counts
+    of all sources together ("global") and of each source ("by_source",
+    keyed as in COMPACT_SOURCES, through STORE_SOURCES).
+    """
+    counts = ['n_positive', 'n_neutral', 'n_negative']
+    pooled = daily.groupby(['company', 'day'], sort=True)[['total', 'count'] + counts].sum().reset_index()
+
+    def records(rows):
+        rows = rows.assign(
+            date=rows['day'].dt.strftime('%Y-%m-%d'),
+            mean_sentiment=(rows['total'] / rows['count']).round(4),
+        )
+        return rows[['date', 'mean_sentiment'] + counts].to_dict(orient='records')
+
+    by_company = {company: rows for company, rows in daily.groupby('company', sort=False)}
+    pooled_by_company = {company: rows for company, rows in pooled.groupby('company', sort=False)}
+    data = {}
+    for company, ticker in companies.items():
+        if company not in by_company:
+            continue
+        by_source = dict(tuple(by_company[company].groupby('source', sort=False)))
+        data[ticker] = {
+            "global": records(pooled_by_company[company]),
+            "by_source": {
+                key: records(by_source[STORE_SOURCES[source]])
+                for source, key in COMPACT_SOURCES.items() if STORE_SOURCES[source] in by_source
+            },
+        }
+    return {"tickers": {ticker: company for company, ticker in companies.items()}, "data": data}
 
 # -----------------------------
 # --- Main processing ---
 # -----------------------------
 
-# Flatten Reddit posts
-reddit_flat_list = flatten_reddit_json(reddit_raw)
-
-# Group by company (case-insensitive)
-reddit_data = group_by_company(reddit_flat_list, company_key='company')
-news_data = group_by_company(news_flat_list, company_key='Company')
-news_google_data = group_by_company(news_google_flat_list, company_key='company')
-
-# List of companies
-companies = [
-    "LVMH","TotalEnergies","Sanofi","Airbus","Schneider Electric",
-    "Apple","Microsoft","Amazon","Alphabet (Google)","Tesla",
-    "lvmh", "totalenergies", "sanofi", "airbus", "schneider electric",
-    "apple", "microsoft", "amazon", "alphabet (google)", "tesla"
-]
-
-# Store all companies sentiment
-all_companies_sentiment = []
-
-for company in companies:
-    key = company.lower()  # lowercase for fetching
-    company_sentiment = generate_daily_sentiment_json(
-        company_name=company,
-        reddit_json=reddit_data.get(key, []),
-        news_json=news_data.get(key, []),
-        news_google_json=news_google_data.get(key, [])
-    )
-    all_companies_sentiment.extend(company_sentiment)
+def main():
+    """Write all_companies_daily_sentiment.json and sentiment_compact.json to the working directory."""
+    # Companies (each once; matched case-insensitively in every source)
+    companies = COMPANIES
+    sources = ["reddit", "news", "news_google"]
+
+    # Computed from the files as they are now, so rescored or removed rows are reflected
+    reddit_df, news_df, news_google_df = load_sources()
+    sentiment_df = build_sentiment_frame(companies, reddit_df, news_df, news_google_df)
+    if COLLAPSE_NEAR_DUPLICATES:
+        sentiment_df, dedup = collapse_near_duplicates(sentiment_df)
+        for source, report in dedup.items():
+            print(f"{source}: {report['texts']} textes, {report['clusters']} clusters "
+                  f"(taux de doublons {report['dedup_ratio']:.1%})")
+    daily = aggregate_daily(sentiment_df)
+
+    all_companies_sentiment = to_daily_sentiment_json(daily, companies, sources)
+    sentiment_compact = to_compact_json(daily, companies)
+
+    # Save to JSON
+    with open("all_companies_daily_sentiment.json", "w", encoding="utf-8") as f:
+        json.dump(all_companies_sentiment, f, indent=2, ensure_ascii=False)
+
+    with open("sentiment_compact.json", "w", encoding="utf-8") as f:
+        json.dump(sentiment_compact, f, ensure_ascii=False)
 
-# Save to JSON
-with open("all_companies_daily_sentiment.json", "w", encoding="utf-8") as f:
-    json.dump(all_companies_sentiment, f, indent=2, ensure_ascii=False)
+    print("✅ Fichier JSON généré pour toutes les entreprises !")
 
-print("✅ Fichier JSON généré pour toutes les entreprises !")
+if __name__ == "__main__":
+    main()
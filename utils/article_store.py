@@ -0,0 +1,254 @@
+# finance_api/utils/article_store.py
+"""
+Append-only, deduplicated store of ingested articles/posts with watermarks.
+
+Every source (news CSV, Google News, Reddit) is kept in one SQLite table,
+keyed per company by URL or, when there is none, by a hash of the content
+(the same article is legitimately listed under several companies). Appending
+ignores rows already stored and advances a per-(source, company) watermark:
+the newest publication time stored, from which the next refresh starts.
+
+The flat files of data/ are re-materialized from the store only when the
+source changed since they were last written (or when they are missing).
+"""
+import os
+import csv
+import json
+import sqlite3
+import hashlib
+import threading
+import pandas as pd
+
+
+ARTICLE_STORE_PATH = os.environ.get(
+    "ARTICLE_STORE_PATH", os.path.join("finance_api", "data", ".cache", "articles.sqlite")
+)
+
+# How each source is keyed, timed and written back to data/
+SOURCES = {
+    "news": {
+        "path": os.path.join("finance_api", "data", "news_sentiment_raw.csv"),
+        "format": "csv",
+        "company": "Company",
+        "time": ("PublishedAt",),
+        "key": "URL",
+        "hash_fields": ("Company", "Text", "PublishedAt"),
+    },
+    "google": {
+        "path": os.path.join("finance_api", "data", "stock_news_google.json"),
+        "format": "records",
+        "company": "company",
+        "time": ("published_at",),
+        "key": "url",
+        "hash_fields": ("company", "title", "published_at"),
+    },
+    "reddit": {
+        "path": os.path.join("finance_api", "data", "reddit", "reddit_data.json"),
+        "format": "reddit",
+        "company": "company",
+        "time": ("date", "hour"),
+        "key": None,
+        "hash_fields": ("company", "title", "selftext", "date", "hour"),
+    },
+}
+
+
+def published_at(row: dict, spec: dict):
+    """Sortable UTC time of a row ("YYYY-MM-DDTHH:MM:SSZ"), or None."""
+    value = " ".join(str(row[f]) for f in spec["time"] if row.get(f) not in (None, ""))
+    stamp = pd.to_datetime(value, utc=True, errors="coerce") if value else pd.NaT
+    return None if pd.isna(stamp) else stamp.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def article_key(row: dict, spec: dict) -> str:
+    """URL when the source has one, else a hash of the identifying fields."""
+    if spec["key"] and row.get(spec["key"]):
+        return str(row[spec["key"]])
+    content = json.dumps([row.get(f) for f in spec["hash_fields"]], ensure_ascii=False, default=str)
+    return "sha256:" + hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def read_rows(source: str, path: str = None, sources: dict = None) -> list:
+    """Rows (dicts) of the flat file of a source, one per article/post (Reddit posts carry their company)."""
+    spec = (sources or SOURCES)[source]
+    path = path or spec["path"]
+    if spec["format"] == "csv":
+        return pd.read_csv(path).to_dict(orient="records")
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if spec["format"] == "reddit":
+        return [{**post, "company": entry["company"]} for entry in data for post in entry.get("posts", [])]
+    return data
+
+
+class ArticleStore:
+    """
+    Args:
+        path (str): SQLite database file
+        sources (dict): source specs (default: SOURCES)
+    """
+
+    def __init__(self, path: str = ARTICLE_STORE_PATH, sources: dict = None):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.sources = sources or SOURCES
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS articles (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                source TEXT NOT NULL, key TEXT NOT NULL, company TEXT,
+                published_at TEXT, payload TEXT NOT NULL,
+                UNIQUE (source, company, key));
+            CREATE INDEX IF NOT EXISTS articles_company ON articles(source, company, published_at);
+            CREATE TABLE IF NOT EXISTS watermarks (
+                source TEXT NOT NULL, company TEXT NOT NULL, published_at TEXT,
+                PRIMARY KEY (source, company));
+            CREATE TABLE IF NOT EXISTS materialized (
+                source TEXT NOT NULL, path TEXT NOT NULL, version INTEGER,
+                PRIMARY KEY (source, path));
+        """)
+
+    # -----------------------------
+    # --- Watermarks ---
+    # -----------------------------
+
+    def watermark(self, source: str, company: str):
+        """Newest publication time stored for (source, company), or None."""
+        row = self._conn.execute(
+            "SELECT published_at FROM watermarks WHERE source = ? AND company = ?", (source, company)
+        ).fetchone()
+        return row[0] if row else None
+
+    def watermarks(self, source: str) -> dict:
+        return dict(self._conn.execute(
+            "SELECT company, published_at FROM watermarks WHERE source = ?", (source,)
+        ).fetchall())
+
+    # -----------------------------
+    # --- Append ---
+    # -----------------------------
+
+    def append(self, source: str, rows) -> int:
+        """Store the rows not seen yet and advance watermarks. Returns the number added."""
+        spec = self.sources[source]
+        records, newest = [], {}
+        for row in rows:
+            company = row.get(spec["company"])
+            when = published_at(row, spec)
+            records.append((source, article_key(row, spec), company, when,
+                            json.dumps(row, ensure_ascii=False, default=str)))
+            if company is not None and when is not None and when > newest.get(company, ""):
+                newest[company] = when
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO articles (source, key, company, published_at, payload) VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+            added = self._conn.total_changes - before
+            self._conn.executemany(
+                "INSERT INTO watermarks VALUES (?, ?, ?) ON CONFLICT (source, company) "
+                "DO UPDATE SET published_at = MAX(published_at, excluded.published_at)",
+                [(source, company, when) for company, when in newest.items()],
+            )
+            self._conn.commit()
+        return added
+
+    def import_file(self, source: str, path: str = None) -> int:
+        """Fold a flat file of data/ (e.g. freshly scraped) into the store."""
+        return self.append(source, read_rows(source, path, self.sources))
+
+    # -----------------------------
+    # --- Read / materialize ---
+    # -----------------------------
+
+    def version(self, source: str) -> int:
+        """Grows whenever rows are added to the source."""
+        return self._conn.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM articles WHERE source = ?", (source,)
+        ).fetchone()[0]
+
+    def count(self, source: str) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM articles WHERE source = ?", (source,)).fetchone()[0]
+
+    def companies(self, source: str) -> list:
+        """Distinct company keys stored for a source."""
+        return [company for (company,) in self._conn.execute(
+            "SELECT DISTINCT company FROM articles WHERE source = ? ORDER BY company", (source,)
+        )]
+
+    def known(self, source: str, rows) -> list:
+        """For each row, whether it is already stored (same company and key)."""
+        spec = self.sources[source]
+        pairs = [(row.get(spec["company"]), article_key(row, spec)) for row in rows]
+        keys, found = list({key for _, key in pairs}), set()
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            found.update(self._conn.execute(
+                f"SELECT company, key FROM articles WHERE source = ? AND key IN ({','.join('?' * len(chunk))})",
+                [source, *chunk],
+            ).fetchall())
+        return [pair in found for pair in pairs]
+
+    def rows(self, source: str, company: str = None, since: str = None) -> list:
+        """Stored rows in insertion order, optionally for one company / after a time."""
+        query, params = "SELECT payload FROM articles WHERE source = ?", [source]
+        if company is not None:
+            query += " AND company = ?"
+            params.append(company)
+        if since is not None:
+            query += " AND published_at > ?"
+            params.append(since)
+        return [json.loads(payload) for (payload,) in self._conn.execute(query + " ORDER BY seq", params)]
+
+    def rows_since(self, source: str, seq: int = 0) -> list:
+        """(seq, row) of the rows added after `seq` (see version()), in insertion order."""
+        return [
+            (row_seq, json.loads(payload)) for row_seq, payload in self._conn.execute(
+                "SELECT seq, payload FROM articles WHERE source = ? AND seq > ? ORDER BY seq", (source, seq)
+            )
+        ]
+
+    def materialize(self, source: str, path: str = None, force: bool = False) -> bool:
+        """
+        Rewrite the flat file of a source if it changed since the last write.
+        Returns True if the file was written.
+        """
+        spec = self.sources[source]
+        path = path or spec["path"]
+        version = self.version(source)
+        row = self._conn.execute(
+            "SELECT version FROM materialized WHERE source = ? AND path = ?", (source, path)
+        ).fetchone()
+        if not force and row and row[0] == version and os.path.exists(path):
+            return False
+
+        rows = self.rows(source)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        if spec["format"] == "csv":
+            columns = list(dict.fromkeys(k for r in rows for k in r))
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(rows)
+        else:
+            if spec["format"] == "reddit":
+                grouped = {}
+                for r in rows:
+                    post = {k: v for k, v in r.items() if k != "company"}
+                    grouped.setdefault(r["company"], []).append(post)
+                rows = [{"company": company, "posts": posts} for company, posts in grouped.items()]
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(rows, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO materialized VALUES (?, ?, ?)", (source, path, version))
+            self._conn.commit()
+        return True
+
+    def close(self):
+        self._conn.close()
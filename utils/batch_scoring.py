@@ -0,0 +1,247 @@
+# finance_api/utils/batch_scoring.py
+"""
+Batch sentiment scoring of the whole corpus in a process pool, with
+checkpoints and resume.
+
+The texts of every source (see TEXT_FIELDS) are split by (source, company)
+into chunks of at most `chunk_size` texts, in file order. Chunks are scored
+by worker processes, each loading the model once and limited to `threads`
+CPU threads (OMP/MKL variables and torch.set_num_threads), so that
+workers x threads does not oversubscribe the cores.
+
+Every finished chunk is written to `<checkpoint_dir>/<chunk>.json` together
+with a fingerprint of its texts and of the model settings (not of the
+worker and thread counts, which do not change the scores); a restarted run
+skips the chunks whose checkpoint matches and scores the others. The output
+(JSON Lines: source, company, key, label, score) is assembled from the
+checkpoints in chunk order: chunks and batches do not depend on the number
+of workers, so neither does the output.
+
+Usage:
+    python -m finance_api.utils.batch_scoring [--workers 4] [--threads 1] [--chunk-size 256]
+        [--sources news,google,reddit] [--model yiyanghkust/finbert-tone] [--backend eager]
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import quote
+
+from finance_api.utils.article_store import SOURCES, article_key, read_rows
+
+
+CHECKPOINT_DIR = os.path.join("finance_api", "data", ".cache", "batch_scoring")
+OUTPUT_PATH = os.path.join("finance_api", "data", "batch_sentiment_scores.jsonl")
+DEFAULT_CHUNK_SIZE = 256
+
+# Scored text of each source (fields joined by a line break)
+TEXT_FIELDS = {
+    "news": ("Text",),
+    "google": ("title", "summary"),
+    "reddit": ("title", "selftext"),
+}
+
+# Read by the BLAS / OpenMP runtimes when torch is imported in a worker
+THREAD_VARIABLES = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def row_text(source: str, row: dict) -> str:
+    values = [row.get(field) for field in TEXT_FIELDS[source]]
+    return "\n".join(value for value in values if isinstance(value, str) and value)
+
+
+def make_chunks(sources=tuple(TEXT_FIELDS), chunk_size: int = DEFAULT_CHUNK_SIZE) -> list:
+    """
+    Chunks of the corpus: [{"id", "source", "company", "keys", "texts"}], in
+    source, company (first appearance) and file order.
+    """
+    chunks = []
+    for source in sources:
+        spec = SOURCES[source]
+        by_company = {}
+        for row in read_rows(source):
+            by_company.setdefault(str(row.get(spec["company"])), []).append(row)
+        for company, rows in by_company.items():
+            for index, start in enumerate(range(0, len(rows), chunk_size)):
+                part = rows[start:start + chunk_size]
+                chunks.append({
+                    "id": f"{source}/{quote(company, safe='')}/{index:05d}",
+                    "source": source,
+                    "company": company,
+                    "keys": [article_key(row, spec) for row in part],
+                    "texts": [row_text(source, row) for row in part],
+                })
+    return chunks
+
+
+def fingerprint(chunk: dict, settings: dict) -> str:
+    """Identifies the chunk content and the model settings its scores come from."""
+    digest = hashlib.sha256(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for key, text in zip(chunk["keys"], chunk["texts"]):
+        digest.update(f"{key}\0{text}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+# -----------------------------
+# --- Workers ---
+# -----------------------------
+
+_SCORER = None
+
+
+def _init_worker(settings: dict, threads: int):
+    """Load the model once per worker process, with its thread limit."""
+    global _SCORER
+    # Read by the runtimes when torch is imported, i.e. just below
+    for variable in THREAD_VARIABLES:
+        os.environ[variable] = str(threads)
+    from finance_api.sentiment import SentimentScorer
+
+    _SCORER = SentimentScorer.from_pretrained(
+        settings["model"], batch_size=settings["batch_size"], max_length=settings["max_length"],
+        num_threads=threads, backend=settings["backend"],
+    )
+
+
+def _score_chunk(chunk_id: str, texts: list):
+    """(chunk id, [(label, score)], seconds, worker pid)."""
+    start = time.perf_counter()
+    results = _SCORER.score_batch(texts)
+    return chunk_id, results, time.perf_counter() - start, os.getpid()
+
+
+# -----------------------------
+# --- Checkpoints ---
+# -----------------------------
+
+def checkpoint_path(checkpoint_dir: str, chunk: dict) -> str:
+    return os.path.join(checkpoint_dir, chunk["id"] + ".json")
+
+
+def load_checkpoint(checkpoint_dir: str, chunk: dict, expected: str):
+    """Scores of a chunk from its checkpoint, or None if missing or stale."""
+    path = checkpoint_path(checkpoint_dir, chunk)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get("fingerprint") != expected or len(checkpoint["results"]) != len(chunk["texts"]):
+        return None
+    return checkpoint["results"]
+
+
+def write_checkpoint(checkpoint_dir: str, chunk: dict, fingerprint_: str, results: list):
+    """Atomic write (temporary file + rename): a checkpoint is complete or absent."""
+    path = checkpoint_path(checkpoint_dir, chunk)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"chunk": chunk["id"], "fingerprint": fingerprint_, "results": results}, f)
+    os.replace(tmp_path, path)
+
+
+# -----------------------------
+# --- Pipeline ---
+# -----------------------------
+
+def run(sources=tuple(TEXT_FIELDS), workers: int = None, threads: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE, batch_size: int = 32, max_length: int = 512,
+        model: str = None, backend: str = "eager", checkpoint_dir: str = CHECKPOINT_DIR,
+        output: str = OUTPUT_PATH, log=print) -> dict:
+    """
+    Score the corpus, resuming from the checkpoints. Returns a report with the
+    throughput of each worker.
+    """
+    from finance_api.sentiment import MODEL_NAME
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads)
+    # What the scores depend on (a resumed run may use other workers / threads)
+    settings = {"model": model or MODEL_NAME, "backend": backend, "batch_size": batch_size, "max_length": max_length}
+    chunks = make_chunks(sources, chunk_size)
+    fingerprints = {chunk["id"]: fingerprint(chunk, settings) for chunk in chunks}
+    results = {chunk["id"]: load_checkpoint(checkpoint_dir, chunk, fingerprints[chunk["id"]]) for chunk in chunks}
+    pending = [chunk for chunk in chunks if results[chunk["id"]] is None]
+    log(f"{len(chunks)} chunks ({sum(len(c['texts']) for c in chunks)} texts), "
+        f"{len(chunks) - len(pending)} already checkpointed, {len(pending)} to score "
+        f"with {workers} worker(s) x {threads} thread(s)")
+
+    per_worker = {}
+    start = time.perf_counter()
+    if pending:
+        by_id = {chunk["id"]: chunk for chunk in pending}
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker,
+                                 initargs=(settings, threads)) as pool:
+            futures = [pool.submit(_score_chunk, chunk["id"], chunk["texts"]) for chunk in pending]
+            for done, future in enumerate(as_completed(futures), start=1):
+                chunk_id, scores, seconds, pid = future.result()
+                scores = [list(score) for score in scores]
+                write_checkpoint(checkpoint_dir, by_id[chunk_id], fingerprints[chunk_id], scores)
+                results[chunk_id] = scores
+                stats = per_worker.setdefault(pid, {"chunks": 0, "texts": 0, "seconds": 0.0})
+                stats["chunks"] += 1
+                stats["texts"] += len(scores)
+                stats["seconds"] += seconds
+                log(f"[{done}/{len(pending)}] {chunk_id}: {len(scores)} texts in {seconds:.1f}s (worker {pid})")
+    elapsed = time.perf_counter() - start
+
+    # Output in chunk order, whatever the order chunks finished in
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            for key, (label, score) in zip(chunk["keys"], results[chunk["id"]]):
+                f.write(json.dumps({"source": chunk["source"], "company": chunk["company"],
+                                    "key": key, "label": label, "score": score}, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, output)
+
+    scored = sum(stats["texts"] for stats in per_worker.values())
+    return {
+        "chunks": len(chunks),
+        "resumed": len(chunks) - len(pending),
+        "texts_scored": scored,
+        "seconds": round(elapsed, 2),
+        "texts_per_s": round(scored / elapsed, 1) if scored else 0.0,
+        "workers": {
+            str(pid): {**stats, "seconds": round(stats["seconds"], 2),
+                       "texts_per_s": round(stats["texts"] / stats["seconds"], 1) if stats["seconds"] else 0.0}
+            for pid, stats in per_worker.items()
+        },
+        "output": output,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch sentiment scoring with checkpoints and resume")
+    parser.add_argument("--sources", default=",".join(TEXT_FIELDS))
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: cores / threads)")
+    parser.add_argument("--threads", type=int, default=1, help="CPU threads per worker")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-length", type=int, default=512)
+    parser.add_argument("--model", default=None, help="model name or local directory (default: FinBERT)")
+    parser.add_argument("--backend", default="eager")
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIR)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args(argv)
+
+    report = run(
+        sources=[s.strip() for s in args.sources.split(",") if s.strip()], workers=args.workers,
+        threads=args.threads, chunk_size=args.chunk_size, batch_size=args.batch_size,
+        max_length=args.max_length, model=args.model, backend=args.backend,
+        checkpoint_dir=args.checkpoint_dir, output=args.output,
+    )
+    print(f"✅ {report['texts_scored']} texts scored in {report['seconds']}s "
+          f"({report['texts_per_s']} texts/s), {report['resumed']} chunks resumed -> {report['output']}")
+    for pid, stats in report["workers"].items():
+        print(f"   worker {pid}: {stats['chunks']} chunks, {stats['texts']} texts, {stats['texts_per_s']} texts/s")
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,156 @@
+# finance_api/utils/dashboard.py
+"""
+Several tickers in one response: prices, per-source sentiment summaries and
+correlation / volatility.
+
+Each data source is brought up to date once per request (the three sentiment
+files, the metrics engine), then the per-ticker work runs concurrently on a
+shared thread pool: price slicing and encoding from the price cache, window
+lookups in the shared indexed sources, and a lookup in the one memoized
+metrics result.
+
+Companies are looked up in each source like the single-ticker endpoints do
+with the ticker's name: upper-cased in the news CSV, lower-cased in the
+Reddit and Google News files. Each source's window ends at the time of its
+own clock (see sentiment_store.CLOCKS), read once per request.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from finance_api.utils.article_store import SOURCES
+from finance_api.utils.fetch_data_fin import fetch_stock_data, to_json_format
+from finance_api.utils.instrumentation import span
+from finance_api.utils.metrics_engine import get_metrics_engine
+from finance_api.utils.price_cache import period_days
+from finance_api.utils.sentiment_aggregates import row_sentiment, sentiment_summary
+from finance_api.utils.sentiment_store import CLOCKS, get_source
+
+
+DASHBOARD_WORKERS = int(os.environ.get("DASHBOARD_WORKERS", 8))
+
+# Source -> company key of a ticker name in that source
+COMPANY_KEYS = {
+    "news": str.upper,
+    "reddit": str.lower,
+    "google": str.lower,
+}
+
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Thread pool shared by the multi-ticker endpoints."""
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(DASHBOARD_WORKERS, thread_name_prefix="dashboard")
+    return _EXECUTOR
+
+
+def parse_tickers(tickers: str) -> list:
+    """'AAPL, tsla,AAPL' -> ['AAPL', 'TSLA'] (upper-cased, first occurrence kept)."""
+    parsed = list(dict.fromkeys(t.strip().upper() for t in (tickers or "").split(",") if t.strip()))
+    if not parsed:
+        raise ValueError("Aucun ticker : liste séparée par des virgules attendue (ex: AAPL,TSLA)")
+    return parsed
+
+
+def window_days(period: str) -> int:
+    """Calendar days of a period ("7d" -> 7, "1mo" -> 30)."""
+    if period.endswith("mo"):
+        return 30 * int(period[:-2])
+    return period_days(period)
+
+
+def _sentiments(source: str, df) -> list:
+    """Numeric sentiment of each row of a window (same as analysis.py)."""
+    return [row_sentiment(source, row) for row in df.to_dict(orient="records")] if df is not None else []
+
+
+def _prices(ticker: str, name: str, period: str, interval: str, format: str) -> dict:
+    try:
+        return to_json_format(ticker, name, fetch_stock_data(ticker, period, interval), format)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _fan_out(func, tickers: list, names: dict) -> dict:
+    """{ticker: func(ticker, name)} run concurrently; unknown tickers get an error entry."""
+    futures = {
+        ticker: get_executor().submit(func, ticker, names[ticker])
+        for ticker in tickers if ticker in names
+    }
+    return {
+        ticker: futures[ticker].result() if ticker in futures else {"error": f"Ticker '{ticker}' non reconnu."}
+        for ticker in tickers
+    }
+
+
+def stocks_batch(tickers: list, names: dict, period: str = "7d", interval: str = "1h", format: str = "rows") -> dict:
+    """
+    Prices of several tickers, each as /stocks returns it.
+
+    Args:
+        tickers (list): tickers, in response order
+        names (dict): {ticker: company name} of the known tickers
+    Returns:
+        dict: period, interval and {ticker: /stocks payload or {"error": ...}}
+    """
+    return {
+        "period": period,
+        "interval": interval,
+        "tickers": _fan_out(lambda ticker, name: _prices(ticker, name, period, interval, format), tickers, names),
+    }
+
+
+def dashboard(tickers: list, names: dict, period: str = "7d", interval: str = "1h") -> dict:
+    """
+    Prices over `period`, sentiment of each source over the same number of
+    days and correlation / volatility ("global" and "<days>d") of each ticker.
+
+    Args:
+        tickers (list): tickers, in response order
+        names (dict): {ticker: company name} of the known tickers
+    Returns:
+        dict: period, interval, days, windows and {ticker: {name, prices, sentiment, metrics}}
+    """
+    days = window_days(period)
+    windows = ["global", f"{days}d"]
+
+    # One load of each source for all tickers
+    with span("dashboard.load"):
+        sources = {kind: get_source(spec["path"], kind) for kind, spec in SOURCES.items()}
+        loads = [get_executor().submit(source.refresh) for source in sources.values()]
+        metrics = get_metrics_engine().compute(windows)
+        for load in loads:
+            load.result()
+
+    # (start, end) per source, on the clock of its single-ticker endpoint
+    bounds = {}
+    for kind in sources:
+        end = CLOCKS[kind]()
+        bounds[kind] = (end - timedelta(days=days), end)
+
+    def per_ticker(ticker: str, name: str) -> dict:
+        with span("dashboard.ticker"):
+            prices = _prices(ticker, name, period, interval, "rows")
+            return {
+                "name": name,
+                "prices": prices.get("data", prices),
+                "sentiment": {
+                    kind: sentiment_summary(_sentiments(kind, source.window(COMPANY_KEYS[kind](name), *bounds[kind])))
+                    for kind, source in sources.items()
+                },
+                "metrics": metrics.get(name),
+            }
+
+    return {
+        "period": period,
+        "interval": interval,
+        "days": days,
+        "windows": windows,
+        "tickers": _fan_out(per_ticker, tickers, names),
+    }
@@ -0,0 +1,171 @@
+# finance_api/utils/executors.py
+"""
+Bounded executors for the blocking endpoint work, with single-flight
+coalescing of identical requests and load shedding.
+
+    @app.get("/stocks")
+    @offload("io")
+    def get_stock_data(ticker: str = Query(...), ...):
+        ...
+
+The decorated handler becomes async: its body runs on the executor of its
+workload class instead of Starlette's shared thread pool, so a burst on one
+class cannot starve the other.
+
+- "io": price downloads, sentiment file reads and filters
+  (IO_WORKERS threads, default 16, IO_QUEUE waiting tasks, default 64)
+- "cpu": pandas aggregation, metrics, search
+  (CPU_WORKERS threads, default one per core, CPU_QUEUE waiting tasks, default 32)
+
+Identical in-flight requests (same handler, same parameters once validated
+and completed with their defaults by FastAPI) share one computation: the
+first runs it, the others await its result without taking an executor slot.
+A request that would exceed workers + queue tasks on its executor is
+answered 503 with Retry-After at once rather than waiting behind the backlog.
+"""
+import os
+import time
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from finance_api.utils.instrumentation import COALESCED_REQUESTS, EXECUTOR_WAIT, SHED_REQUESTS, count, observe
+from finance_api.utils.serialization import SafeJSONResponse
+
+
+# Workload class -> (worker threads, tasks allowed to wait)
+WORKLOADS = {
+    "io": (int(os.environ.get("IO_WORKERS", 16)), int(os.environ.get("IO_QUEUE", 64))),
+    "cpu": (int(os.environ.get("CPU_WORKERS", os.cpu_count() or 1)), int(os.environ.get("CPU_QUEUE", 32))),
+}
+
+RETRY_AFTER_SECONDS = 1
+
+
+class Saturated(Exception):
+    """The executor already holds as many tasks as it accepts."""
+
+
+class BoundedExecutor:
+    """Thread pool refusing new tasks beyond `workers` running + `max_queue` waiting."""
+
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix=f"{name}-executor")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Tasks running or waiting."""
+        return self._pending
+
+    def submit(self, func, *args):
+        """Future of func(*args), run in the caller's context. Raises Saturated when full."""
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                raise Saturated(self.name)
+            self._pending += 1
+
+        context = contextvars.copy_context()
+        submitted = time.perf_counter()
+
+        def task():
+            observe(EXECUTOR_WAIT, time.perf_counter() - submitted, executor=self.name)
+            return context.run(func, *args)
+
+        try:
+            future = self._pool.submit(task)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+
+_EXECUTORS = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def get_executor(workload: str) -> BoundedExecutor:
+    """Process-wide executor of a workload class ("io" or "cpu")."""
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(workload)
+        if executor is None:
+            workers, max_queue = WORKLOADS[workload]
+            executor = _EXECUTORS[workload] = BoundedExecutor(workload, workers, max_queue)
+    return executor
+
+
+# -----------------------------
+# --- Single flight ---
+# -----------------------------
+
+class SingleFlight:
+    """
+    In-flight calls by key, on the event loop: a call made while an identical
+    one runs awaits the same future instead of starting another.
+    """
+
+    def __init__(self):
+        self._calls = {}  # (event loop, key) -> asyncio.Future
+
+    async def do(self, key, executor: BoundedExecutor, func):
+        loop = asyncio.get_running_loop()
+        flight = (loop, key)
+        future = self._calls.get(flight)
+        if future is not None:
+            count(COALESCED_REQUESTS, handler=key[0])
+        else:
+            future = asyncio.wrap_future(executor.submit(func), loop=loop)
+            self._calls[flight] = future
+            future.add_done_callback(functools.partial(self._done, flight))
+        # A cancelled request (client gone) must not cancel the others' computation
+        return await asyncio.shield(future)
+
+    def _done(self, flight, future):
+        if self._calls.get(flight) is future:
+            del self._calls[flight]
+        if not future.cancelled():
+            future.exception()  # retrieved even if every waiter went away
+
+
+_SINGLE_FLIGHT = SingleFlight()
+
+
+def offload(workload: str, coalesce: bool = True):
+    """
+    Decorator of a blocking FastAPI handler: run it on the `workload` executor,
+    sharing identical in-flight calls (coalesce=True), 503 when saturated.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def handler(*args, **kwargs):
+            executor = get_executor(workload)
+            call = functools.partial(func, *args, **kwargs)
+            try:
+                if not coalesce:
+                    return await asyncio.wrap_future(executor.submit(call))
+                key = (func.__name__, tuple(sorted(kwargs.items())))
+                return await _SINGLE_FLIGHT.do(key, executor, call)
+            except Saturated:
+                return saturated_response(workload)
+        return handler
+    return decorator
+
+
+def saturated_response(workload: str) -> SafeJSONResponse:
+    """503 answered at once when the `workload` executor is full."""
+    count(SHED_REQUESTS, executor=workload)
+    return SafeJSONResponse(
+        {"error": "Serveur saturé, réessayez dans un instant."},
+        status_code=503, headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
@@ -1,10 +1,15 @@
 # finance_api/utils/fetch_data.py
-import yfinance as yf
 import pandas as pd
 
+from finance_api.utils.price_cache import get_price_cache
+from finance_api.utils.instrumentation import rows, span
+
 def fetch_stock_data(ticker: str, period: str = "7d", interval: str = "1h") -> pd.DataFrame:
     """
-    Télécharge et nettoie les données pour un ticker donné.
+    Récupère et nettoie les données pour un ticker donné.
+
+    Les barres viennent du cache local (amorcé depuis data/stocks.json) ;
+    yfinance n'est appelé que pour les barres plus récentes que le cache.
 
     Args:
         ticker (str): symbole (ex: "TSLA", "AAPL", "MC.PA")
@@ -15,56 +20,73 @@ def fetch_stock_data(ticker: str, period: str = "7d", interval: str = "1h") -> p
         pd.DataFrame: dataframe propre avec colonnes ['date', 'time', 'Close', 'Volume']
     """
 
-    # 1️⃣ Récupération via yfinance
-    df = yf.Ticker(ticker).history(period=period, interval=interval)[["Close", "Volume"]]
+    # 1️⃣ Récupération via le cache de prix (rafraîchissement incrémental)
+    with span("fetch_stock_data.price_cache"):
+        df = get_price_cache().get(ticker, period, interval)[["Close", "Volume"]]
+        rows(returned=len(df))
 
     if df.empty:
         raise ValueError(f"Aucune donnée récupérée pour {ticker} ({period}, {interval})")
 
     # 2️⃣ Nettoyage & formatage
-    if isinstance(df.index, pd.DatetimeIndex):
-        df.index = df.index.tz_convert("UTC")
-    else:
-        raise TypeError("Index is not a DatetimeIndex, cannot convert timezone.")
-    df = df.interpolate(method="time", limit_direction="both").reset_index()
+    with span("fetch_stock_data.clean"):
+        if isinstance(df.index, pd.DatetimeIndex):
+            df.index = df.index.tz_convert("UTC")
+        else:
+            raise TypeError("Index is not a DatetimeIndex, cannot convert timezone.")
+        df = df.interpolate(method="time", limit_direction="both").reset_index()
 
-    df.rename(columns={"Datetime": "datetime"}, inplace=True)
-    df["date"] = df["datetime"].dt.strftime("%Y-%m-%d")
-    df["time"] = df["datetime"].dt.strftime("%H:%M:%S")
+        df.rename(columns={"Datetime": "datetime"}, inplace=True)
+        df["date"] = df["datetime"].dt.strftime("%Y-%m-%d")
+        df["time"] = df["datetime"].dt.strftime("%H:%M:%S")
 
-    # 3️⃣ Optionnel : calcul du pourcentage de variation horaire
-    df["change_pct"] = df["Close"].pct_change() * 100
-    df["change_pct"] = df["change_pct"].round(3).fillna(0)
+        # 3️⃣ Optionnel : calcul du pourcentage de variation horaire
+        df["change_pct"] = df["Close"].pct_change() * 100
+        df["change_pct"] = df["change_pct"].round(3).fillna(0)
 
-    # 4️⃣ Colonnes finales dans l’ordre logique
-    df = df[["date", "time", "Close", "Volume", "change_pct"]]
+        # 4️⃣ Colonnes finales dans l’ordre logique
+        df = df[["date", "time", "Close", "Volume", "change_pct"]]
 
     return df
 
 
-def to_json_format(ticker: str, name: str, df: pd.DataFrame) -> dict:
+def to_json_format(ticker: str, name: str, df: pd.DataFrame, format: str = "rows") -> dict:
     """
     Transforme le DataFrame en JSON structuré pour le front.
 
+    Les colonnes sont converties en une fois (pas de Series par ligne).
+
     Args:
         ticker (str): symbole de l’entreprise
         name (str): nom lisible
         df (pd.DataFrame): dataframe propre
+        format (str): "rows" (liste de dicts, par défaut) ou "columnar"
+            ({"date": [...], "time": [...], "close": [...], ...})
 
     Returns:
         dict: dictionnaire formaté prêt à être renvoyé par FastAPI
     """
+    with span("to_json_format.encode"):
+        # round() natif et non np.round : arrondi identique à l'ancien format
+        columns = {
+            "date": df["date"].tolist(),
+            "time": df["time"].tolist(),
+            "close": [round(close, 2) for close in df["Close"].astype(float).tolist()],
+            "volume": df["Volume"].astype("int64").tolist(),
+            "change_pct": df["change_pct"].astype(float).tolist(),
+        }
+
+        if format == "columnar":
+            data = columns
+        else:
+            data = [
+                {"date": d, "time": t, "close": c, "volume": v, "change_pct": p}
+                for d, t, c, v, p in zip(*columns.values())
+            ]
+        rows(returned=len(df))
+
     return {
         "ticker": ticker,
         "name": name,
-        "data": [
-            {
-                "date": row["date"],
-                "time": row["time"],
-                "close": round(row["Close"], 2),
-                "volume": int(row["Volume"]),
-                "change_pct": float(row["change_pct"]),
-            }
-            for _, row in df.iterrows()
-        ],
+        "data": data,
     }
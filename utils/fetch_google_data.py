@@ -6,45 +6,46 @@ from datetime import datetime, timedelta
 from fastapi import FastAPI, Query
 from fastapi.responses import JSONResponse
 
+from finance_api.utils.sentiment_store import CLOCKS, get_source
+from finance_api.utils.instrumentation import rows, span
 
-def filter_news_by_company(file_path: str, company_name: str, days_back: int):
+
+def filter_news_by_company(file_path: str, company_name: str, days_back: int, now: datetime = None):
     """
-    Load JSON news data and filter by company and period.
+    Load JSON news data and filter by company and period
+    (ending at `now`, naive UTC, default: current time).
     """
-    # Load the JSON file
-    with open(file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-
-    # Filter by company name (case-insensitive)
-    df = pd.DataFrame([item for item in data if item['company'].lower() == company_name.lower()])
-
-    if df.empty:
-        return {"error": f"No articles found for '{company_name}'."}
-
-    # Convert published_at to datetime and remove timezone
-    df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce').dt.tz_convert(None)
+    # Articles are parsed once and indexed by company (case-insensitive) and date
+    with span("filter_news_by_company.load"):
+        source = get_source(file_path, "google")
+        source.refresh()
 
     # Filter by date period
-    end_date = datetime.utcnow()  # naive UTC
+    end_date = now or CLOCKS["google"]()  # naive UTC
     start_date = end_date - timedelta(days=days_back)
-    df_filtered = df[(df['published_at'] >= start_date) & (df['published_at'] <= end_date)].copy()
+    with span("filter_news_by_company.filter"):
+        df_filtered = source.window(company_name.lower(), start_date, end_date)
+
+        if df_filtered is None:
+            return {"error": f"No articles found for '{company_name}'."}
+        df_filtered = df_filtered.copy()
+        rows(returned=len(df_filtered))
 
     if df_filtered.empty:
         return {"error": f"No articles for '{company_name}' in the last {days_back} days."}
 
-    # Ensure numeric fields are JSON-safe
-    df_filtered = df_filtered.replace([np.inf, -np.inf], np.nan)
-    df_filtered = df_filtered.where(pd.notnull(df_filtered), None)
+    with span("filter_news_by_company.records"):
+        # Convert datetime to string for JSON
+        df_filtered['published_at'] = df_filtered['published_at'].astype(str)
 
-    # Convert datetime to string for JSON
-    df_filtered['published_at'] = df_filtered['published_at'].astype(str)
+        # Prepare result
+        result = {
+            "company": company_name,
+            "days_back": days_back,
+            "num_articles": len(df_filtered),
+            "articles": df_filtered.to_dict(orient='records')
+        }
 
-    # Prepare result
-    result = {
-        "company": company_name,
-        "days_back": days_back,
-        "num_articles": len(df_filtered),
-        "articles": df_filtered.to_dict(orient='records')
-    }
+    # NaN/inf, numpy scalars... are made JSON-safe by SafeJSONResponse
+    return result
 
-    return json.loads(json.dumps(result, default=str))
@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
 import pandas as pd
 
+from finance_api.utils.sentiment_store import CLOCKS, get_source
+from finance_api.utils.instrumentation import rows, span
+
 csv_path = ""
 
-def filter_sentiments(csv_path: str, ticker: str, period: str):
+def filter_sentiments(csv_path: str, ticker: str, period: str, now: datetime = None):
     """
     Filtre les lignes d'un CSV selon le ticker et la période.
     
@@ -11,30 +14,25 @@ def filter_sentiments(csv_path: str, ticker: str, period: str):
         csv_path (str): Chemin du fichier CSV.
         ticker (str): Nom ou symbole de l'entreprise (ex: 'AAPL').
         period (str): Durée, ex: '7j' ou '30j'.
+        now (datetime): Fin de la période (heure locale), maintenant par défaut.
     
     Returns:
         pd.DataFrame: DataFrame filtrée.
     """
-    # Lire le CSV
-    df = pd.read_csv(csv_path)
-    
-    # Nettoyer le nom des colonnes (au cas où)
-    df.columns = df.columns.str.strip()
-
-    # Convertir les dates au format datetime
-    df["PublishedAt"] = pd.to_datetime(df["PublishedAt"], utc=True).dt.tz_localize(None)
-    
     # Calculer la date de début selon la période
     days = int(period.replace("j", ""))  # ex: '7j' -> 7
-    now = datetime.now()
+    now = now or CLOCKS["news"]()
     start_date = now - timedelta(days=days)
 
 
-    # Filtrer par ticker et période
-    filtered = df[
-        (df["Company"].str.upper() == ticker.upper())
-        & (df["PublishedAt"] >= start_date)
-        & (df["PublishedAt"] <= now)
-    ]
+    # Filtrer par ticker et période (CSV chargé une seule fois, index par entreprise et date)
+    with span("filter_sentiments.load"):
+        source = get_source(csv_path, "news")
+        source.refresh()
+    with span("filter_sentiments.filter"):
+        filtered = source.window(ticker.upper(), start_date, now)
+        if filtered is None:
+            return pd.DataFrame()
+        rows(returned=len(filtered))
 
     return filtered
@@ -5,60 +5,63 @@ import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
+from finance_api.utils.sentiment_store import CLOCKS, get_source
+from finance_api.utils.instrumentation import rows, span
+
 def load_all_companies_json(file_path):
     """Load the JSON file containing all companies."""
     with open(file_path, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def filter_and_analyze_posts(file_path, company_name, days_back):
+def filter_and_analyze_posts(file_path, company_name, days_back, now=None):
     """
     Filter posts for a specific company and period, 
     and compute sentiment statistics.
+    The period ends at `now` (naive UTC, default: current time).
     """
-    data = load_all_companies_json(file_path)
-
-    # Find the company in the JSON
-    company_data = next((item for item in data if item['company'].lower() == company_name.lower()), None)
-    if not company_data:
-        return {"error": f"Aucun JSON trouvé pour '{company_name}'"}
-
-    df = pd.DataFrame(company_data['posts'])
-
-    # Convert date to datetime
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    with span("filter_and_analyze_posts.load"):
+        source = get_source(file_path, "reddit")
+        source.refresh()
 
-    # Filter by period
-    end_date = datetime.utcnow()
+    # Filter by period (posts are parsed once and indexed by company and date)
+    end_date = now or CLOCKS["reddit"]()
     start_date = end_date - timedelta(days=days_back)
-    df_filtered = df[(df['date'] >= start_date) & (df['date'] <= end_date)].copy()
+    with span("filter_and_analyze_posts.filter"):
+        df_filtered = source.window(company_name.lower(), start_date, end_date)
+        if df_filtered is None:
+            return {"error": f"Aucun JSON trouvé pour '{company_name}'"}
+        df_filtered = df_filtered.copy()
+        rows(returned=len(df_filtered))
 
     if df_filtered.empty:
         return {"error": f"Aucun post trouvé pour '{company_name}' dans les {days_back} derniers jours."}
 
-    # Ensure sentiment is numeric
-    df_filtered['sentiment_numeric'] = df_filtered['sentiment'].map(lambda x: float(x) if pd.notnull(x) else None)
+    with span("filter_and_analyze_posts.sanitize"):
+        # Ensure sentiment is numeric
+        df_filtered['sentiment_numeric'] = df_filtered['sentiment'].map(lambda x: float(x) if pd.notnull(x) else None)
 
-    # Replace NaN/inf with None
-    df_filtered = df_filtered.replace([np.inf, -np.inf], np.nan)
-    df_filtered = df_filtered.where(pd.notnull(df_filtered), None)
+        # inf is not a usable sentiment: treat it as missing (NaN is encoded as null)
+        df_filtered = df_filtered.replace([np.inf, -np.inf], np.nan)
 
-    # Convert date back to string for JSON
-    df_filtered['date'] = df_filtered['date'].astype(str)
+        # Convert date back to string for JSON
+        df_filtered['date'] = df_filtered['date'].astype(str)
 
-    mean_sentiment = df_filtered['sentiment_numeric'].mean()
-    if mean_sentiment is not None and (np.isnan(mean_sentiment) or np.isinf(mean_sentiment)):
-        mean_sentiment = None
+    with span("filter_and_analyze_posts.aggregate"):
+        mean_sentiment = df_filtered['sentiment_numeric'].mean()
+        if mean_sentiment is not None and (np.isnan(mean_sentiment) or np.isinf(mean_sentiment)):
+            mean_sentiment = None
 
-    sentiment_counts = df_filtered['sentiment'].value_counts().to_dict()
+        sentiment_counts = df_filtered['sentiment'].value_counts().to_dict()
 
-    result = {
-        "company": company_name,
-        "days_back": days_back,
-        "num_posts": len(df_filtered),
-        "mean_sentiment": mean_sentiment,
-        "sentiment_counts": sentiment_counts,
-        "posts": df_filtered.to_dict(orient='records')
-    }
+    with span("filter_and_analyze_posts.records"):
+        result = {
+            "company": company_name,
+            "days_back": days_back,
+            "num_posts": len(df_filtered),
+            "mean_sentiment": mean_sentiment,
+            "sentiment_counts": sentiment_counts,
+            "posts": df_filtered.to_dict(orient='records')
+        }
 
-    # Make everything JSON-safe
-    return json.loads(json.dumps(result, default=str))
\ No newline at end of file
+    # NaN, numpy scalars... are made JSON-safe by SafeJSONResponse
+    return result
@@ -0,0 +1,255 @@
+# finance_api/utils/http_cache.py
+"""
+Conditional requests and compressed, cached response bodies keyed on the
+version of the data a response is built from.
+
+    @app.get("/get_reddit_sentiments")
+    @conditional(reddit_version)
+    @offload("io")
+    def get_reddit_sentiments(company_name: str = Query(...), ...):
+        ...
+
+`version(**params)` receives the handler's parameters and returns
+(token, last_modified) without computing the response: a file signature and
+the row range of a time window, the freshness of a price cache entry... or
+None when it cannot tell, in which case the request is served as before.
+
+- ETag: hash of the handler, its normalized parameters and the token;
+  Last-Modified: `last_modified` (epoch seconds).
+- If-None-Match (or, without it, If-Modified-Since) matching: 304 with no
+  computation at all.
+- Otherwise the body is looked up by (ETag, encoding) in an LRU of encoded
+  bodies (BODY_CACHE_BYTES, default 64 MB); on a miss the handler runs and
+  a 200 body of at least COMPRESS_MIN_BYTES is compressed per
+  Accept-Encoding (br when brotli is installed, gzip) before being stored.
+
+Version functions run on the "io" executor (a first call may load the file).
+
+A handler whose rows depend on the current time (a window of the last N
+days) is decorated with `conditional(version, clock=...)`: the time is read
+once per request, to the second, and passed as `now` to both the version
+function and the handler, so the validators describe the very window the
+body is built from. `now` is not a query parameter.
+"""
+import os
+import gzip
+import asyncio
+import hashlib
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from finance_api.utils.executors import Saturated, get_executor, saturated_response
+from finance_api.utils.instrumentation import cache_lookup, span
+from finance_api.utils.serialization import SafeJSONResponse
+from finance_api.utils.sentiment_store import get_source
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+COMPRESS_MIN_BYTES = int(os.environ.get("COMPRESS_MIN_BYTES", 1024))
+BODY_CACHE_BYTES = int(os.environ.get("BODY_CACHE_BYTES", 64 * 1024 * 1024))
+GZIP_LEVEL = 6
+
+# Content-Encoding -> compressor, in order of preference
+ENCODERS = {"gzip": lambda body: gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)}
+if brotli is not None:
+    ENCODERS = {"br": lambda body: brotli.compress(body, quality=5), **ENCODERS}
+
+
+# -----------------------------
+# --- Version functions ---
+# -----------------------------
+
+def window_version(file_path: str, kind: str, company_key: str, start, end):
+    """
+    Validators of a response built from the rows of an indexed source in
+    [start, end]: the file version and the window's row range, which also
+    changes as the window slides over rows without the file changing.
+    """
+    state = get_source(file_path, kind).window_state(company_key, start, end)
+    if state is None:
+        return None
+    signature, lo, hi, changed_at = state
+    last_modified = signature[0] / 1e9
+    if changed_at is not None:
+        last_modified = max(last_modified, changed_at.tz_localize("UTC").timestamp())
+    return (signature, lo, hi), last_modified
+
+
+# -----------------------------
+# --- Encoded bodies ---
+# -----------------------------
+
+class BodyCache:
+    """LRU of encoded bodies by (ETag, encoding), bounded in bytes."""
+
+    def __init__(self, max_bytes: int = BODY_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._bodies = OrderedDict()  # (etag, encoding) -> (body, content encoding)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._bodies.get(key)
+            if entry is not None:
+                self._bodies.move_to_end(key)
+        cache_lookup("http_body", entry is not None)
+        return entry
+
+    def put(self, key, body: bytes, encoding: str):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._bodies.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous[0])
+            self._bodies[key] = (body, encoding)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, (evicted, _) = self._bodies.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._bodies.clear()
+            self.size = 0
+
+
+_BODIES = BodyCache()
+
+
+def get_body_cache() -> BodyCache:
+    """Process-wide cache of encoded response bodies."""
+    return _BODIES
+
+
+def accepted_encoding(accept_encoding: str) -> str:
+    """Preferred encoding of ENCODERS the client accepts (q > 0), else "identity"."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    for encoding in ENCODERS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+def _encode(body: bytes, encoding: str):
+    with span("http_cache.compress"):
+        return ENCODERS[encoding](body)
+
+
+# -----------------------------
+# --- Validators ---
+# -----------------------------
+
+def make_etag(handler: str, params: dict, token) -> str:
+    digest = hashlib.sha1(repr((handler, sorted(params.items()), token)).encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def not_modified(request: Request, etag: str, last_modified) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            # Tags sent back carry the encoding suffix of the body they came with
+            if tag == "*" or tag.strip('"').split("-")[0] == etag:
+                return True
+        return False
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def conditional(version, clock=None):
+    """
+    Decorator of an (offloaded) FastAPI handler adding ETag / Last-Modified,
+    304 answers and compressed bodies cached by data version. With `clock`
+    (e.g. datetime.utcnow), version and handler get the same `now`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def handler(request: Request, **params):
+            kwargs = params
+            if clock is not None:
+                # Second resolution: identical concurrent requests still coalesce
+                kwargs = {**params, "now": clock().replace(microsecond=0)}
+            try:
+                validators = await asyncio.wrap_future(
+                    get_executor("io").submit(functools.partial(version, **kwargs))
+                )
+            except Saturated:
+                return saturated_response("io")
+            except Exception:
+                validators = None  # the handler reports the error, if any
+            if validators is None:
+                return await func(**kwargs)
+
+            token, last_modified = validators
+            etag = make_etag(func.__name__, params, token)
+            headers = {"Vary": "Accept-Encoding", "ETag": f'"{etag}"'}
+            if last_modified is not None:
+                headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+            if not_modified(request, etag, last_modified):
+                return Response(status_code=304, headers=headers)
+
+            encoding = accepted_encoding(request.headers.get("accept-encoding"))
+            entry = _BODIES.get((etag, encoding))
+            if entry is None:
+                entry = _BODIES.get((etag, "identity")) if encoding != "identity" else None
+                if entry is None:
+                    response = await func(**kwargs)
+                    if not isinstance(response, Response):
+                        response = SafeJSONResponse(response)
+                    if response.status_code != 200:
+                        return response
+                    entry = (response.body, "identity")
+                    _BODIES.put((etag, "identity"), *entry)
+                if encoding != "identity" and len(entry[0]) >= COMPRESS_MIN_BYTES:
+                    try:
+                        body = await asyncio.wrap_future(get_executor("cpu").submit(_encode, entry[0], encoding))
+                        entry = (body, encoding)
+                    except Saturated:
+                        pass  # served uncompressed rather than shed
+                _BODIES.put((etag, encoding), *entry)
+
+            body, content_encoding = entry
+            if content_encoding != "identity":
+                headers["Content-Encoding"] = content_encoding
+                headers["ETag"] = f'"{etag}-{content_encoding}"'
+            return Response(body, media_type=SafeJSONResponse.media_type, headers=headers)
+
+        # FastAPI reads the handler's parameters, plus the request
+        signature = inspect.signature(func)
+        handler.__signature__ = signature.replace(parameters=[
+            inspect.Parameter("request", inspect.Parameter.POSITIONAL_OR_KEYWORD, annotation=Request),
+            *(p for name, p in signature.parameters.items() if clock is None or name != "now"),
+        ])
+        return handler
+    return decorator
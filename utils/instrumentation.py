@@ -0,0 +1,248 @@
+# finance_api/utils/instrumentation.py
+"""
+Lightweight timing instrumentation, exposed in Prometheus text format.
+
+    with span("filter_sentiments.load"):     # duration of a named stage
+        ...
+    rows(scanned=1200, returned=35)          # rows of the current stage
+    count(CACHE_REQUESTS, cache="price", result="hit")
+
+TimingMiddleware times every request by route (the route template, so that
+/stocks?ticker=... is one series), counts requests by status and response
+bytes. Everything is aggregated in process into counters and fixed-bucket
+histograms; `render()` returns the Prometheus exposition served at /metrics.
+
+INSTRUMENTATION_ENABLED=0 turns it off: spans are a shared no-op context
+manager and the other calls return at once.
+"""
+import os
+import time
+import bisect
+import threading
+import contextlib
+import contextvars
+
+
+INSTRUMENTATION_ENABLED = os.environ.get("INSTRUMENTATION_ENABLED", "1") == "1"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the latency histograms
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = "finance_api_requests_total"
+REQUEST_DURATION = "finance_api_request_duration_seconds"
+RESPONSE_BYTES = "finance_api_response_bytes_total"
+STAGE_DURATION = "finance_api_stage_duration_seconds"
+ROWS_SCANNED = "finance_api_rows_scanned_total"
+ROWS_RETURNED = "finance_api_rows_returned_total"
+CACHE_REQUESTS = "finance_api_cache_requests_total"
+COALESCED_REQUESTS = "finance_api_coalesced_requests_total"
+SHED_REQUESTS = "finance_api_shed_requests_total"
+EXECUTOR_WAIT = "finance_api_executor_wait_seconds"
+
+# name -> (type, help), in exposition order
+METRICS = {
+    REQUESTS: ("counter", "Requests served, by route, method and status."),
+    REQUEST_DURATION: ("histogram", "Time to serve a request, by route."),
+    RESPONSE_BYTES: ("counter", "Response body bytes sent, by route."),
+    STAGE_DURATION: ("histogram", "Time spent in a named stage of a request."),
+    ROWS_SCANNED: ("counter", "Rows read by a stage before filtering."),
+    ROWS_RETURNED: ("counter", "Rows a stage kept."),
+    CACHE_REQUESTS: ("counter", "Cache lookups, by cache and result (hit or miss)."),
+    COALESCED_REQUESTS: ("counter", "Requests that shared an identical in-flight computation, by handler."),
+    SHED_REQUESTS: ("counter", "Requests answered 503 because their executor was saturated."),
+    EXECUTOR_WAIT: ("histogram", "Time a task waited in an executor queue before running."),
+}
+
+_STAGE = contextvars.ContextVar("stage", default=None)
+_NOOP = contextlib.nullcontext()
+
+
+# -----------------------------
+# --- Registry ---
+# -----------------------------
+
+class Registry:
+    """Counters and histograms keyed by (metric name, label pairs)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value=1, **labels):
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, list(values)) for key, values in self._histograms.items())
+
+        lines = []
+        for name, (kind, description) in METRICS.items():
+            if kind == "counter":
+                samples = [(labels, value) for (metric, labels), value in counters if metric == name]
+            else:
+                samples = [(labels, values) for (metric, labels), values in histograms if metric == name]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                    continue
+                cumulative = 0
+                for bound, n in zip(self.buckets + (float("inf"),), value[:-1]):
+                    cumulative += n
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(value[-1])}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+_REGISTRY = Registry()
+
+
+def get_registry() -> Registry:
+    """Process-wide registry rendered at /metrics."""
+    return _REGISTRY
+
+
+def set_enabled(enabled: bool):
+    """Turn the instrumentation on or off at runtime."""
+    global INSTRUMENTATION_ENABLED
+    INSTRUMENTATION_ENABLED = enabled
+
+
+def render() -> str:
+    if not INSTRUMENTATION_ENABLED:
+        return "# instrumentation disabled (INSTRUMENTATION_ENABLED=0)\n"
+    return _REGISTRY.render()
+
+
+# -----------------------------
+# --- Recording ---
+# -----------------------------
+
+class _Span:
+    __slots__ = ("name", "start", "token")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.token = _STAGE.set(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _REGISTRY.observe(STAGE_DURATION, time.perf_counter() - self.start, stage=self.name)
+        _STAGE.reset(self.token)
+        return False
+
+
+def span(name: str):
+    """Context manager recording the duration of stage `name` (rows() calls inside are attributed to it)."""
+    if not INSTRUMENTATION_ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+def rows(scanned: int = None, returned: int = None):
+    """Add rows scanned / returned to the current stage."""
+    if not INSTRUMENTATION_ENABLED:
+        return
+    stage = _STAGE.get() or "none"
+    if scanned is not None:
+        _REGISTRY.inc(ROWS_SCANNED, scanned, stage=stage)
+    if returned is not None:
+        _REGISTRY.inc(ROWS_RETURNED, returned, stage=stage)
+
+
+def count(name: str, value=1, **labels):
+    if INSTRUMENTATION_ENABLED:
+        _REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    if INSTRUMENTATION_ENABLED:
+        _REGISTRY.observe(name, value, **labels)
+
+
+def cache_lookup(cache: str, hit: bool):
+    if INSTRUMENTATION_ENABLED:
+        _REGISTRY.inc(CACHE_REQUESTS, cache=cache, result="hit" if hit else "miss")
+
+
+# -----------------------------
+# --- Middleware ---
+# -----------------------------
+
+class TimingMiddleware:
+    """ASGI middleware: duration, status and body bytes of every HTTP request, by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not INSTRUMENTATION_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        state = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            _REGISTRY.observe(REQUEST_DURATION, time.perf_counter() - start, route=path)
+            _REGISTRY.inc(REQUESTS, route=path, method=scope["method"], status=str(state["status"]))
+            _REGISTRY.inc(RESPONSE_BYTES, state["bytes"], route=path)
@@ -0,0 +1,400 @@
+# finance_api/utils/json_stream.py
+"""
+Streaming readers for the JSON files of data/.
+
+The file is read in chunks and walked incrementally: each record (a price
+bar, a day of sentiment, a post, an article) is decoded on its own and its
+fields appended to typed column arrays (int64 / float64, text interned), so
+the whole document is never held as Python dicts and lists. Subtrees that are
+not requested (e.g. the bars of other tickers) are skipped by scanning
+brackets and strings, without decoding them.
+
+    read_stocks(path, tickers=None)     stocks.json   -> one row per bar
+    read_compact(path, tickers=None)    sentiment_compact.json -> one row per day
+    read_reddit(path, companies=None)   reddit_data.json -> one row per post
+    read_records(path)                  list of objects -> one row per object
+
+Each returns (DataFrame, meta) with the same table as snapshot.read_text.
+"""
+import re
+import json
+from array import array
+import numpy as np
+import pandas as pd
+
+
+CHUNK_SIZE = 1 << 20
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+# What may follow a complete value
+_DELIMITERS = frozenset(",:]} \t\n\r")
+
+# Skipping: everything up to the next bracket that opens a nested container
+# or closes the current one (strings and flat objects/arrays are consumed in
+# one match). Unrolled loops, so a failed match never backtracks.
+_STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_PLAIN = r'[^\[\]{}"]*'
+_FLAT = rf'\{{{_PLAIN}(?:{_STRING}{_PLAIN})*\}}|\[{_PLAIN}(?:{_STRING}{_PLAIN})*\]'
+_SKIPPABLE = re.compile(rf'{_PLAIN}(?:(?:{_STRING}|{_FLAT}){_PLAIN})*')
+
+# Short repeated strings (dates, times, labels) share one object
+_INTERN_MAX_LENGTH = 32
+
+
+# -----------------------------
+# --- Incremental reader ---
+# -----------------------------
+
+class JsonReader:
+    """Pull parser over a text file: peek/expect tokens, decode or skip values."""
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._mark = None  # start of the value raw() is reading, kept across chunks
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was consumed. False at end of file."""
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        keep = self.pos if self._mark is None else self._mark
+        self.buf = self.buf[keep:] + data
+        self.pos -= keep
+        if self._mark is not None:
+            self._mark = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character ('' at end of file), not consumed."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' at offset {self.pos}, found '{found}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next value (meant for small values: records, keys, scalars)."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A value is complete only if a delimiter follows it in the buffer: a
+            # number cut by the chunk ("101." | "25", "1e" | "-5") decodes to a prefix
+            if (end == len(self.buf) or self.buf[end] not in _DELIMITERS) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+    def skip(self):
+        """Consume the next value without decoding it."""
+        if self.peek() not in "[{":
+            self.value()
+            return
+        self.pos += 1
+        depth = 1
+        while True:
+            self.pos = _SKIPPABLE.match(self.buf, self.pos).end()
+            char = self.buf[self.pos] if self.pos < len(self.buf) else '"'
+            if char == '"':
+                # End of chunk, or a string cut by it
+                if not self._fill():
+                    raise ValueError("Unexpected end of JSON")
+            elif char in "[{":
+                depth += 1
+                self.pos += 1
+            else:
+                depth -= 1
+                self.pos += 1
+                if depth == 0:
+                    return
+
+    def raw(self) -> str:
+        """Consume the next value and return its JSON text, without decoding it."""
+        self.peek()
+        self._mark = self.pos
+        try:
+            self.skip()
+            return self.buf[self._mark:self.pos]
+        finally:
+            self._mark = None
+
+    def iter_object(self):
+        """Yield the keys of an object; the caller consumes each value (value() or skip())."""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("}")
+                return
+
+    def iter_array(self):
+        """Yield once per element of an array; the caller consumes each element."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.peek() == ",":
+                self.pos += 1
+            else:
+                self.expect("]")
+                return
+
+
+# -----------------------------
+# --- Column builders ---
+# -----------------------------
+
+class _Column:
+    """
+    Values of one field: int64 until a float or null shows up (then float64),
+    a list for text and anything else. Missing fields are null.
+    """
+    __slots__ = ("kind", "data", "pending", "interned")
+
+    def __init__(self):
+        self.kind = None
+        self.data = None
+        self.pending = 0  # leading nulls before the kind is known
+        self.interned = {}
+
+    def _promote(self, kind: str):
+        if kind == "d":
+            self.data = array("d", self.data)
+        else:
+            self.data = list(self.data)
+        self.kind = kind
+
+    def _start(self, kind: str):
+        self.kind = kind
+        self.data = array(kind) if kind in "qd" else []
+        if self.pending:
+            if kind == "q":
+                self._promote("d")
+            self.extend_null(self.pending)
+            self.pending = 0
+
+    def extend_null(self, n: int):
+        if self.kind is None:
+            self.pending += n
+        elif self.kind == "q":
+            self._promote("d")
+            self.data.extend([np.nan] * n)
+        elif self.kind == "d":
+            self.data.extend([np.nan] * n)
+        else:
+            self.data.extend([None] * n)
+
+    def append(self, value):
+        if value is None:
+            self.extend_null(1)
+            return
+        if type(value) is int:
+            kind = "q"
+        elif type(value) is float:
+            kind = "d"
+        else:
+            kind = "o"
+            if type(value) is str and len(value) <= _INTERN_MAX_LENGTH:
+                value = self.interned.setdefault(value, value)
+
+        if self.kind is None:
+            self._start(kind)
+        elif kind != self.kind and self.kind != "o":
+            if kind == "o":
+                self._promote("o")
+            elif self.kind == "q":  # float into an int column
+                self._promote("d")
+            else:  # int into a float column
+                value = float(value)
+        self.data.append(value)
+
+    def __len__(self):
+        return self.pending if self.kind is None else len(self.data)
+
+    def to_array(self):
+        if self.kind == "q":
+            return np.frombuffer(self.data, dtype=np.int64)
+        if self.kind == "d":
+            return np.frombuffer(self.data, dtype=np.float64)
+        return [None] * self.pending if self.kind is None else self.data
+
+
+class ColumnBuilder:
+    """Accumulates records (dicts) into columns, in order of first appearance of each field."""
+
+    def __init__(self):
+        self.columns = {}
+        self.rows = 0
+
+    def append(self, record: dict):
+        columns = self.columns
+        if record.keys() == columns.keys():
+            for key, value in record.items():
+                columns[key].append(value)
+        else:
+            for key, value in record.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = _Column()
+                    column.extend_null(self.rows)
+                column.append(value)
+            for column in columns.values():
+                if len(column) < self.rows + 1:
+                    column.extend_null(self.rows + 1 - len(column))
+        self.rows += 1
+
+    def to_dict(self) -> dict:
+        return {key: column.to_array() for key, column in self.columns.items()}
+
+
+def _frame(leading: dict, builder: ColumnBuilder) -> pd.DataFrame:
+    """DataFrame of the leading (repeated) columns followed by the record columns."""
+    data = {key: np.asarray(values, dtype=object) for key, values in leading.items()}
+    data.update(builder.to_dict())
+    if not data:
+        return pd.DataFrame()
+    # Repeated columns get the same inference as in a DataFrame built from records
+    return pd.DataFrame(data, index=pd.RangeIndex(builder.rows)).infer_objects()
+
+
+def _repeat(values: list, counts: list):
+    return np.repeat(np.array(values, dtype=object), counts) if values else []
+
+
+# -----------------------------
+# --- Layouts ---
+# -----------------------------
+
+def read_stocks(path: str, tickers=None, chunk_size: int = CHUNK_SIZE):
+    """stocks.json: {"updated_at", "tickers": {T: {"name", "data": [bar, ...]}}}."""
+    wanted = None if tickers is None else set(tickers)
+    builder, names, counts, selected, updated_at = ColumnBuilder(), {}, [], [], None
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JsonReader(f, chunk_size)
+        for key in reader.iter_object():
+            if key == "updated_at":
+                updated_at = reader.value()
+            elif key == "tickers":
+                for ticker in reader.iter_object():
+                    names[ticker] = None
+                    before = builder.rows
+                    for field in reader.iter_object():
+                        if field == "name":
+                            names[ticker] = reader.value()
+                        elif field == "data" and (wanted is None or ticker in wanted):
+                            for _ in reader.iter_array():
+                                builder.append(reader.value())
+                        else:
+                            reader.skip()
+                    if builder.rows > before:
+                        selected.append(ticker)
+                        counts.append(builder.rows - before)
+            else:
+                reader.skip()
+    df = _frame({"ticker": _repeat(selected, counts)}, builder)
+    return df, {"updated_at": updated_at, "names": names}
+
+
+def read_compact(path: str, tickers=None, chunk_size: int = CHUNK_SIZE):
+    """sentiment_compact.json: {"tickers": {T: name}, "data": {T: {"global": [...], "by_source": {S: [...]}}}}."""
+    wanted = None if tickers is None else set(tickers)
+    builder, leading, meta = ColumnBuilder(), {"ticker": [], "scope": [], "source": []}, {"tickers": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JsonReader(f, chunk_size)
+        for key in reader.iter_object():
+            if key == "tickers":
+                meta["tickers"] = reader.value()
+            elif key == "data":
+                for ticker in reader.iter_object():
+                    if wanted is not None and ticker not in wanted:
+                        reader.skip()
+                        continue
+                    for scope in reader.iter_object():
+                        if scope == "global":
+                            _read_days(reader, builder, leading, ticker, None)
+                        elif scope == "by_source":
+                            for source in reader.iter_object():
+                                _read_days(reader, builder, leading, ticker, source)
+                        else:
+                            reader.skip()
+            else:
+                reader.skip()
+    return _frame(leading, builder), meta
+
+
+def _read_days(reader: JsonReader, builder: ColumnBuilder, leading: dict, ticker: str, source):
+    for _ in reader.iter_array():
+        builder.append(reader.value())
+        leading["ticker"].append(ticker)
+        leading["scope"].append("global" if source is None else "by_source")
+        leading["source"].append(source)
+
+
+def read_reddit(path: str, companies=None, chunk_size: int = CHUNK_SIZE):
+    """reddit_data.json: [{"company", "posts": [post, ...]}, ...]; companies match case-insensitively."""
+    wanted = None if companies is None else {c.lower() for c in companies}
+    builder, entries, names, counts, meta = ColumnBuilder(), [], [], [], {"companies": []}
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JsonReader(f, chunk_size)
+        for entry, _ in enumerate(reader.iter_array()):
+            company, pending = None, None
+            before = builder.rows
+            for field in reader.iter_object():
+                if field == "company":
+                    company = reader.value()
+                elif field == "posts":
+                    if wanted is not None and company is None:
+                        # The company may come after its posts: keep their text, decoded only if wanted
+                        pending = reader.raw()
+                    elif wanted is None or company.lower() in wanted:
+                        for _ in reader.iter_array():
+                            builder.append(reader.value())
+                    else:
+                        reader.skip()
+                else:
+                    reader.skip()
+            meta["companies"].append(company)
+            if pending is not None and (company or "").lower() in wanted:
+                for post in json.loads(pending):
+                    builder.append(post)
+            if builder.rows > before:
+                entries.append(entry)
+                names.append(company)
+                counts.append(builder.rows - before)
+    return _frame({"entry": _repeat(entries, counts), "company": _repeat(names, counts)}, builder), meta
+
+
+def read_records(path: str, chunk_size: int = CHUNK_SIZE):
+    """A JSON array of flat objects (e.g. stock_news_google.json)."""
+    builder = ColumnBuilder()
+    with open(path, "r", encoding="utf-8") as f:
+        reader = JsonReader(f, chunk_size)
+        for _ in reader.iter_array():
+            builder.append(reader.value())
+    return _frame({}, builder), {}
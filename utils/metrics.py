@@ -2,73 +2,56 @@ import pandas as pd
 import json
 import numpy as np
 
+from finance_api.utils.snapshot import load_frame
+from finance_api.utils.rolling_stats import expanding_corr
+
 # -----------------------------
-# --- Load JSON files ---
+# --- Load data files (columnar snapshot when available) ---
 # -----------------------------
-with open(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\stocks.json", "r", encoding="utf-8") as f:
-    stocks_data = json.load(f)
+stocks_frame, stocks_meta = load_frame(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\stocks.json")
+stocks_by_ticker = {ticker: bars for ticker, bars in stocks_frame.groupby('ticker', sort=False)}
 
-with open(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\sentiment_compact.json", "r", encoding="utf-8") as f:
-    sentiment_data = json.load(f)
+sentiment_frame, sentiment_meta = load_frame(r"C:\Users\user\Desktop\Fichiers_2\ENSIIE_DD\S5\backend\hackathon2025\finance_api\data\sentiment_compact.json")
+sentiment_by_ticker = {ticker: days for ticker, days in sentiment_frame.groupby('ticker', sort=False)}
 
 # -----------------------------
 # --- Helper functions ---
 # -----------------------------
-def compute_daily_stock(stock_entries):
-    df = pd.DataFrame(stock_entries)
-    df['date'] = pd.to_datetime(df['date'])
-    
-    daily_close = df.groupby('date')['close'].last().reset_index()
-    daily_close['daily_return'] = daily_close['close'].pct_change()
-    
-    daily_vol = df.groupby('date')['close'].std().reset_index().rename(columns={'close':'volatility'})
-    
-    daily_df = pd.merge(daily_close, daily_vol, on='date')
-    return daily_df
+def compute_daily_stock(stock_bars):
+    """Daily close, return and intraday volatility of every ticker at once."""
+    df = stock_bars[['ticker', 'date', 'close']].assign(date=pd.to_datetime(stock_bars['date']))
 
-def compute_daily_sentiment(sentiment_entries):
-    df = pd.DataFrame(sentiment_entries)
-    df['date'] = pd.to_datetime(df['date'])
-    df = df[['date', 'mean_sentiment']].sort_values('date').reset_index(drop=True)
-    return df
+    daily = df.groupby(['ticker', 'date'])['close'].agg(['last', 'std'])
+    daily.columns = ['close', 'volatility']
+    daily['daily_return'] = daily.groupby(level='ticker')['close'].pct_change()
+    return daily.reset_index()
 
-def safe_corr(x, y):
-    if len(x) < 2 or x.isnull().all() or y.isnull().all():
-        return np.nan
-    return np.corrcoef(x.fillna(0), y.fillna(0))[0,1]
+def compute_daily_sentiment(sentiment_days):
+    """Global daily mean sentiment of every ticker."""
+    df = sentiment_days.loc[sentiment_days['scope'] == 'global', ['ticker', 'date', 'mean_sentiment']]
+    df = df.assign(date=pd.to_datetime(df['date']))
+    return df.sort_values(['ticker', 'date'], kind='stable')
 
 # -----------------------------
 # --- Metrics calculation ---
 # -----------------------------
-metrics_all = {}
+# One panel for all tickers: (ticker, date) rows in date order within each ticker
+tickers = [t for t in sentiment_meta['tickers'] if t in stocks_by_ticker]
+stock_daily = compute_daily_stock(stocks_frame[stocks_frame['ticker'].isin(tickers)])
+sentiment_daily = compute_daily_sentiment(sentiment_frame)
+merged = pd.merge(stock_daily, sentiment_daily, on=['ticker', 'date'], how='inner')
+
+# --- Cumulative correlation of every ticker in one pass (running sums, O(n)) ---
+merged['cum_corr'] = expanding_corr(merged['daily_return'], merged['mean_sentiment'], groups=merged['ticker'])
 
-for ticker, company_name in sentiment_data['tickers'].items():
-    if ticker not in stocks_data['tickers']:
-        continue
-    
-    stock_daily = compute_daily_stock(stocks_data['tickers'][ticker]['data'])
-    sentiment_entries = sentiment_data['data'].get(ticker, {}).get('global', [])
-    sentiment_df = compute_daily_sentiment(sentiment_entries)
-    
-    if sentiment_df.empty or stock_daily.empty:
-        continue
-    
-    merged = pd.merge(stock_daily, sentiment_df, on='date', how='inner')
-    if merged.empty:
-        continue
-    
-    # --- Compute cumulative correlation only ---
-    cum_corrs = []
-    for i in range(2, len(merged)+1):
-        x = merged['daily_return'].iloc[:i]
-        y = merged['mean_sentiment'].iloc[:i]
-        cum_corrs.append(safe_corr(x, y))
-    merged['cum_corr'] = [np.nan] + cum_corrs  # first value NaN
-    
-    # --- Convert date to string for JSON ---
-    merged['date'] = merged['date'].dt.strftime('%Y-%m-%d')
-    
-    metrics_all[company_name] = merged[['date','daily_return','volatility','mean_sentiment','cum_corr']].to_dict(orient='records')
+# --- Convert date to string for JSON ---
+merged['date'] = merged['date'].dt.strftime('%Y-%m-%d')
+
+metrics_by_ticker = dict(tuple(merged.groupby('ticker', sort=False)))
+metrics_all = {}
+for ticker, company_name in sentiment_meta['tickers'].items():
+    if ticker in metrics_by_ticker:
+        metrics_all[company_name] = metrics_by_ticker[ticker][['date','daily_return','volatility','mean_sentiment','cum_corr']].to_dict(orient='records')
 
 # -----------------------------
 # --- Save metrics to JSON ---
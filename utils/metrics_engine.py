@@ -0,0 +1,187 @@
+# finance_api/utils/metrics_engine.py
+"""
+Correlation and volatility by (ticker, source, window), on demand.
+
+stocks.json and sentiment_compact.json are aligned once into a single panel
+of (ticker, scope, source, date) rows with the daily return, intraday
+volatility and mean sentiment. Every window is then read from the same
+grouped running sums (see rolling_stats), so adding a 30d or 90d window costs
+one lookup per series, not another pass over the data.
+
+Windows are "global" (all days) or "<N>d" (last N days with both prices and
+sentiment, as the former .tail(N) of metrics_bysource.py). Results are
+memoized per data version (mtime/size of both files) and window list.
+"""
+import os
+import re
+import threading
+import numpy as np
+import pandas as pd
+
+from finance_api.utils.snapshot import load_frame, source_signature
+from finance_api.utils.price_cache import STOCKS_PATH
+from finance_api.utils.rolling_stats import tail_corr, tail_mean
+
+
+SENTIMENT_PATH = os.path.join("finance_api", "data", "sentiment_compact.json")
+DEFAULT_WINDOWS = ("global", "7d", "15d")
+MAX_MEMOIZED = 32  # window lists kept per data version
+
+
+def parse_window(window: str):
+    """'global' -> None (all rows), '<N>d' -> N."""
+    if window == "global":
+        return None
+    match = re.fullmatch(r"(\d+)d", window)
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Fenêtre invalide : '{window}' (attendu 'global' ou '<N>d')")
+    return int(match.group(1))
+
+
+# -----------------------------
+# --- Panel ---
+# -----------------------------
+
+def compute_daily_stock(stocks_frame: pd.DataFrame) -> pd.DataFrame:
+    """(ticker, date) close, return and volatility (std of the day's closes)."""
+    df = stocks_frame[['ticker', 'date', 'close']].assign(date=pd.to_datetime(stocks_frame['date']))
+    daily = df.groupby(['ticker', 'date'])['close'].agg(['last', 'std'])
+    daily.columns = ['close', 'volatility']
+    daily['daily_return'] = daily.groupby(level='ticker')['close'].pct_change()
+    return daily.reset_index()
+
+
+def build_panel(stocks_frame: pd.DataFrame, sentiment_frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per (ticker, scope, source, date) present in both files, sorted so
+    that each series is contiguous and in date order. Global rows have source None.
+    """
+    sentiment = sentiment_frame[['ticker', 'scope', 'source', 'date', 'mean_sentiment']]
+    sentiment = sentiment.assign(
+        date=pd.to_datetime(sentiment['date']),
+        source=sentiment['source'].where(sentiment['scope'] != 'global', None),
+    )
+    panel = pd.merge(compute_daily_stock(stocks_frame), sentiment, on=['ticker', 'date'], how='inner')
+    panel = panel.sort_values(['ticker', 'scope', 'source', 'date'], kind='stable', na_position='first')
+    panel['series'] = panel['ticker'] + '|' + panel['scope'] + '|' + panel['source'].fillna('')
+    return panel.reset_index(drop=True)
+
+
+# -----------------------------
+# --- Engine ---
+# -----------------------------
+
+class MetricsEngine:
+    """
+    Args:
+        stocks_path (str): stocks.json
+        sentiment_path (str): sentiment_compact.json
+    """
+
+    def __init__(self, stocks_path: str = STOCKS_PATH, sentiment_path: str = SENTIMENT_PATH):
+        self.stocks_path = stocks_path
+        self.sentiment_path = sentiment_path
+        self._version = None
+        self._panel = None
+        self._tickers = {}
+        self._sources = {}
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def version(self) -> tuple:
+        """Data version: signatures of both source files."""
+        stocks, sentiment = source_signature(self.stocks_path), source_signature(self.sentiment_path)
+        return (stocks["mtime_ns"], stocks["size"], sentiment["mtime_ns"], sentiment["size"])
+
+    def _load(self, version: tuple):
+        stocks_frame, _ = load_frame(self.stocks_path)
+        sentiment_frame, sentiment_meta = load_frame(self.sentiment_path)
+
+        # Tickers as the script selected them: known, with prices and a global sentiment
+        has_global = set(sentiment_frame.loc[sentiment_frame['scope'] == 'global', 'ticker'])
+        has_stocks = set(stocks_frame['ticker'])
+        self._tickers = {
+            ticker: name for ticker, name in sentiment_meta['tickers'].items()
+            if ticker in has_stocks and ticker in has_global
+        }
+        # Sources of each ticker, in order of appearance
+        by_source = sentiment_frame[sentiment_frame['scope'] == 'by_source']
+        self._sources = {
+            ticker: list(dict.fromkeys(group['source']))
+            for ticker, group in by_source.groupby('ticker', sort=False)
+        }
+        self._panel = build_panel(stocks_frame[stocks_frame['ticker'].isin(list(self._tickers))], sentiment_frame)
+        self._results = {}
+        self._version = version
+
+    def compute(self, windows=DEFAULT_WINDOWS) -> dict:
+        """
+        {company name: {"correlation": {window: ...}, "volatility": {window: ...},
+                        "by_source": {source: {"corr_<window>": ..., "vol_<window>": ...}}}}
+
+        Same values as metrics_bysource.py for the windows global/7d/15d.
+        """
+        windows = tuple(windows)
+        sizes = [parse_window(w) for w in windows]
+        version = self.version()
+        with self._lock:
+            if version != self._version:
+                self._load(version)
+            if windows not in self._results:
+                if len(self._results) >= MAX_MEMOIZED:
+                    self._results.pop(next(iter(self._results)))
+                self._results[windows] = self._compute(windows, sizes)
+            return self._results[windows]
+
+    def _compute(self, windows, sizes) -> dict:
+        panel = self._panel
+        corr = tail_corr(panel['daily_return'], panel['mean_sentiment'], panel['series'], sizes)
+        # The whole-history volatility is always needed (fallback of short histories)
+        vol = tail_mean(panel['volatility'], panel['series'], list(dict.fromkeys(sizes + [None])))
+        length = panel.groupby('series', sort=False).size()
+
+        metrics_all = {}
+        for ticker, company_name in self._tickers.items():
+            series = f"{ticker}|global|"
+            n = length.get(series, 0)
+            # Global volatility falls back to 0.0, windows longer than the history to the global value
+            vol_global = _value(vol[None], series)
+            vol_global = 0.0 if np.isnan(vol_global) else vol_global
+            metrics_all[company_name] = {
+                "correlation": {w: _corr_or_zero(_value(corr[s], series)) for w, s in zip(windows, sizes)},
+                "volatility": {
+                    w: vol_global if s is None or n < s else _value(vol[s], series)
+                    for w, s in zip(windows, sizes)
+                },
+                "by_source": {},
+            }
+
+            for source in self._sources.get(ticker, []):
+                series = f"{ticker}|by_source|{source}"
+                if series not in length:
+                    values = dict.fromkeys([f"corr_{w}" for w in windows] + [f"vol_{w}" for w in windows], 0.0)
+                else:
+                    values = {f"corr_{w}": _corr_or_zero(_value(corr[s], series)) for w, s in zip(windows, sizes)}
+                    values.update({f"vol_{w}": _value(vol[s], series) for w, s in zip(windows, sizes)})
+                metrics_all[company_name]["by_source"][source] = values
+        return metrics_all
+
+
+def _value(values: pd.Series, series: str) -> float:
+    return float(values.get(series, np.nan))
+
+
+def _corr_or_zero(value: float) -> float:
+    """Correlation, or 0.0 if it cannot be computed (as safe_corr)."""
+    return 0.0 if np.isnan(value) else value
+
+
+_ENGINE = None
+
+
+def get_metrics_engine() -> MetricsEngine:
+    """Process-wide engine on the data/ files."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = MetricsEngine()
+    return _ENGINE
@@ -0,0 +1,186 @@
+# finance_api/utils/near_duplicates.py
+"""
+Near-duplicate detection of texts (syndicated stories under other URLs or
+slightly reworded titles) with shingling, MinHash and LSH banding.
+
+Each text becomes the set of its character k-grams (lower-cased, whitespace
+collapsed). A MinHash signature of `num_perm` values summarizes each set;
+signatures are cut into bands and texts sharing a band land in the same
+bucket, with a probability that rises steeply around the Jaccard threshold.
+Only texts of a same bucket are compared, so grouping n texts costs roughly
+O(n) instead of O(n²) comparisons.
+
+    labels = cluster_texts(texts, threshold=0.8)   # index of each text's representative
+    dedup_report(labels)                           # texts, clusters, dedup ratio
+
+`score_deduplicated` scores only one representative per cluster and copies
+its result to the other members.
+"""
+import os
+import re
+import numpy as np
+
+
+NEAR_DUPLICATE_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", 0.8))
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+
+# Shingle hash: polynomial of the code points (wrapping uint64 arithmetic)
+_BASE = np.uint64(1099511628211)
+_EMPTY = np.uint64(np.iinfo(np.uint64).max)
+_SPACES = re.compile(r"\s+")
+
+
+def shingles(text, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Sorted unique hashes of the character `size`-grams of a text
+    (lower-cased, whitespace collapsed); empty for non-strings.
+    """
+    if not isinstance(text, str):
+        return np.empty(0, dtype=np.uint64)
+    text = _SPACES.sub(" ", text.casefold()).strip()
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if not len(codes):
+        return codes
+    # A text shorter than a shingle is a single shingle
+    return np.unique(_polynomial(codes, min(size, len(codes))))
+
+
+def _polynomial(codes: np.ndarray, size: int) -> np.ndarray:
+    n = len(codes) - size + 1
+    hashes = np.zeros(n, dtype=np.uint64)
+    for j in range(size):
+        hashes = hashes * _BASE + codes[j:j + n]
+    return hashes
+
+
+def lsh_bands(threshold: float, num_perm: int = NUM_PERM, false_negative_weight: float = 0.9) -> tuple:
+    """
+    (bands, rows) with bands * rows = num_perm minimizing the weighted
+    probability of false positives (similarity below threshold, same bucket)
+    and false negatives (similarity above threshold, never in the same bucket).
+
+    Candidates are checked exactly afterwards, so missed pairs weigh more
+    than extra comparisons.
+    """
+    def probability(s, b, r):
+        return 1 - (1 - s ** r) ** b
+
+    below, above = np.linspace(0, threshold, 101), np.linspace(threshold, 1, 101)
+    candidates = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(candidates, key=lambda br: (
+        (1 - false_negative_weight) * probability(below, *br).mean() * threshold
+        + false_negative_weight * (1 - probability(above, *br)).mean() * (1 - threshold)
+    ))
+
+
+def minhash_signatures(shingle_sets, num_perm: int = NUM_PERM, seed: int = 1) -> np.ndarray:
+    """
+    (len(shingle_sets), num_perm) MinHash signatures of shingle hash arrays;
+    empty sets get a row of max values. Permutations are multiply-shift
+    hashes (a * x + b) >> 32 in wrapping uint64 arithmetic.
+    """
+    sizes = np.array([len(shingle_set) for shingle_set in shingle_sets], dtype=np.int64)
+    signatures = np.full((len(sizes), num_perm), _EMPTY, dtype=np.uint64)
+    if not sizes.sum():
+        return signatures
+
+    values = np.concatenate([shingle_set for shingle_set in shingle_sets if len(shingle_set)])
+    filled = sizes > 0
+    starts = np.r_[0, np.cumsum(sizes[filled])[:-1]]
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, size=num_perm, dtype=np.uint64, endpoint=True)
+    shift = np.uint64(32)
+    # A few permutations at a time bounds the temporary (block x shingles) matrix
+    block = max(1, (1 << 22) // len(values))
+    for first in range(0, num_perm, block):
+        permuted = (a[first:first + block, None] * values[None, :] + b[first:first + block, None]) >> shift
+        signatures[filled, first:first + block] = np.minimum.reduceat(permuted, starts, axis=1).T
+    return signatures
+
+
+def jaccard(a: np.ndarray, b: np.ndarray) -> float:
+    """Jaccard similarity of two sorted unique hash arrays."""
+    if not len(a) and not len(b):
+        return 0.0
+    common = len(np.intersect1d(a, b, assume_unique=True))
+    return common / (len(a) + len(b) - common)
+
+
+def cluster_texts(texts, threshold: float = NEAR_DUPLICATE_THRESHOLD, num_perm: int = NUM_PERM,
+                  shingle_size: int = SHINGLE_SIZE, seed: int = 1) -> np.ndarray:
+    """
+    Group near-identical texts.
+
+    Texts sharing an LSH bucket are candidates; a candidate joins a cluster
+    of the bucket if the Jaccard similarity of their shingles reaches the
+    threshold.
+
+    Args:
+        texts: sequence of strings (non-strings never match anything)
+        threshold (float): Jaccard similarity of shingles above which texts are duplicates
+    Returns:
+        np.ndarray: for each text, the index of its cluster's representative
+            (the cluster's first text in input order)
+    """
+    shingle_sets = [shingles(text, shingle_size) for text in texts]
+    signatures = minhash_signatures(shingle_sets, num_perm, seed)
+    n_bands, rows = lsh_bands(threshold, num_perm)
+
+    parent = list(range(len(shingle_sets)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    filled = [i for i, shingle_set in enumerate(shingle_sets) if len(shingle_set)]
+    for band in range(n_bands):
+        buckets = {}
+        for i in filled:
+            buckets.setdefault(signatures[i, band * rows:(band + 1) * rows].tobytes(), []).append(i)
+        for members in buckets.values():
+            # Each text is compared with one text per cluster already met in the bucket
+            seen = []
+            for i in members:
+                for j in seen:
+                    if find(i) == find(j) or jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                        root_i, root_j = find(i), find(j)
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+                        break
+                else:
+                    seen.append(i)
+
+    return np.array([find(i) for i in range(len(shingle_sets))], dtype=np.int64)
+
+
+def dedup_report(labels) -> dict:
+    """Texts, clusters, duplicates dropped and dedup ratio (share of texts that are duplicates)."""
+    labels = np.asarray(labels)
+    clusters = len(np.unique(labels))
+    return {
+        "texts": len(labels),
+        "clusters": clusters,
+        "duplicates": len(labels) - clusters,
+        "dedup_ratio": round((len(labels) - clusters) / len(labels), 4) if len(labels) else 0.0,
+    }
+
+
+def score_deduplicated(texts, score, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+    """
+    Score one representative per cluster of near-duplicates and copy its
+    result to the other texts of the cluster.
+
+    Args:
+        texts: sequence of strings
+        score: callable, iterable of texts -> iterable of results (e.g. sentiment.score_texts)
+    Returns:
+        (list of results in input order, dedup_report)
+    """
+    texts = list(texts)
+    labels = cluster_texts(texts, threshold)
+    representatives = np.unique(labels)
+    scored = dict(zip(representatives.tolist(), score([texts[i] for i in representatives])))
+    return [scored[label] for label in labels.tolist()], dedup_report(labels)
@@ -0,0 +1,193 @@
+# finance_api/utils/news_ingest.py
+"""
+Concurrent NewsAPI ingestion.
+
+All companies, and all pages of each company, are fetched concurrently over
+one pooled HTTP client, within a concurrency limit and a token-bucket rate
+limit. 429 and 5xx answers (and transport errors) are retried with
+exponential backoff. Articles are streamed to a JSON Lines file as pages
+arrive instead of being accumulated in memory.
+
+The API key comes from NEWSAPI_KEY (environment or .env file).
+"""
+import os
+import json
+import time
+import random
+import asyncio
+import httpx
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+PAGE_SIZE = 100
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average, bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int = None):
+        self.rate = rate
+        self.capacity = capacity or max(1, int(rate))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class JsonLinesWriter:
+    """Appends one JSON object per line; safe to share between tasks of one loop."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.count = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write_many(self, rows):
+        for row in rows:
+            self._file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self.count += len(rows)
+
+    def close(self):
+        self._file.close()
+
+
+def article_row(company: str, article: dict) -> dict:
+    """Same fields as the former news_api.py loop."""
+    return {
+        "Company": company,
+        "Title": article.get("title"),
+        "Summary": article.get("description"),
+        "URL": article.get("url"),
+        "PublishedAt": article.get("publishedAt"),
+    }
+
+
+class NewsIngester:
+    """
+    Args:
+        api_key (str): NewsAPI key (default: NEWSAPI_KEY)
+        base_url (str): endpoint, e.g. a local stub server in tests
+        concurrency (int): requests in flight at most
+        rate (float): requests per second (token bucket)
+        max_retries (int): retries of a request on 429/5xx/transport errors
+        backoff (float): first retry delay in seconds, doubled each retry
+        max_pages (int): pages fetched per company at most
+        timeout (float): per-request timeout in seconds
+    """
+
+    def __init__(self, api_key: str = None, base_url: str = NEWSAPI_URL, concurrency: int = 8,
+                 rate: float = 5.0, max_retries: int = 4, backoff: float = 0.5,
+                 max_pages: int = 5, timeout: float = 30.0):
+        self.api_key = api_key or os.environ.get("NEWSAPI_KEY")
+        if not self.api_key:
+            raise RuntimeError("NEWSAPI_KEY is not set")
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.stats = {"requests": 0, "retries": 0, "errors": 0, "articles": 0}
+
+    async def _get(self, client, params: dict):
+        """One page, retried with exponential backoff. Returns the JSON body or None."""
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+            async with self._semaphore:
+                self.stats["requests"] += 1
+                try:
+                    response = await client.get(self.base_url, params=params)
+                except httpx.TransportError:
+                    response = None
+
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                if response.status_code != 200:
+                    # e.g. 426 when the plan's result cap is reached: stop paginating
+                    self.stats["errors"] += 1
+                    return None
+                return response.json()
+
+            if attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            delay = self.backoff * 2 ** attempt * (1 + random.random() / 2)
+            if response is not None and response.headers.get("Retry-After", "").isdigit():
+                delay = max(delay, float(response.headers["Retry-After"]))
+            await asyncio.sleep(delay)
+
+        self.stats["errors"] += 1
+        return None
+
+    async def _company(self, client, writer: JsonLinesWriter, company: str, from_date: str, to_date: str):
+        params = {
+            "q": company,
+            "from": from_date,
+            "to": to_date,
+            "sortBy": "publishedAt",
+            "pageSize": PAGE_SIZE,
+            "language": "en",
+            "apiKey": self.api_key,
+        }
+
+        def write(data):
+            rows = [article_row(company, article) for article in (data or {}).get("articles", [])]
+            writer.write_many(rows)
+            self.stats["articles"] += len(rows)
+
+        first = await self._get(client, {**params, "page": 1})
+        if first is None:
+            return
+        write(first)
+
+        async def fetch(page):
+            write(await self._get(client, {**params, "page": page}))
+
+        # Remaining pages are known from totalResults: fetch them concurrently,
+        # each one written as soon as it arrives
+        n_pages = min(self.max_pages, -(-first.get("totalResults", 0) // PAGE_SIZE))
+        await asyncio.gather(*(fetch(page) for page in range(2, n_pages + 1)))
+
+    async def ingest(self, companies, from_date, to_date: str, out_path: str) -> dict:
+        """
+        Fetch every company into out_path (JSON Lines). Returns the run stats.
+
+        from_date is one date for all companies, or {company: date} (e.g. the
+        watermarks of an incremental refresh).
+        """
+        from_dates = from_date if isinstance(from_date, dict) else dict.fromkeys(companies, from_date)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._bucket = TokenBucket(self.rate, capacity=self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        writer = JsonLinesWriter(out_path)
+        start = time.perf_counter()
+        try:
+            async with httpx.AsyncClient(limits=limits, timeout=self.timeout) as client:
+                await asyncio.gather(*(
+                    self._company(client, writer, company, from_dates[company], to_date) for company in companies
+                ))
+        finally:
+            writer.close()
+        self.stats["seconds"] = time.perf_counter() - start
+        return self.stats
+
+
+def ingest_news(companies, from_date, to_date: str, out_path: str, **kwargs) -> dict:
+    """Synchronous entry point around NewsIngester.ingest."""
+    return asyncio.run(NewsIngester(**kwargs).ingest(companies, from_date, to_date, out_path))
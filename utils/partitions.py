@@ -0,0 +1,252 @@
+# finance_api/utils/partitions.py
+"""
+Time-partitioned layout of the data/ sources.
+
+A source file is split into one partition per (key, day), the key being the
+ticker or company that queries look up. Partitions are snapshot tables (see
+snapshot.py) under `<dir>/.partitions/<file>/`:
+
+    manifest.json               source signature, time column, {key: {day: digest}}
+    <key>/<YYYY-MM-DD>.snap     rows of that key and day ("undated" for rows without a time)
+
+A window query looks up the days of its key in the manifest and opens only
+the partitions overlapping the window, so its cost follows the window and
+not the length of the history. When the source file changes, `sync`
+re-partitions it and rewrites only the partitions whose rows changed (with
+append-only ingestion: the current day), then the manifest.
+
+The layout is used as soon as it exists (IndexedSource, SnapshotProvider)
+and kept in sync with its source file. Build it with:
+    python -m finance_api.utils.partitions [data_dir]
+"""
+import os
+import sys
+import json
+import bisect
+import hashlib
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+import pandas as pd
+
+from finance_api.utils.snapshot import encode_table, read_table, write_bytes, source_signature
+from finance_api.utils.instrumentation import cache_lookup, rows
+
+
+PARTITION_DIR = ".partitions"
+MANIFEST = "manifest.json"
+UNDATED = "undated"
+INDEX_COLUMN = "__index__"  # row labels of the source frame (file order)
+MAX_CACHED = 512  # decoded partitions kept in memory
+
+# Known files of data/ and the loader that partitions them
+PARTITIONED = {
+    "stocks.json": "stocks",
+    "news_sentiment_raw.csv": "news",
+    "reddit_data.json": "reddit",
+    "stock_news_google.json": "google",
+}
+
+
+def partition_dir(source_path: str) -> str:
+    directory, name = os.path.split(source_path)
+    return os.path.join(directory, PARTITION_DIR, name)
+
+
+def day_of(value) -> str:
+    """YYYY-MM-DD of a timestamp (of its UTC time if it is tz-aware)."""
+    value = pd.Timestamp(value)
+    if value.tz is not None:
+        value = value.tz_convert(None)
+    return value.strftime("%Y-%m-%d")
+
+
+def _days(times: pd.Series) -> pd.Series:
+    times = pd.to_datetime(times)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+    return times.dt.strftime("%Y-%m-%d").fillna(UNDATED)
+
+
+# -----------------------------
+# --- Partition store ---
+# -----------------------------
+
+class PartitionStore:
+    """
+    Partitions of one source file.
+
+    Args:
+        source_path (str): the source file
+        time_column (str): column giving the day of each row
+    """
+
+    def __init__(self, source_path: str, time_column: str):
+        self.source_path = source_path
+        self.time_column = time_column
+        self.directory = partition_dir(source_path)
+        self.manifest_path = os.path.join(self.directory, MANIFEST)
+        self._manifest = None
+        self._manifest_mtime = None
+        self._days = {}
+        self._cache = OrderedDict()  # (key, day) -> (digest, frame)
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def manifest(self) -> dict:
+        """The manifest, reloaded when it is rewritten."""
+        mtime = os.stat(self.manifest_path).st_mtime_ns
+        if mtime != self._manifest_mtime:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._days = {
+                key: sorted(day for day in days if day != UNDATED)
+                for key, days in manifest["keys"].items()
+            }
+            self._manifest, self._manifest_mtime = manifest, mtime
+        return self._manifest
+
+    def is_current(self) -> bool:
+        """True if the partitions were written from the current source file."""
+        return self.manifest()["source"] == source_signature(self.source_path)
+
+    def _path(self, key: str, day: str) -> str:
+        return os.path.join(self.directory, quote(str(key), safe="") or "_", f"{day}.snap")
+
+    # --- Writing ---
+
+    def sync(self, frames: dict, signature: dict = None, meta: dict = None) -> dict:
+        """
+        Partition {key: DataFrame} (rows of each key in file order, index kept)
+        and rewrite the partitions whose rows changed.
+
+        Args:
+            frames (dict): {key: DataFrame with the time column}
+            signature (dict): source signature the frames were read at (default: now)
+            meta (dict): stored in the manifest (e.g. updated_at)
+        Returns:
+            dict: number of partitions written, unchanged and removed
+        """
+        signature = signature or source_signature(self.source_path)
+        previous = self.manifest()["keys"] if self.exists() else {}
+        keys, stats = {}, {"written": 0, "unchanged": 0, "removed": 0}
+
+        for key, df in frames.items():
+            df = df.rename_axis(None).reset_index(names=INDEX_COLUMN)
+            # Digest of each day from row hashes: only changed days get encoded and written
+            hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+            schema = repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8")
+            keys[key] = {}
+            for day, rows in df.groupby(_days(df[self.time_column]).to_numpy(), sort=True).indices.items():
+                digest = hashlib.sha1(schema + hashes[rows].tobytes()).hexdigest()
+                keys[key][day] = digest
+                path = self._path(key, day)
+                if previous.get(key, {}).get(day) == digest and os.path.exists(path):
+                    stats["unchanged"] += 1
+                    continue
+                write_bytes(path, encode_table(df.iloc[rows].reset_index(drop=True), key=key, day=day))
+                stats["written"] += 1
+
+        manifest = {"source": signature, "time_column": self.time_column, "meta": meta or {}, "keys": keys}
+        write_bytes(self.manifest_path, json.dumps(manifest, ensure_ascii=False).encode("utf-8"))
+
+        # Partitions no longer listed are removed once the new manifest is in place
+        for key, days in previous.items():
+            for day in days:
+                if day not in keys.get(key, {}):
+                    path = self._path(key, day)
+                    if os.path.exists(path):
+                        os.remove(path)
+                    stats["removed"] += 1
+        return stats
+
+    # --- Reading ---
+
+    def keys(self) -> list:
+        return list(self.manifest()["keys"])
+
+    def days(self, key: str):
+        """Sorted days with rows for `key` (undated rows excluded), None if the key is unknown."""
+        self.manifest()
+        return self._days.get(key)
+
+    def _partition(self, key: str, day: str, digest: str) -> pd.DataFrame:
+        cache_key = (key, day)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            hit = cached is not None and cached[0] == digest
+            if hit:
+                self._cache.move_to_end(cache_key)
+        cache_lookup("partitions", hit)
+        if hit:
+            return cached[1]
+        df, _ = read_table(self._path(key, day))
+        with self._lock:
+            self._cache[cache_key] = (digest, df)
+            if len(self._cache) > MAX_CACHED:
+                self._cache.popitem(last=False)
+        return df
+
+    def read(self, key: str, days: list = None) -> pd.DataFrame:
+        """
+        Rows of `key` in the given days (all partitions if None), in file
+        order with their original index. None if the key is unknown.
+        """
+        partitions = self.manifest()["keys"].get(key)
+        if partitions is None:
+            return None
+        if days is None:
+            days = list(partitions)
+        frames = [self._partition(key, day, partitions[day]) for day in days if day in partitions]
+        if not frames:
+            # Same columns as the key's data, no rows
+            day = next(iter(partitions))
+            frames = [self._partition(key, day, partitions[day]).iloc[:0]]
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return df.set_index(INDEX_COLUMN).rename_axis(None).sort_index()
+
+    def window(self, key: str, start=None, end=None) -> pd.DataFrame:
+        """
+        Rows of `key` with start <= time <= end (None: unbounded), in file
+        order. Only the partitions of the days in [start, end] are opened.
+        """
+        days = self.days(key)
+        if days is None:
+            return None
+        lo = 0 if start is None else bisect.bisect_left(days, day_of(start))
+        hi = len(days) if end is None else bisect.bisect_right(days, day_of(end))
+        df = self.read(key, days[lo:hi])
+        rows(scanned=len(df))
+        times = df[self.time_column]
+        mask = times.notna()
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times <= end
+        return df[mask]
+
+
+def build_all(data_dir: str) -> list:
+    """Partition (or update the partitions of) every known source found under data_dir."""
+    from finance_api.utils.price_cache import SnapshotProvider
+    from finance_api.utils.sentiment_store import IndexedSource
+
+    built = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in sorted(files):
+            kind = PARTITIONED.get(name)
+            if kind is None:
+                continue
+            path = os.path.join(root, name)
+            source = SnapshotProvider(path) if kind == "stocks" else IndexedSource(path, kind)
+            built.append((path, source.partition()))
+    return built
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("finance_api", "data")
+    for path, stats in build_all(data_dir):
+        print(f"✅ {path}: {stats['written']} écrites, {stats['unchanged']} inchangées, {stats['removed']} supprimées")
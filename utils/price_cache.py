@@ -0,0 +1,402 @@
+# finance_api/utils/price_cache.py
+"""
+Offline-first cache of price bars for /stocks.
+
+Bars are kept per (ticker, interval), seeded from data/stocks.json and
+considered fresh for a TTL that depends on the interval. A stale entry is
+refreshed by asking the provider only for the bars newer than the cached
+high-water mark and merging them in. If the provider fails (no network),
+the cached bars keep being served. Bars resampled from stocks.json are
+anchored like the provider's (see EXCHANGES), so seed and fetched bars of the
+same period merge into one.
+
+The provider is pluggable: `YFinanceProvider` (network), `SnapshotProvider`
+(stocks.json only) or any `PriceProvider` subclass, e.g. a stub in tests.
+Set PRICE_PROVIDER=snapshot to run the API without network access.
+
+When stocks.json has a partitioned layout (see partitions.py), the seed and
+the snapshot provider read only the days of each ticker that a period needs.
+"""
+import os
+import time
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime
+import pandas as pd
+
+from finance_api.utils.snapshot import load_frame, source_signature
+from finance_api.utils.partitions import PartitionStore
+from finance_api.utils.instrumentation import cache_lookup, rows
+
+
+STOCKS_PATH = os.path.join("finance_api", "data", "stocks.json")
+
+# Resampling rules; stocks.json stores 5-minute bars
+INTERVAL_RULES = {"5m": "5min", "15m": "15min", "1h": "1h", "1d": "1D"}
+
+# Freshness per interval, in seconds
+DEFAULT_TTL = {"5m": 60, "15m": 5 * 60, "1h": 15 * 60, "1d": 60 * 60}
+
+# Exchange of a ticker (Yahoo suffix) -> (timezone, session open). Bars are
+# anchored like Yahoo's: intraday bars count from the open (1h bars at :30 in
+# New York), daily bars start at local midnight.
+EXCHANGES = {
+    "PA": ("Europe/Paris", "09:00"),
+    None: ("America/New_York", "09:30"),
+}
+
+
+# -----------------------------
+# --- Bars helpers ---
+# -----------------------------
+
+def normalize_bars(df: pd.DataFrame) -> pd.DataFrame:
+    """Bars indexed by a sorted UTC DatetimeIndex named 'Datetime' with Close and Volume."""
+    df = df[["Close", "Volume"]]
+    if not isinstance(df.index, pd.DatetimeIndex):
+        raise TypeError("Index is not a DatetimeIndex, cannot convert timezone.")
+    index = df.index.tz_localize("UTC") if df.index.tz is None else df.index.tz_convert("UTC")
+    df = df.set_axis(index.rename("Datetime"))
+    return df[~df.index.duplicated(keep="last")].sort_index()
+
+
+def exchange_of(ticker: str) -> tuple:
+    """(timezone, session open) of the exchange a ticker trades on."""
+    suffix = ticker.rsplit(".", 1)[1] if "." in ticker else None
+    return EXCHANGES.get(suffix, EXCHANGES[None])
+
+
+def bar_start(index: pd.DatetimeIndex, ticker: str, interval: str) -> pd.DatetimeIndex:
+    """Start (UTC) of the `interval` bar of `ticker` each timestamp falls in."""
+    timezone, session_open = exchange_of(ticker)
+    local = index.tz_convert(timezone)
+    day = local.normalize()
+    if interval == "1d":
+        starts = day
+    else:
+        origin = day + pd.Timedelta(f"{session_open}:00")
+        step = pd.Timedelta(INTERVAL_RULES[interval])
+        starts = origin + ((local - origin) // step) * step
+    return starts.tz_convert("UTC").rename("Datetime")
+
+
+def resample_bars(df: pd.DataFrame, ticker: str, interval: str) -> pd.DataFrame:
+    """Aggregate 5-minute bars to a coarser interval (last close, summed volume), anchored per exchange."""
+    if interval == "5m" or df.empty:
+        return df
+    bars = df.groupby(bar_start(df.index, ticker, interval)).agg({"Close": "last", "Volume": "sum"})
+    return bars.dropna(subset=["Close"])
+
+
+def merge_bars(cached: pd.DataFrame, new: pd.DataFrame, ticker: str, interval: str) -> pd.DataFrame:
+    """
+    Append new bars; a bar covering the same period as a cached one (e.g. the
+    last, partial one, or a day re-sent from the high-water mark) replaces it.
+    """
+    if new.empty:
+        return cached
+    merged = pd.concat([cached, new])
+    period = bar_start(merged.index, ticker, interval)
+    return merged[~period.duplicated(keep="last")].sort_index()
+
+
+def period_offset(period: str) -> pd.DateOffset:
+    """Calendar length of a period ("7d" -> 7 days, "1mo" -> 1 month)."""
+    if period.endswith("mo"):
+        return pd.DateOffset(months=int(period[:-2]))
+    return pd.DateOffset(days=int(period[:-1]))
+
+
+def period_start(bars: pd.DataFrame, period: str):
+    """First timestamp covered by `period` ("1d", "3d", "7d": sessions, "1mo": calendar)."""
+    if period.endswith("mo"):
+        return bars.index[-1] - period_offset(period)
+    sessions = bars.index.normalize().unique()
+    return sessions[-min(int(period[:-1]), len(sessions))]
+
+
+def slice_period(bars: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Bars of the last `period`, counted back from the latest cached bar."""
+    if bars.empty:
+        return bars
+    start = period_start(bars, period)
+    if period.endswith("mo"):
+        return bars[bars.index > start]
+    return bars[bars.index >= start]
+
+
+# -----------------------------
+# --- Providers ---
+# -----------------------------
+
+class PriceProvider(ABC):
+    """Source of price bars for the cache."""
+
+    @abstractmethod
+    def fetch(self, ticker: str, interval: str, period: str = None, start=None) -> pd.DataFrame:
+        """
+        Bars for `ticker` at `interval`, either for a whole `period` or from
+        `start` (inclusive) onwards. Returns a frame as built by normalize_bars.
+        """
+
+
+class YFinanceProvider(PriceProvider):
+    """Downloads bars from Yahoo Finance."""
+
+    def fetch(self, ticker, interval, period=None, start=None):
+        import yfinance as yf
+
+        history = yf.Ticker(ticker)
+        if start is not None:
+            df = history.history(start=start, interval=interval)
+        else:
+            df = history.history(period=period, interval=interval)
+        return normalize_bars(df)
+
+
+class SnapshotProvider(PriceProvider):
+    """Serves the 5-minute bars stored in stocks.json, resampled on demand."""
+
+    def __init__(self, path: str = STOCKS_PATH):
+        self.path = path
+        self._signature = None
+        self._bars = {}
+        self.updated_at = None
+        self.partitions = PartitionStore(path, "Datetime")
+
+    def _read(self):
+        """({ticker: 5-minute bars}, updated_at) parsed from the file."""
+        frame, meta = load_frame(self.path)
+        index = pd.to_datetime(frame["date"] + " " + frame["time"], utc=True)
+        frame = frame.set_axis(index).rename(columns={"close": "Close", "volume": "Volume"})
+        bars = {
+            ticker: normalize_bars(group)
+            for ticker, group in frame.groupby("ticker", sort=False)
+        }
+        return bars, meta.get("updated_at")
+
+    def bars(self) -> dict:
+        """{ticker: 5-minute bars}, reloaded when the file changes."""
+        signature = source_signature(self.path)
+        if signature != self._signature:
+            self._bars, self.updated_at = self._read()
+            self._signature = signature
+        return self._bars
+
+    def partition(self) -> dict:
+        """Write or update the partitioned layout of stocks.json (only changed days)."""
+        signature = source_signature(self.path)
+        bars, updated_at = self._read()
+        frames = {ticker: ticker_bars.reset_index() for ticker, ticker_bars in bars.items()}
+        return self.partitions.sync(frames, signature, meta={"updated_at": updated_at})
+
+    def partitioned(self) -> bool:
+        """True if stocks.json has a partitioned layout (brought up to date if the file changed)."""
+        if not self.partitions.exists():
+            return False
+        if not self.partitions.is_current():
+            self.partition()
+        self.updated_at = self.partitions.manifest()["meta"].get("updated_at")
+        return True
+
+    def _partition_bars(self, ticker, interval, period=None, start=None):
+        """Resampled bars of `ticker` read from the partitions covering `period` or `start`."""
+        days = self.partitions.days(ticker)
+        if days is None:
+            return None
+        if start is not None:
+            return resample_bars(_bars_of(self.partitions.window(ticker, start=start)), ticker, interval)
+        if not period or not days:
+            return resample_bars(_bars_of(self.partitions.read(ticker)), ticker, interval)
+
+        # Last days of the ticker, widened until the period is covered
+        n = min(len(days), period_days(period))
+        while True:
+            bars = resample_bars(_bars_of(self.partitions.read(ticker, days[-n:])), ticker, interval)
+            if n == len(days) or _covers(bars, days[-n], period):
+                return bars
+            n = min(len(days), 2 * n)
+
+    def fetch(self, ticker, interval, period=None, start=None):
+        if self.partitioned():
+            bars = self._partition_bars(ticker, interval, period, start)
+        else:
+            bars = self.bars().get(ticker)
+            if bars is not None:
+                bars = resample_bars(bars, ticker, interval)
+        if bars is None:
+            return pd.DataFrame({"Close": [], "Volume": []}, index=pd.DatetimeIndex([], tz="UTC", name="Datetime"))
+        if start is not None:
+            return bars[bars.index >= pd.Timestamp(start)]
+        return slice_period(bars, period) if period else bars
+
+
+def _bars_of(frame: pd.DataFrame) -> pd.DataFrame:
+    return normalize_bars(frame.set_index("Datetime"))
+
+
+def period_days(period: str) -> int:
+    """Days of data a period needs at least ("7d" -> 7 sessions, "1mo" -> 31 days)."""
+    if period.endswith("mo"):
+        return 31 * int(period[:-2]) + 1
+    return int(period[:-1])
+
+
+def _covers(bars: pd.DataFrame, first_day: str, period: str) -> bool:
+    """True if bars read from `first_day` onwards hold everything slice_period keeps."""
+    if bars.empty:
+        return False
+    if period.endswith("mo"):
+        return pd.Timestamp(first_day, tz="UTC") <= bars.index[-1] - period_offset(period)
+    return bars.index.normalize().nunique() >= int(period[:-1])
+
+
+PROVIDERS = {
+    "yfinance": YFinanceProvider,
+    "snapshot": SnapshotProvider,
+}
+
+
+# -----------------------------
+# --- Cache ---
+# -----------------------------
+
+class PriceCache:
+    """
+    Bars per (ticker, interval) with TTL-based freshness and incremental refresh.
+    """
+
+    def __init__(self, provider: PriceProvider, seed_path: str = STOCKS_PATH, ttl: dict = None):
+        self.provider = provider
+        self.seed_path = seed_path
+        self.ttl = {**DEFAULT_TTL, **(ttl or {})}
+        self._entries = {}  # (ticker, interval) -> (bars, fetched_at)
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._seeded = False
+        # Partitioned seed: bars are read per (ticker, interval, period) when first asked for
+        self._snapshot = None
+        self._seeded_at = None
+        self._seeded_periods = set()
+
+    def _seed(self):
+        """Load stocks.json once; its bars count as fetched at its updated_at."""
+        if self._seeded:
+            return
+        with self._lock:
+            if self._seeded or not self.seed_path or not os.path.exists(self.seed_path):
+                self._seeded = True
+                return
+            snapshot = SnapshotProvider(self.seed_path)
+            partitioned = snapshot.partitioned()
+            bars = {} if partitioned else snapshot.bars()
+            try:
+                fetched_at = datetime.fromisoformat(snapshot.updated_at.replace("Z", "+00:00")).timestamp()
+            except (AttributeError, ValueError):
+                fetched_at = os.path.getmtime(self.seed_path)
+            if partitioned:
+                self._snapshot, self._seeded_at = snapshot, fetched_at
+            for ticker, ticker_bars in bars.items():
+                for interval in INTERVAL_RULES:
+                    self._entries[(ticker, interval)] = (resample_bars(ticker_bars, ticker, interval), fetched_at)
+            self._seeded = True
+
+    def _seed_period(self, ticker: str, period: str, interval: str):
+        """Partitioned seed: add the bars of `period` (only its days are read) to the entry."""
+        if self._snapshot is None or (ticker, interval, period) in self._seeded_periods:
+            return
+        key = (ticker, interval)
+        with self._key_lock(key):
+            if (ticker, interval, period) in self._seeded_periods:
+                return
+            bars = self._snapshot.fetch(ticker, interval, period=period)
+            entry = self._entries.get(key)
+            if entry is not None:
+                # Bars fetched since the seed take precedence
+                self._entries[key] = (merge_bars(bars, entry[0], ticker, interval), entry[1])
+            elif not bars.empty:
+                self._entries[key] = (bars, self._seeded_at)
+            self._seeded_periods.add((ticker, interval, period))
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def is_fresh(self, ticker: str, interval: str) -> bool:
+        entry = self._entries.get((ticker, interval))
+        return entry is not None and time.time() - entry[1] < self.ttl.get(interval, 0)
+
+    def high_water_mark(self, ticker: str, interval: str):
+        """Timestamp of the newest cached bar, or None."""
+        entry = self._entries.get((ticker, interval))
+        if entry is None or entry[0].empty:
+            return None
+        return entry[0].index[-1]
+
+    def _refresh(self, ticker, period, interval):
+        key = (ticker, interval)
+        entry = self._entries.get(key)
+        cached = entry[0] if entry is not None else None
+        try:
+            if cached is None or cached.empty or cached.index[-1] < pd.Timestamp.now(tz="UTC") - period_offset(period):
+                # Nothing recent enough cached: fetch the whole period
+                bars = self.provider.fetch(ticker, interval, period=period)
+                if cached is not None:
+                    bars = merge_bars(cached, bars, ticker, interval)
+            else:
+                # Only the bars from the high-water mark onwards (the last one may have moved)
+                bars = merge_bars(cached, self.provider.fetch(ticker, interval, start=cached.index[-1]), ticker, interval)
+        except Exception:
+            if cached is None:
+                raise
+            bars = cached  # offline: keep serving the cache until the next TTL
+        self._entries[key] = (bars, time.time())
+        return bars
+
+    def get(self, ticker: str, period: str, interval: str) -> pd.DataFrame:
+        """Bars of `ticker` for the last `period` at `interval`."""
+        self._seed()
+        self._seed_period(ticker, period, interval)
+        fresh = self.is_fresh(ticker, interval)
+        cache_lookup("price", fresh)
+        if fresh:
+            bars = self._entries[(ticker, interval)][0]
+        else:
+            with self._key_lock((ticker, interval)):
+                if self.is_fresh(ticker, interval):
+                    bars = self._entries[(ticker, interval)][0]
+                else:
+                    bars = self._refresh(ticker, period, interval)
+        rows(scanned=len(bars))
+        return slice_period(bars, period)
+
+    def cached_version(self, ticker: str, period: str, interval: str):
+        """
+        (version, fetched_at) of the bars get() would serve from the cache, or
+        None if the entry is stale (get() would ask the provider first).
+        """
+        self._seed()
+        self._seed_period(ticker, period, interval)
+        if not self.is_fresh(ticker, interval):
+            return None
+        bars, fetched_at = self._entries[(ticker, interval)]
+        last = bars.index[-1].value if not bars.empty else None
+        return (fetched_at, len(bars), last), fetched_at
+
+
+_CACHE = None
+
+
+def get_price_cache() -> PriceCache:
+    """Process-wide cache; the provider is chosen with PRICE_PROVIDER (yfinance|snapshot)."""
+    global _CACHE
+    if _CACHE is None:
+        provider = PROVIDERS[os.environ.get("PRICE_PROVIDER", "yfinance")]()
+        _CACHE = PriceCache(provider)
+    return _CACHE
+
+
+def set_price_cache(cache: PriceCache):
+    """Replace the process-wide cache (e.g. with a stub provider)."""
+    global _CACHE
+    _CACHE = cache
@@ -0,0 +1,139 @@
+# finance_api/utils/rolling_stats.py
+"""
+Expanding and rolling correlation in one pass, from running sums.
+
+For each row, the correlation of x and y over the prefix (expanding) or the
+last `window` rows (rolling) of its group is derived from the running sums of
+x, y, x², y² and xy, so a whole panel of tickers is computed in O(n) instead
+of one np.corrcoef per row and per ticker.
+
+tail_corr / tail_mean give the value over the last N rows of each group for
+several windows at once: the running sums are computed once, and each extra
+window only costs one lookup per group.
+
+Semantics are those of the former `safe_corr` loop of metrics.py:
+    - NaN for a single row, or if x or y is entirely null in the window
+    - otherwise the correlation of x.fillna(0) and y.fillna(0)
+    - NaN when x or y is constant in the window (np.corrcoef gave NaN, or
+      rounding noise of order 1e-16 for constants it could not average exactly)
+"""
+import numpy as np
+import pandas as pd
+
+
+# Variance below this fraction of the mean square is rounding noise
+_RELATIVE_EPS = 1e-12
+
+
+def _running_sums(x, y, groups, window: int = None) -> pd.DataFrame:
+    """Per-row sums (n, non-null counts, x, y, x², y², xy) over the expanding or rolling window."""
+    x = pd.Series(np.asarray(x, dtype=float))
+    y = pd.Series(np.asarray(y, dtype=float))
+    keys = pd.Series(np.zeros(len(x), dtype=np.int64) if groups is None else np.asarray(groups))
+
+    # Shifting each group by its first value keeps the sums small (less
+    # cancellation) and makes constant stretches exactly zero
+    x0, y0 = x.fillna(0), y.fillna(0)
+    x0 = x0 - x0.groupby(keys, sort=False).transform("first")
+    y0 = y0 - y0.groupby(keys, sort=False).transform("first")
+
+    terms = pd.DataFrame({
+        "n": 1.0,
+        "nx": x.notna().astype(float),
+        "ny": y.notna().astype(float),
+        "sx": x0, "sy": y0,
+        "sxx": x0 * x0, "syy": y0 * y0, "sxy": x0 * y0,
+    })
+    sums = terms.groupby(keys, sort=False).cumsum()
+    if window is not None:
+        sums = sums - sums.groupby(keys, sort=False).shift(window).fillna(0.0)
+    return sums
+
+
+def _corr_from_sums(sums: pd.DataFrame) -> np.ndarray:
+    n = sums["n"].to_numpy()
+    sx, sy = sums["sx"].to_numpy(), sums["sy"].to_numpy()
+    sxx, syy, sxy = sums["sxx"].to_numpy(), sums["syy"].to_numpy(), sums["sxy"].to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var_x = sxx - sx * sx / n
+        var_y = syy - sy * sy / n
+        cov = sxy - sx * sy / n
+        corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+
+    undefined = (
+        (n < 2)
+        | (sums["nx"].to_numpy() == 0) | (sums["ny"].to_numpy() == 0)
+        | (var_x <= _RELATIVE_EPS * sxx) | (var_y <= _RELATIVE_EPS * syy)
+    )
+    corr[undefined] = np.nan
+    return corr
+
+
+def expanding_corr(x, y, groups=None) -> np.ndarray:
+    """
+    Correlation of x and y over each row's prefix within its group.
+
+    Args:
+        x, y: aligned 1-D arrays/Series
+        groups: group label per row (e.g. ticker), rows of a group in time order
+    Returns:
+        np.ndarray of float, NaN where undefined
+    """
+    return _corr_from_sums(_running_sums(x, y, groups))
+
+
+def rolling_corr(x, y, window: int, groups=None) -> np.ndarray:
+    """Correlation of x and y over each row's last `window` rows within its group."""
+    return _corr_from_sums(_running_sums(x, y, groups, window=window))
+
+
+# -----------------------------
+# --- Last-N-rows windows ---
+# -----------------------------
+
+def _group_bounds(groups):
+    """Group labels in order of appearance, and first/last row of each (groups must be contiguous)."""
+    codes, labels = pd.factorize(np.asarray(groups))
+    ends = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True]) if len(codes) else np.array([], dtype=np.int64)
+    starts = np.r_[0, ends[:-1] + 1] if len(ends) else ends
+    return labels, starts, ends
+
+
+def _tail_sums(cum: pd.DataFrame, starts, ends, n: int = None) -> pd.DataFrame:
+    """Sums over the last n rows of each group (all rows if n is None) from grouped cumulative sums."""
+    values = cum.to_numpy()
+    first = starts if n is None else np.maximum(starts, ends - n + 1)
+    before = np.where((first > starts)[:, None], values[np.maximum(first - 1, 0)], 0.0)
+    return pd.DataFrame(values[ends] - before, columns=cum.columns)
+
+
+def tail_corr(x, y, groups, windows) -> pd.DataFrame:
+    """
+    Correlation over the last N rows of each group, for every N in windows.
+
+    Args:
+        x, y: aligned 1-D arrays/Series
+        groups: group label per row; rows of a group contiguous and in time order
+        windows: list of row counts, None meaning the whole group
+    Returns:
+        {window: pd.Series indexed by group label} (NaN where undefined)
+    """
+    labels, starts, ends = _group_bounds(groups)
+    cum = _running_sums(x, y, groups)
+    return {n: pd.Series(_corr_from_sums(_tail_sums(cum, starts, ends, n)), index=labels) for n in windows}
+
+
+def tail_mean(values, groups, windows) -> pd.DataFrame:
+    """Mean of the non-null values among the last N rows of each group, for every N in windows."""
+    labels, starts, ends = _group_bounds(groups)
+    values = pd.Series(np.asarray(values, dtype=float))
+    keys = pd.Series(np.asarray(groups))
+    cum = pd.DataFrame({"n": values.notna().astype(float), "s": values.fillna(0)}).groupby(keys, sort=False).cumsum()
+
+    result = {}
+    for n in windows:
+        sums = _tail_sums(cum, starts, ends, n)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result[n] = pd.Series(np.where(sums["n"] > 0, sums["s"] / sums["n"], np.nan), index=labels)
+    return result
@@ -0,0 +1,184 @@
+# finance_api/utils/score_cache.py
+"""
+Persistent, content-addressed cache of sentiment scores.
+
+Scores are stored in SQLite under sha256(model id + normalized text), so an
+article already scored by the same model is never scored again, whatever its
+URL or the run it comes from. Lookups and writes are done in bulk; the cache
+is bounded and evicts the least recently used entries.
+"""
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+
+SCORE_CACHE_PATH = os.environ.get(
+    "SCORE_CACHE_PATH", os.path.join("finance_api", "data", ".cache", "sentiment_scores.sqlite")
+)
+DEFAULT_MAX_ENTRIES = 1_000_000
+
+# SQLite's default limit on host parameters is 999
+_SQL_CHUNK = 500
+
+
+def normalize_text(text) -> str:
+    """Unicode NFKC with whitespace runs collapsed, so trivial variants share a key."""
+    text = "" if text is None else str(text)
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def score_key(model_id: str, text) -> bytes:
+    return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+
+class ScoreCache:
+    """
+    (model id, text) -> (label, score) in a local SQLite database.
+
+    Args:
+        path (str): database file (":memory:" for a throwaway cache)
+        max_entries (int): size bound; least recently used entries are evicted
+    """
+
+    def __init__(self, path: str = SCORE_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores ("
+            " key BLOB PRIMARY KEY, model_id TEXT, label TEXT, score REAL, last_used INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS scores_last_used ON scores(last_used)")
+        self._conn.commit()
+
+    def get_many(self, model_id: str, texts) -> dict:
+        """{position in texts: (label, score)} for the texts already cached."""
+        keys = [score_key(model_id, text) for text in texts]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), _SQL_CHUNK):
+                chunk = list(set(keys[start:start + _SQL_CHUNK]))
+                rows = self._conn.execute(
+                    f"SELECT key, label, score FROM scores WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update((bytes(key), (label, score)) for key, label, score in rows)
+            if found:
+                now = time.time_ns()
+                self._conn.executemany(
+                    "UPDATE scores SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        result = {i: found[key] for i, key in enumerate(keys) if key in found}
+        self.hits += len(result)
+        self.misses += len(keys) - len(result)
+        return result
+
+    def put_many(self, model_id: str, items):
+        """Store (text, label, score) items in one transaction, then enforce the size bound."""
+        now = time.time_ns()
+        rows = [(score_key(model_id, text), model_id, label, float(score), now) for text, label, score in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)", rows)
+            self.writes += len(rows)
+            overflow = self._size() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM scores WHERE key IN (SELECT key FROM scores ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            self._conn.commit()
+
+    def _size(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._size()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "size": size,
+            "max_entries": self.max_entries,
+        }
+
+    def close(self):
+        self._conn.close()
+
+
+class CachedScorer:
+    """
+    Wraps a scorer (anything with `model_id` and `score_batch(texts)`) with a ScoreCache.
+
+    Each batch is looked up in bulk; only the misses (deduplicated) are scored,
+    and their results are written back in one transaction.
+    """
+
+    def __init__(self, scorer, cache: ScoreCache = None, window: int = 1024):
+        self.scorer = scorer
+        self.cache = cache if cache is not None else ScoreCache()
+        self.window = window
+
+    @property
+    def model_id(self) -> str:
+        return self.scorer.model_id
+
+    def score_batch(self, texts):
+        texts = list(texts)
+        results = self.cache.get_many(self.model_id, texts)
+
+        # Score each missing text once, even if it appears several times
+        missing = {}
+        for i, text in enumerate(texts):
+            if i not in results:
+                missing.setdefault(normalize_text(text), []).append(i)
+        if missing:
+            firsts = [texts[positions[0]] for positions in missing.values()]
+            scored = self.scorer.score_batch(firsts)
+            for text, positions, result in zip(firsts, missing.values(), scored):
+                for i in positions:
+                    results[i] = result
+            self.cache.put_many(self.model_id, [(t, label, score) for t, (label, score) in zip(firsts, scored)])
+
+        return [results[i] for i in range(len(texts))]
+
+    def score(self, texts):
+        """Lazily score an iterable of texts, yielding (label, score) in input order."""
+        chunk = []
+        for text in texts:
+            chunk.append(text)
+            if len(chunk) == self.window:
+                yield from self.score_batch(chunk)
+                chunk = []
+        yield from self.score_batch(chunk)
+
+
+_CACHE = None
+
+
+def get_score_cache() -> ScoreCache:
+    """Process-wide score cache at SCORE_CACHE_PATH."""
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = ScoreCache()
+    return _CACHE
@@ -0,0 +1,314 @@
+# finance_api/utils/search_index.py
+"""
+Inverted full-text index over the news, Google News and Reddit texts.
+
+Each text field is tokenized once (lower-cased words) into positional
+postings: {term: {doc id: [positions]}}. A term query reads one posting
+list, a phrase query intersects the lists of its terms and checks that the
+positions follow each other, so a query costs in proportion to the posting
+lists it touches, not to the corpus. Matches are ranked with BM25 and the
+sentiment of all hits is aggregated (same numeric sentiment as analysis.py).
+
+Indexed fields:
+    news    Text           (news_sentiment_raw.csv)
+    google  title          (stock_news_google.json)
+    reddit  title, selftext (reddit_data.json)
+
+The index is built from the files of data/ in the background when the API
+starts (or on first use). When a file changes, only its new rows are
+tokenized and added, rows that disappeared are removed and rows whose
+content changed (e.g. rescored) are indexed again. Rows are identified as in
+the article store and compared by a hash of their content.
+"""
+import os
+import re
+import json
+import math
+import hashlib
+import threading
+from datetime import datetime
+
+from finance_api.utils.article_store import SOURCES, article_key, published_at, read_rows
+from finance_api.utils.sentiment_aggregates import row_sentiment, sentiment_summary
+
+
+SEARCH_FIELDS = {
+    "news": ("Text",),
+    "google": ("title",),
+    "reddit": ("title", "selftext"),
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+DEFAULT_LIMIT = 20
+
+_TOKEN = re.compile(r"\w+")
+# "a phrase" or a single term
+_CLAUSE = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def tokenize(text) -> list:
+    if not isinstance(text, str):
+        return []
+    return _TOKEN.findall(text.casefold())
+
+
+def content_hash(row: dict) -> str:
+    """Hash of every field of a row: tells a changed row from the one indexed."""
+    content = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def parse_day(value):
+    """YYYY-MM-DD date of a search bound, zero-padded (None stays None); ValueError if malformed."""
+    if value is None:
+        return None
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"Date invalide : '{value}' (attendu YYYY-MM-DD)") from None
+
+
+def parse_query(query: str) -> list:
+    """Clauses of a query: one tuple of terms per word or quoted phrase (all must match)."""
+    clauses = []
+    for phrase, word in _CLAUSE.findall(query or ""):
+        terms = tuple(tokenize(phrase if phrase else word))
+        if terms:
+            clauses.append(terms)
+    if not clauses:
+        raise ValueError("Requête vide : au moins un mot ou une \"phrase\" attendu")
+    return clauses
+
+
+class SearchIndex:
+    """
+    Args:
+        sources (dict): source specs of the article store (default: SOURCES)
+        fields (dict): indexed text fields per source (default: SEARCH_FIELDS)
+    """
+
+    def __init__(self, sources: dict = None, fields: dict = None):
+        self.sources = sources or SOURCES
+        self.fields = fields or SEARCH_FIELDS
+        self._postings = {}   # term -> {doc id: [positions]}
+        self._docs = {}       # doc id -> (source, company, published_at, sentiment, row)
+        self._lengths = {}    # doc id -> number of tokens
+        self._ids = {}        # (source, company, key) -> doc id
+        self._hashes = {}     # (source, company, key) -> content hash of the indexed row
+        self._next_id = 0
+        self._total_length = 0
+        self._signatures = {}
+        self._lock = threading.RLock()
+
+    # -----------------------------
+    # --- Updates ---
+    # -----------------------------
+
+    def _terms(self, source: str, row: dict) -> dict:
+        """{term: [positions]} of a row; fields are one position apart so phrases stay within a field."""
+        terms, position = {}, 0
+        for field in self.fields[source]:
+            for token in tokenize(row.get(field)):
+                terms.setdefault(token, []).append(position)
+                position += 1
+            position += 1
+        return terms
+
+    def add(self, source: str, rows) -> int:
+        """Index the rows not indexed yet. Returns the number added."""
+        spec = self.sources[source]
+        added = 0
+        with self._lock:
+            for row in rows:
+                company = row.get(spec["company"])
+                ident = (source, company, article_key(row, spec))
+                if ident in self._ids:
+                    continue
+                doc = self._next_id
+                self._next_id += 1
+                self._ids[ident] = doc
+                self._hashes[ident] = content_hash(row)
+                terms = self._terms(source, row)
+                for term, positions in terms.items():
+                    self._postings.setdefault(term, {})[doc] = positions
+                length = sum(len(positions) for positions in terms.values())
+                self._lengths[doc] = length
+                self._total_length += length
+                self._docs[doc] = (source, company, published_at(row, spec), row_sentiment(source, row), row)
+                added += 1
+        return added
+
+    def remove(self, source: str, idents) -> int:
+        """Drop documents by (source, company, key). Returns the number removed."""
+        removed = 0
+        with self._lock:
+            for ident in idents:
+                doc = self._ids.pop(ident, None)
+                if doc is None:
+                    continue
+                del self._hashes[ident]
+                for term in self._terms(source, self._docs[doc][4]):
+                    postings = self._postings[term]
+                    postings.pop(doc, None)
+                    if not postings:
+                        del self._postings[term]
+                self._total_length -= self._lengths.pop(doc)
+                del self._docs[doc]
+                removed += 1
+        return removed
+
+    def refresh(self) -> dict:
+        """
+        Bring the index up to date with the source files.
+        Returns {source: (added, removed)}; a changed row counts in both.
+        """
+        changes = {}
+        with self._lock:
+            for source, spec in self.sources.items():
+                if source not in self.fields or not os.path.exists(spec["path"]):
+                    continue
+                st = os.stat(spec["path"])
+                signature = (st.st_mtime_ns, st.st_size)
+                if signature == self._signatures.get(source):
+                    continue
+                rows = read_rows(source, sources=self.sources)
+                current = {}
+                for row in rows:
+                    # The first row of an ident is the one indexed (see add)
+                    current.setdefault((source, row.get(spec["company"]), article_key(row, spec)), row)
+                stale = [
+                    ident for ident, hash_ in self._hashes.items()
+                    if ident[0] == source and (ident not in current or content_hash(current[ident]) != hash_)
+                ]
+                removed = self.remove(source, stale)
+                changes[source] = (self.add(source, current.values()), removed)
+                self._signatures[source] = signature
+        return changes
+
+    # -----------------------------
+    # --- Queries ---
+    # -----------------------------
+
+    def _matches(self, terms: tuple) -> dict:
+        """{doc id: occurrences} of a term or phrase."""
+        lists = [self._postings.get(term) for term in terms]
+        if not all(lists):
+            return {}
+        if len(terms) == 1:
+            return {doc: len(positions) for doc, positions in lists[0].items()}
+
+        # Candidates from the shortest list, then position check
+        docs = set(min(lists, key=len))
+        for postings in lists:
+            docs &= postings.keys()
+        matches = {}
+        for doc in docs:
+            starts = set(lists[0][doc])
+            for offset, postings in enumerate(lists[1:], start=1):
+                starts &= {p - offset for p in postings[doc]}
+            if starts:
+                matches[doc] = len(starts)
+        return matches
+
+    def search(self, query: str, company: str = None, source: str = None,
+               date_from: str = None, date_to: str = None, limit: int = DEFAULT_LIMIT) -> dict:
+        """
+        Documents matching every clause of `query`, best first.
+
+        Args:
+            query (str): words and "quoted phrases"
+            company (str): company name (case-insensitive)
+            source (str): "news", "google" or "reddit"
+            date_from, date_to (str): YYYY-MM-DD bounds (inclusive) on the publication day
+            limit (int): number of results returned
+        Returns:
+            dict: total_hits, sentiment of all hits and the ranked results
+        """
+        clauses = parse_query(query)
+        if source is not None and source not in self.fields:
+            raise ValueError(f"Source inconnue : '{source}' (attendu {', '.join(self.fields)})")
+        date_from, date_to = parse_day(date_from), parse_day(date_to)
+        self.refresh()
+
+        with self._lock:
+            n_docs = len(self._docs)
+            average_length = self._total_length / n_docs if n_docs else 0.0
+            matches = []
+            for terms in sorted(clauses, key=lambda t: min(len(self._postings.get(x, ())) for x in t)):
+                found = self._matches(terms)
+                matches.append((terms, found))
+                if not found:
+                    break
+
+            hits = set(matches[0][1]) if matches else set()
+            for _, found in matches[1:]:
+                hits &= found.keys()
+            company_key = company.casefold() if company else None
+            hits = [
+                doc for doc in hits
+                if (source is None or self._docs[doc][0] == source)
+                and (company_key is None or str(self._docs[doc][1]).casefold() == company_key)
+                and _in_range(self._docs[doc][2], date_from, date_to)
+            ]
+
+            scores = {doc: 0.0 for doc in hits}
+            for terms, found in matches:
+                idf = math.log(1 + (n_docs - len(found) + 0.5) / (len(found) + 0.5))
+                for doc in hits:
+                    tf = found[doc]
+                    norm = K1 * (1 - B + B * self._lengths[doc] / average_length) if average_length else K1
+                    scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+
+            ranked = sorted(hits, key=lambda doc: (-scores[doc], doc))
+            results = []
+            for doc in ranked[:limit]:
+                doc_source, doc_company, when, sentiment, row = self._docs[doc]
+                results.append({
+                    "source": doc_source,
+                    "company": doc_company,
+                    "published_at": when,
+                    "score": round(scores[doc], 4),
+                    "sentiment": sentiment,
+                    "document": row,
+                })
+            return {
+                "query": query,
+                "total_hits": len(hits),
+                "sentiment": _hits_sentiment(self._docs[doc] for doc in hits),
+                "results": results,
+            }
+
+
+def _in_range(when, date_from, date_to) -> bool:
+    if date_from is None and date_to is None:
+        return True
+    if when is None:
+        return False
+    # Bounds come from parse_day: zero-padded days compare as dates
+    day = when[:10]
+    return (date_from is None or day >= date_from) and (date_to is None or day <= date_to)
+
+
+def _hits_sentiment(docs) -> dict:
+    """Sentiment summary of the hits, overall and per source."""
+    sentiments = {"all": []}
+    for doc_source, _, _, sentiment, _ in docs:
+        sentiments["all"].append(sentiment)
+        sentiments.setdefault(doc_source, []).append(sentiment)
+    return {key: sentiment_summary(values) for key, values in sentiments.items()}
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_search_index() -> SearchIndex:
+    """Process-wide index over the data/ files."""
+    global _INDEX
+    with _INDEX_LOCK:
+        if _INDEX is None:
+            _INDEX = SearchIndex()
+    return _INDEX
@@ -0,0 +1,392 @@
+# finance_api/utils/sentiment_aggregates.py
+"""
+Materialized sentiment aggregates per (company, source, day) — and per hour
+if enabled — maintained incrementally.
+
+Each bucket holds the sum and count of the numeric sentiment and the number
+of positive / neutral / negative items, so the mean is total / count.
+New rows are folded in additively; retracted or rescored rows only trigger a
+recomputation of the buckets they belong to, from the stored per-row
+contributions. Buckets are mirrored in memory for constant-time reads and
+persisted in SQLite next to the article store.
+
+The numeric sentiment of a row is the one analysis.py uses: CSV labels and
+Reddit scores become 1 / 0 / -1, Google News keeps its sentiment_score.
+
+news_api.py folds the articles it ingests (sync); a reader in another
+process picks up what it committed with refresh(). analysis.py and
+metrics_engine keep computing from the files, which can be rescored or
+rewritten as a whole.
+"""
+import os
+import math
+import sqlite3
+import threading
+import pandas as pd
+
+from finance_api.utils.article_store import SOURCES, article_key, published_at
+
+
+AGGREGATES_PATH = os.environ.get(
+    "AGGREGATES_PATH", os.path.join("finance_api", "data", ".cache", "sentiment_aggregates.sqlite")
+)
+
+# Score in ]-0.05, 0.05[ -> neutral
+NEUTRAL_THRESHOLD = 0.05
+LABEL_VALUES = {"positive": 1, "neutral": 0, "negative": -1}
+
+# Bucket of a "YYYY-MM-DDTHH:MM:SSZ" time, per granularity
+GRANULARITIES = {"day": 10, "hour": 13}
+
+# Companies of the daily files (each once; matched case-insensitively in every source) -> ticker
+COMPANIES = {
+    "LVMH": "MC.PA", "TotalEnergies": "TTE.PA", "Sanofi": "SAN.PA", "Airbus": "AIR.PA",
+    "Schneider Electric": "SU.PA", "Apple": "AAPL", "Microsoft": "MSFT", "Amazon": "AMZN",
+    "Alphabet (Google)": "GOOGL", "Tesla": "TSLA",
+}
+
+# Source -> its key in sentiment_compact.json (exposed as is by metrics_engine,
+# /company_metrics and /dashboard), in the order of the file
+COMPACT_SOURCES = {"google": "google", "reddit": "reddit", "news": "news media"}
+
+_SQL_CHUNK = 500
+
+
+def row_sentiment(source: str, row: dict):
+    """Numeric sentiment of a stored row, or None if it has none."""
+    if source == "news":
+        return LABEL_VALUES.get(row.get("Sentiment"))
+    value = row.get("sentiment_score" if source == "google" else "sentiment")
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None if source == "google" else 0
+    value = float(value)
+    if source == "reddit":
+        return 1 if value > NEUTRAL_THRESHOLD else (-1 if value < -NEUTRAL_THRESHOLD else 0)
+    return value
+
+
+def bucket_values(sentiments) -> list:
+    """[total, count, n_positive, n_neutral, n_negative] of a list of sentiments."""
+    values = [0.0, 0, 0, 0, 0]
+    for sentiment in sentiments:
+        _fold(values, sentiment)
+    return values
+
+
+def sentiment_summary(sentiments) -> dict:
+    """Mean (4 decimals) and positive / neutral / negative counts of sentiments (None ignored)."""
+    summary = _as_record(bucket_values(sentiments))
+    if summary["mean_sentiment"] is not None:
+        summary["mean_sentiment"] = round(summary["mean_sentiment"], 4)
+    return summary
+
+
+def _fold(values: list, sentiment):
+    """Add one sentiment to [total, count, n_positive, n_neutral, n_negative]."""
+    if sentiment is None:
+        return
+    values[0] += sentiment
+    values[1] += 1
+    values[2 if sentiment > NEUTRAL_THRESHOLD else 4 if sentiment < -NEUTRAL_THRESHOLD else 3] += 1
+
+
+class SentimentAggregates:
+    """
+    Args:
+        path (str): SQLite database file (":memory:" for a throwaway table)
+        granularities (tuple): "day" and optionally "hour"
+        sources (dict): source specs of the article store (default: SOURCES)
+    """
+
+    def __init__(self, path: str = AGGREGATES_PATH, granularities=("day",), sources: dict = None):
+        unknown = set(granularities) - set(GRANULARITIES)
+        if unknown:
+            raise ValueError(f"Unknown granularity: {sorted(unknown)}")
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.granularities = tuple(granularities)
+        self.sources = sources or SOURCES
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            CREATE TABLE IF NOT EXISTS contributions (
+                source TEXT NOT NULL, company TEXT NOT NULL, key TEXT NOT NULL,
+                published_at TEXT NOT NULL, sentiment REAL,
+                PRIMARY KEY (source, company, key));
+            CREATE INDEX IF NOT EXISTS contributions_time ON contributions(source, company, published_at);
+            CREATE TABLE IF NOT EXISTS aggregates (
+                granularity TEXT NOT NULL, company TEXT NOT NULL, source TEXT NOT NULL, bucket TEXT NOT NULL,
+                total REAL, count INTEGER, n_positive INTEGER, n_neutral INTEGER, n_negative INTEGER,
+                PRIMARY KEY (granularity, company, source, bucket));
+            CREATE TABLE IF NOT EXISTS synced (source TEXT PRIMARY KEY, seq INTEGER);
+        """)
+
+        # In-memory mirror: {granularity: {(company, source): {bucket: values}}}
+        self._version = 0
+        self._load()
+
+        # An enabled granularity with no bucket yet is rebuilt from the contributions
+        for granularity in self.granularities:
+            if not self._buckets[granularity]:
+                self._rebuild(granularity)
+
+    def _load(self):
+        buckets = {g: {} for g in self.granularities}
+        for granularity, company, source, bucket, *values in self._conn.execute("SELECT * FROM aggregates"):
+            if granularity in buckets:
+                buckets[granularity].setdefault((company, source), {})[bucket] = list(values)
+        self._buckets = buckets
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._version += 1
+
+    def refresh(self) -> int:
+        """
+        Reload the buckets if another connection committed since they were
+        read. Returns the version of the buckets (grows on every change).
+        """
+        with self._lock:
+            if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+                self._load()
+            return self._version
+
+    # -----------------------------
+    # --- Contributions ---
+    # -----------------------------
+
+    def _contributions(self, source: str, rows) -> dict:
+        """{(company, key): (published_at, sentiment)} of rows with a company and a time."""
+        spec = self.sources[source]
+        result = {}
+        for row in rows:
+            company, when = row.get(spec["company"]), published_at(row, spec)
+            if company is None or when is None:
+                continue
+            result[(str(company).lower(), article_key(row, spec))] = (when, row_sentiment(source, row))
+        return result
+
+    def _stored(self, source: str, pairs) -> dict:
+        """{(company, key): (published_at, sentiment)} already stored among pairs."""
+        keys, found = list({key for _, key in pairs}), {}
+        for start in range(0, len(keys), _SQL_CHUNK):
+            chunk = keys[start:start + _SQL_CHUNK]
+            for company, key, when, sentiment in self._conn.execute(
+                "SELECT company, key, published_at, sentiment FROM contributions "
+                f"WHERE source = ? AND key IN ({','.join('?' * len(chunk))})",
+                [source, *chunk],
+            ):
+                if (company, key) in pairs:
+                    found[(company, key)] = (when, sentiment)
+        return found
+
+    # -----------------------------
+    # --- Updates ---
+    # -----------------------------
+
+    def fold(self, source: str, rows) -> int:
+        """Add new rows (rows already folded are ignored). Returns the number added."""
+        with self._lock:
+            contributions = self._contributions(source, rows)
+            stored = self._stored(source, contributions)
+            new = {pair: value for pair, value in contributions.items() if pair not in stored}
+
+            changed = set()
+            for (company, key), (when, sentiment) in new.items():
+                for granularity in self.granularities:
+                    bucket = when[:GRANULARITIES[granularity]]
+                    values = self._buckets[granularity].setdefault((company, source), {}).setdefault(bucket, [0.0, 0, 0, 0, 0])
+                    _fold(values, sentiment)
+                    changed.add((granularity, company, bucket))
+
+            self._conn.executemany(
+                "INSERT INTO contributions VALUES (?, ?, ?, ?, ?)",
+                [(source, company, key, when, sentiment) for (company, key), (when, sentiment) in new.items()],
+            )
+            self._save(source, changed)
+            return len(new)
+
+    def retract(self, source: str, rows) -> int:
+        """Remove rows and recompute their buckets. Returns the number removed."""
+        with self._lock:
+            stored = self._stored(source, self._contributions(source, rows))
+            self._conn.executemany(
+                "DELETE FROM contributions WHERE source = ? AND company = ? AND key = ?",
+                [(source, company, key) for company, key in stored],
+            )
+            self._recompute(source, stored.items())
+            return len(stored)
+
+    def rescore(self, source: str, rows) -> int:
+        """
+        Replace the sentiment (and time) of stored rows, e.g. after a model
+        change, and recompute their buckets: the one they leave, if their
+        time changed, and the one they are now in.
+        """
+        with self._lock:
+            contributions = self._contributions(source, rows)
+            stored = self._stored(source, contributions)
+            self._conn.executemany(
+                "UPDATE contributions SET published_at = ?, sentiment = ? WHERE source = ? AND company = ? AND key = ?",
+                [(*contributions[pair], source, *pair) for pair in stored],
+            )
+            self._recompute(source, [*stored.items(), *((pair, contributions[pair]) for pair in stored)])
+            return len(stored)
+
+    def sync(self, store) -> int:
+        """Fold the rows added to an ArticleStore since the last sync. Returns the number folded."""
+        added = 0
+        for source in self.sources:
+            row = self._conn.execute("SELECT seq FROM synced WHERE source = ?", (source,)).fetchone()
+            new_rows = store.rows_since(source, row[0] if row else 0)
+            if not new_rows:
+                continue
+            added += self.fold(source, [payload for _, payload in new_rows])
+            with self._lock:
+                self._conn.execute("INSERT OR REPLACE INTO synced VALUES (?, ?)", (source, new_rows[-1][0]))
+                self._conn.commit()
+        return added
+
+    def _recompute(self, source: str, contributions):
+        """Recompute the buckets touched by `contributions` from the stored rows."""
+        changed = set()
+        for (company, _), (when, _) in contributions:
+            for granularity in self.granularities:
+                changed.add((granularity, company, when[:GRANULARITIES[granularity]]))
+
+        for granularity, company, bucket in changed:
+            sentiments = [s for (s,) in self._conn.execute(
+                "SELECT sentiment FROM contributions "
+                "WHERE source = ? AND company = ? AND published_at >= ? AND published_at < ?",
+                (source, company, bucket, bucket + "~"),
+            )]
+            buckets = self._buckets[granularity].setdefault((company, source), {})
+            if sentiments:
+                buckets[bucket] = bucket_values(sentiments)
+            else:
+                buckets.pop(bucket, None)
+        self._save(source, changed)
+
+    def _rebuild(self, granularity: str):
+        buckets = self._buckets[granularity]
+        width = GRANULARITIES[granularity]
+        for source, company, when, sentiment in self._conn.execute(
+            "SELECT source, company, published_at, sentiment FROM contributions ORDER BY rowid"
+        ):
+            values = buckets.setdefault((company, source), {}).setdefault(when[:width], [0.0, 0, 0, 0, 0])
+            _fold(values, sentiment)
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(granularity, company, source, bucket, *values)
+             for (company, source), by_bucket in buckets.items() for bucket, values in by_bucket.items()],
+        )
+        self._conn.commit()
+        self._version += 1
+
+    def _save(self, source: str, changed):
+        """Write the changed buckets (deleting emptied ones) and commit."""
+        upserts, deletes = [], []
+        for granularity, company, bucket in changed:
+            values = self._buckets[granularity].get((company, source), {}).get(bucket)
+            if values is None:
+                deletes.append((granularity, company, source, bucket))
+            else:
+                upserts.append((granularity, company, source, bucket, *values))
+        self._conn.executemany("INSERT OR REPLACE INTO aggregates VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", upserts)
+        self._conn.executemany(
+            "DELETE FROM aggregates WHERE granularity = ? AND company = ? AND source = ? AND bucket = ?", deletes
+        )
+        self._conn.commit()
+        self._version += 1
+
+    # -----------------------------
+    # --- Reads ---
+    # -----------------------------
+
+    def get(self, company: str, bucket: str, source: str = None, granularity: str = "day"):
+        """
+        {mean_sentiment, count, n_positive, n_neutral, n_negative} of one bucket
+        ("YYYY-MM-DD", or "YYYY-MM-DDTHH" hourly), all sources together if
+        source is None. None if the bucket is empty.
+        """
+        company = company.lower()
+        by_source = self._buckets[granularity]
+        sources = self.sources if source is None else (source,)
+        values = [0.0, 0, 0, 0, 0]
+        for name in sources:
+            bucket_values = by_source.get((company, name), {}).get(bucket)
+            if bucket_values is not None:
+                values = [a + b for a, b in zip(values, bucket_values)]
+        return _as_record(values) if values[1] else None
+
+    def series(self, company: str, source: str = None, granularity: str = "day") -> pd.DataFrame:
+        """All buckets of a company (one source, or all pooled), sorted by time."""
+        company = company.lower()
+        sources = self.sources if source is None else (source,)
+        pooled = {}
+        for name in sources:
+            for bucket, values in self._buckets[granularity].get((company, name), {}).items():
+                pooled[bucket] = [a + b for a, b in zip(pooled.get(bucket, [0.0, 0, 0, 0, 0]), values)]
+        rows = [{"bucket": bucket, **_as_record(values)} for bucket, values in sorted(pooled.items())]
+        df = pd.DataFrame(rows, columns=["bucket", "mean_sentiment", "count", "n_positive", "n_neutral", "n_negative"])
+        # Hourly buckets line up with the (UTC) bars of stocks.json
+        df["bucket"] = pd.to_datetime(df["bucket"], format="%Y-%m-%dT%H" if granularity == "hour" else "%Y-%m-%d")
+        return df
+
+    def complete(self) -> bool:
+        """Whether every source has rows folded in (readers fall back to the files otherwise)."""
+        return {source for _, source in self._buckets[self.granularities[0]]} >= set(self.sources)
+
+    def frame(self, granularity: str = "day") -> pd.DataFrame:
+        """All buckets, one row per (company, source, bucket): total, count and label counts."""
+        rows = [
+            (company, source, bucket, *values)
+            for (company, source), by_bucket in self._buckets[granularity].items()
+            for bucket, values in by_bucket.items()
+        ]
+        return pd.DataFrame(rows, columns=[
+            "company", "source", "bucket", "total", "count", "n_positive", "n_neutral", "n_negative",
+        ])
+
+    def compact(self, companies: dict = COMPANIES) -> dict:
+        """sentiment_compact.json shape for {company name: ticker}, from the daily buckets."""
+        data = {}
+        for company, ticker in companies.items():
+            by_source = {}
+            for source, key in COMPACT_SOURCES.items():
+                daily = self.series(company, source) if source in self.sources else None
+                if daily is not None and not daily.empty:
+                    by_source[key] = _compact_records(daily)
+            if by_source:
+                data[ticker] = {"global": _compact_records(self.series(company)), "by_source": by_source}
+        return {"tickers": {ticker: company for company, ticker in companies.items()}, "data": data}
+
+    def close(self):
+        self._conn.close()
+
+
+def _as_record(values: list) -> dict:
+    total, count, n_positive, n_neutral, n_negative = values
+    return {
+        "mean_sentiment": total / count if count else None,
+        "count": count,
+        "n_positive": n_positive,
+        "n_neutral": n_neutral,
+        "n_negative": n_negative,
+    }
+
+
+def _compact_records(df: pd.DataFrame) -> list:
+    df = df.assign(date=df["bucket"].dt.strftime("%Y-%m-%d"), mean_sentiment=df["mean_sentiment"].round(4))
+    return df[["date", "mean_sentiment", "n_positive", "n_neutral", "n_negative"]].to_dict(orient="records")
+
+
+_AGGREGATES = None
+
+
+def get_sentiment_aggregates() -> SentimentAggregates:
+    """Process-wide aggregates at AGGREGATES_PATH (hourly too if SENTIMENT_HOURLY=1)."""
+    global _AGGREGATES
+    if _AGGREGATES is None:
+        hourly = os.environ.get("SENTIMENT_HOURLY") == "1"
+        _AGGREGATES = SentimentAggregates(granularities=("day", "hour") if hourly else ("day",))
+    return _AGGREGATES
@@ -0,0 +1,214 @@
+# finance_api/utils/sentiment_store.py
+import os
+import threading
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from finance_api.utils.snapshot import load_frame, source_signature
+from finance_api.utils.partitions import PartitionStore
+from finance_api.utils.instrumentation import cache_lookup, rows, span
+
+
+# -----------------------------
+# --- Source parsers ---
+# -----------------------------
+# Each parser reads a source file once and returns {company_key: DataFrame}.
+# The frames keep their original row positions as index so that a time window
+# can be re-ordered exactly like a full scan of the file would return it.
+# Files are read through their columnar snapshot when one exists.
+
+def _parse_news_csv(file_path):
+    """news_sentiment_raw.csv -> rows grouped by upper-cased Company."""
+    with span("news_source.read"):
+        df, _ = load_frame(file_path, "csv")
+    df.columns = df.columns.str.strip()
+    with span("news_source.parse_dates"):
+        df["PublishedAt"] = pd.to_datetime(df["PublishedAt"], utc=True).dt.tz_localize(None)
+    return {key: group for key, group in df.groupby(df["Company"].str.upper(), sort=False)}
+
+
+def _parse_reddit_json(file_path):
+    """reddit_data.json -> posts of the first entry matching each lower-cased company."""
+    with span("reddit_source.read"):
+        posts, meta = load_frame(file_path, "reddit")
+    by_entry = dict(tuple(posts.groupby("entry", sort=False))) if not posts.empty else {}
+
+    companies = {}
+    for entry, company in enumerate(meta["companies"]):
+        key = company.lower()
+        if key in companies:
+            continue
+        if entry in by_entry:
+            df = by_entry[entry].drop(columns=["entry", "company"]).reset_index(drop=True)
+        else:
+            df = pd.DataFrame({"date": pd.Series(dtype="datetime64[ns]")})
+        with span("reddit_source.parse_dates"):
+            df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        companies[key] = df
+    return companies
+
+
+def _parse_google_json(file_path):
+    """stock_news_google.json -> articles grouped by lower-cased company."""
+    with span("google_source.read"):
+        df, _ = load_frame(file_path, "records")
+
+    companies = {}
+    for key, group in df.groupby(df['company'].str.lower(), sort=False):
+        group = group.reset_index(drop=True)
+        with span("google_source.parse_dates"):
+            group['published_at'] = pd.to_datetime(group['published_at'], errors='coerce').dt.tz_convert(None)
+        companies[key] = group
+    return companies
+
+
+PARSERS = {
+    "news": (_parse_news_csv, "PublishedAt"),
+    "reddit": (_parse_reddit_json, "date"),
+    "google": (_parse_google_json, "published_at"),
+}
+
+# Clock that ends the "last N days" windows of each source, as its endpoint
+# has always read it: local time for the news CSV, naive UTC for the JSON files
+CLOCKS = {
+    "news": datetime.now,
+    "reddit": datetime.utcnow,
+    "google": datetime.utcnow,
+}
+
+
+# -----------------------------
+# --- Indexed source ---
+# -----------------------------
+
+class IndexedSource:
+    """
+    Keeps one source file in memory, indexed by company and sorted by time.
+
+    The file is parsed on first use and again only when its mtime or size
+    changes. Window queries use a binary search on the per-company time index.
+
+    When the file has a partitioned layout (see partitions.py), nothing is
+    held in memory: a window query opens only the partitions of its days, and
+    a change of the file rewrites only the partitions that changed.
+    """
+
+    def __init__(self, file_path: str, kind: str):
+        self.file_path = file_path
+        self.kind = kind
+        self._parse, self.time_column = PARSERS[kind]
+        self._lock = threading.Lock()
+        self._signature = None
+        self._companies = {}
+        self.partitions = PartitionStore(file_path, self.time_column)
+
+    def _file_signature(self):
+        st = os.stat(self.file_path)
+        return (st.st_mtime_ns, st.st_size)
+
+    def _build(self):
+        companies = {}
+        for key, df in self._parse(self.file_path).items():
+            # Stable sort: rows sharing a timestamp keep their file order
+            df = df.sort_values(self.time_column, kind="stable", na_position="last")
+            times = df[self.time_column].to_numpy(dtype="datetime64[ns]")
+            n_valid = len(times) - int(np.isnat(times).sum())
+            companies[key] = (df, times[:n_valid])
+        return companies
+
+    def partition(self) -> dict:
+        """Write or update the partitioned layout of the file (only changed partitions)."""
+        signature = source_signature(self.file_path)
+        return self.partitions.sync(self._parse(self.file_path), signature)
+
+    def refresh(self):
+        """Reload the file if it changed on disk. Returns the current version."""
+        signature = self._file_signature()
+        cache_lookup(f"{self.kind}_source", signature == self._signature)
+        return self._update(signature)
+
+    def _update(self, signature):
+        if signature != self._signature:
+            with self._lock:
+                if signature != self._signature:
+                    if self.partitions.exists():
+                        if not self.partitions.is_current():
+                            self.partition()
+                        self._companies = None
+                    else:
+                        self._companies = self._build()
+                    self._signature = signature
+        return self._signature
+
+    @property
+    def version(self):
+        """(mtime_ns, size) of the file currently loaded."""
+        return self.refresh()
+
+    def get(self, company_key: str):
+        """All rows of a company in file order, or None if it is unknown."""
+        self._update(self._file_signature())
+        if self._companies is None:
+            return self.partitions.read(company_key)
+        entry = self._companies.get(company_key)
+        if entry is None:
+            return None
+        return entry[0].sort_index()
+
+    def window(self, company_key: str, start, end):
+        """
+        Rows of a company with start <= time <= end, in file order.
+
+        Returns None if the company is unknown.
+        """
+        self._update(self._file_signature())
+        if self._companies is None:
+            return self.partitions.window(company_key, start, end)
+        entry = self._companies.get(company_key)
+        if entry is None:
+            return None
+        df, times = entry
+        lo = np.searchsorted(times, np.datetime64(start, "ns"), side="left")
+        hi = np.searchsorted(times, np.datetime64(end, "ns"), side="right")
+        # Binary search on the time index: only the rows of the window are read
+        rows(scanned=int(hi - lo))
+        return df.iloc[lo:hi].sort_index()
+
+    def window_state(self, company_key: str, start, end):
+        """
+        (file version, first row, end row, changed_at) identifying the rows
+        window() returns, without reading them. changed_at is the last time
+        the window gained (newest row) or lost (last row out) a row, or None.
+
+        Returns None for a partitioned layout (no in-memory time index).
+        """
+        signature = self._update(self._file_signature())
+        if self._companies is None:
+            return None
+        entry = self._companies.get(company_key)
+        if entry is None:
+            return signature, 0, 0, None
+        times = entry[1]
+        lo = int(np.searchsorted(times, np.datetime64(start, "ns"), side="left"))
+        hi = int(np.searchsorted(times, np.datetime64(end, "ns"), side="right"))
+        changes = []
+        if hi > lo:
+            changes.append(pd.Timestamp(times[hi - 1]))
+        if lo > 0:
+            changes.append(pd.Timestamp(times[lo - 1]) + (end - start))
+        return signature, lo, hi, max(changes) if changes else None
+
+
+_SOURCES = {}
+_SOURCES_LOCK = threading.Lock()
+
+
+def get_source(file_path: str, kind: str) -> IndexedSource:
+    """Process-wide shared IndexedSource for a file."""
+    key = (os.path.abspath(file_path), kind)
+    with _SOURCES_LOCK:
+        source = _SOURCES.get(key)
+        if source is None:
+            source = _SOURCES[key] = IndexedSource(file_path, kind)
+    return source
@@ -0,0 +1,84 @@
+# finance_api/utils/serialization.py
+"""
+JSON serialization shared by all endpoints.
+
+Payloads are encoded once, straight to bytes: NaN/inf become null, numpy
+scalars and arrays their Python values, datetimes/Timestamps ISO strings and
+NaT null. orjson is used when installed, the standard library otherwise.
+"""
+import json
+import math
+from datetime import date, datetime, time
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+
+from finance_api.utils.instrumentation import span
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj):
+    """Values neither backend encodes natively."""
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, np.generic):
+        return _clean(obj.item())
+    if isinstance(obj, np.ndarray):
+        return _clean(obj.tolist())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return _clean(obj.tolist())
+    if isinstance(obj, pd.DataFrame):
+        return _clean(obj.to_dict(orient="records"))
+    return str(obj)
+
+
+def _clean(obj):
+    """
+    One recursive pass making a payload acceptable to json.dumps(allow_nan=False).
+    Only used by the standard library backend.
+    """
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {
+            (k.item() if isinstance(k, np.generic) else k): _clean(v)
+            for k, v in obj.items()
+        }
+    if isinstance(obj, (list, tuple)):
+        return [_clean(v) for v in obj]
+    if obj is None or isinstance(obj, (str, int)):
+        return obj
+    return _default(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (
+        orjson.OPT_SERIALIZE_NUMPY
+        | orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+    )
+
+    def dumps(obj) -> bytes:
+        """Encode a payload to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(obj) -> bytes:
+        """Encode a payload to compact UTF-8 JSON bytes."""
+        return json.dumps(
+            _clean(obj), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class SafeJSONResponse(Response):
+    """JSONResponse that encodes its content once with `dumps`."""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        with span("serialize"):
+            return dumps(content)
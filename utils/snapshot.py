@@ -0,0 +1,370 @@
+# finance_api/utils/snapshot.py
+"""
+Columnar binary snapshots of the data/ files.
+
+Each source file (stocks.json, sentiment_compact.json, reddit_data.json,
+stock_news_google.json, news_sentiment_raw.csv) is flattened into one table
+and compiled into `<dir>/.snapshots/<file>.snap`:
+
+    MAGIC | uint64 header length | JSON header | padding | column blocks
+
+Numeric columns are stored as little-endian typed arrays, timestamps as int64
+nanoseconds, and text as int64 offsets + a UTF-8 blob + a validity mask
+(repetitive text is dictionary-encoded as int32 codes into such a blob). The
+loaders memory-map the snapshot instead of parsing the text file, fall back to
+the text file when no snapshot exists, and rebuild a snapshot whose source
+file changed (mtime or size). A snapshot is mapped and its text decoded once
+per version of the file; later loads share the same (read-only) columns.
+
+Usage:
+    python -m finance_api.utils.snapshot [data_dir]
+"""
+import os
+import sys
+import json
+import mmap
+import struct
+import threading
+import numpy as np
+import pandas as pd
+
+from finance_api.utils import json_stream
+
+
+MAGIC = b"FASNAP01"
+SNAPSHOT_DIR = ".snapshots"
+ALIGN = 8
+
+# Known files of data/ and the way they are flattened into one table
+LAYOUTS = {
+    "stocks.json": "stocks",
+    "sentiment_compact.json": "compact",
+    "reddit_data.json": "reddit",
+    "stock_news_google.json": "records",
+    "news_sentiment_raw.csv": "csv",
+}
+
+# Columns parsed as timestamps for each layout (column -> (timezone, errors)):
+# invalid dates of the CSV raise as when it was parsed directly, the JSON
+# sources turn them into NaT
+TIMESTAMP_COLUMNS = {
+    "csv": {"PublishedAt": ("UTC", "raise")},
+    "records": {"published_at": ("UTC", "coerce")},
+    "reddit": {"date": (None, "coerce")},
+}
+
+
+def detect_layout(source_path: str) -> str:
+    name = os.path.basename(source_path)
+    if name in LAYOUTS:
+        return LAYOUTS[name]
+    return "csv" if name.endswith(".csv") else "records"
+
+
+def snapshot_path(source_path: str) -> str:
+    directory, name = os.path.split(source_path)
+    return os.path.join(directory, SNAPSHOT_DIR, name + ".snap")
+
+
+def source_signature(source_path: str) -> dict:
+    st = os.stat(source_path)
+    return {"mtime_ns": st.st_mtime_ns, "size": st.st_size}
+
+
+# -----------------------------
+# --- Text sources -> table ---
+# -----------------------------
+
+def read_text(source_path: str, layout: str = None, tickers=None):
+    """
+    Parse a text source into (flat DataFrame, meta) with typed timestamps.
+
+    JSON files are streamed into columns (see json_stream); `tickers` keeps
+    only those tickers (stocks/compact) or companies (reddit), skipping the rest.
+    """
+    layout = layout or detect_layout(source_path)
+    if layout == "csv":
+        df, meta = pd.read_csv(source_path), {}
+    elif layout == "stocks":
+        df, meta = json_stream.read_stocks(source_path, tickers)
+    elif layout == "compact":
+        df, meta = json_stream.read_compact(source_path, tickers)
+    elif layout == "reddit":
+        df, meta = json_stream.read_reddit(source_path, tickers)
+    else:
+        df, meta = json_stream.read_records(source_path)
+
+    for column, (tz, errors) in TIMESTAMP_COLUMNS.get(layout, {}).items():
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], errors=errors, utc=tz is not None)
+    return df, meta
+
+
+# -----------------------------
+# --- Column encoding ---
+# -----------------------------
+
+def _encode_column(series: pd.Series):
+    """Return (column header, [raw blocks]) for one column."""
+    if isinstance(series.dtype, pd.DatetimeTZDtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+        tz = None
+        if isinstance(series.dtype, pd.DatetimeTZDtype):
+            tz = str(series.dtype.tz)
+            series = series.dt.tz_convert(None)
+        values = series.to_numpy(dtype="datetime64[ns]").view("<i8")
+        return {"kind": "M8", "tz": tz}, [values.tobytes()]
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return {"kind": "b1"}, [series.to_numpy(dtype="<u1").tobytes()]
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return {"kind": "i8"}, [series.to_numpy(dtype="<i8").tobytes()]
+    if pd.api.types.is_float_dtype(series.dtype):
+        return {"kind": "f8"}, [series.to_numpy(dtype="<f8").tobytes()]
+
+    values = series.tolist()
+    valid = [v is not None and not (isinstance(v, float) and np.isnan(v)) for v in values]
+    kind = "str" if all(isinstance(v, str) for v, ok in zip(values, valid) if ok) else "json"
+    if kind == "str":
+        # Repetitive text (tickers, dates, times, labels) is dictionary-encoded
+        codes, uniques = pd.factorize(series, use_na_sentinel=True)
+        if len(uniques) <= len(values) // 2:
+            blocks = _encode_text(list(uniques), [True] * len(uniques))
+            return {"kind": "cat", "categories": len(uniques)}, [codes.astype("<i4").tobytes()] + blocks
+    if kind == "json":
+        values = [json.dumps(v, ensure_ascii=False) if ok else None for v, ok in zip(values, valid)]
+    return {"kind": kind}, _encode_text(values, valid)
+
+
+def _encode_text(values, valid):
+    """offsets + validity mask + UTF-8 blob blocks for a list of strings."""
+    encoded = [v.encode("utf-8") if ok else b"" for v, ok in zip(values, valid)]
+    offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return [offsets.tobytes(), np.array(valid, dtype="<u1").tobytes(), b"".join(encoded)]
+
+
+def _decode_text(mm, base, blocks, n, decode=None):
+    """
+    Object array of the strings of a text block (None where not valid), or
+    of decode(string) for each. The blob is decoded in one call and cut at
+    the offsets, converted from bytes to characters when it is not ASCII.
+    """
+    offsets = np.frombuffer(mm, dtype="<i8", count=n + 1, offset=base + blocks[0][0])
+    valid = np.frombuffer(mm, dtype="<u1", count=n, offset=base + blocks[1][0]).view(np.bool_)
+    blob_start, blob_len = blocks[2]
+    blob = mm[base + blob_start:base + blob_start + blob_len]
+    text = blob.decode("utf-8")
+    if len(text) != len(blob):
+        # Characters before each offset: its bytes minus the continuation bytes (10xxxxxx) before it
+        continuation = np.flatnonzero((np.frombuffer(blob, dtype=np.uint8) & 0xC0) == 0x80)
+        offsets = offsets - np.searchsorted(continuation, offsets)
+    offsets = offsets.tolist()
+    values = map(text.__getitem__, map(slice, offsets[:-1], offsets[1:]))
+    if decode is not None:
+        values = (decode(value) if ok else None for value, ok in zip(values, valid.tolist()))
+    # fromiter: a decoded list stays one element
+    values = np.fromiter(values, dtype=object, count=n)
+    values[~valid] = None
+    return values
+
+
+def _pad(n: int) -> int:
+    return (-n) % ALIGN
+
+
+def encode_table(df: pd.DataFrame, **fields) -> bytes:
+    """Snapshot bytes of a table; `fields` are added to its JSON header."""
+    columns, blocks, offset = [], [], 0
+    for name in df.columns:
+        header, raw_blocks = _encode_column(df[name])
+        header["name"] = str(name)
+        header["blocks"] = []
+        for raw in raw_blocks:
+            header["blocks"].append([offset, len(raw)])
+            blocks.append(raw + b"\0" * _pad(len(raw)))
+            offset += len(raw) + _pad(len(raw))
+        columns.append(header)
+
+    header = json.dumps({**fields, "rows": len(df), "columns": columns}, ensure_ascii=False).encode("utf-8")
+    return b"".join([
+        MAGIC,
+        struct.pack("<Q", len(header)),
+        header,
+        b"\0" * _pad(len(MAGIC) + 8 + len(header)),
+        *blocks,
+    ])
+
+
+def write_bytes(path: str, data: bytes):
+    """Atomic write (temporary file + rename)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(source_path: str, layout: str = None) -> str:
+    """Compile a text source into its columnar snapshot. Returns the snapshot path."""
+    layout = layout or detect_layout(source_path)
+    signature = source_signature(source_path)
+    df, meta = read_text(source_path, layout)
+
+    path = snapshot_path(source_path)
+    write_bytes(path, encode_table(df, layout=layout, source=signature, meta=meta))
+    return path
+
+
+# -----------------------------
+# --- Memory-mapped loading ---
+# -----------------------------
+
+# Snapshot path -> [(mtime_ns, size) of the snapshot, header, columns, DataFrame or None]
+_OPEN = {}
+_OPEN_LOCK = threading.Lock()
+
+
+def _open(path: str) -> list:
+    """Cached entry of a snapshot, mapped and decoded again only when the file changed."""
+    st = os.stat(path)
+    version = (st.st_mtime_ns, st.st_size)
+    with _OPEN_LOCK:
+        entry = _OPEN.get(path)
+        if entry is None or entry[0] != version:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            header, columns = decode_table(mm, path)
+            for values in columns.values():
+                values.flags.writeable = False  # shared by every load
+            entry = _OPEN[path] = [version, header, columns, None]
+        return entry
+
+
+def open_snapshot(path: str):
+    """
+    Memory-map a snapshot. Returns (header, {column: array}).
+
+    Numeric and timestamp columns are zero-copy views on the mapping; text
+    columns are decoded to object arrays (None for missing values). The
+    result is kept until the snapshot file changes: one mapping per file,
+    released with the last array that uses it.
+    """
+    _, header, columns, _ = _open(path)
+    return header, columns
+
+
+def decode_table(mm, path: str = "<bytes>"):
+    """(header, {column: array}) of snapshot bytes (a mapping or a bytes object)."""
+    if mm[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a snapshot file")
+    header_len = struct.unpack_from("<Q", mm, len(MAGIC))[0]
+    start = len(MAGIC) + 8
+    header = json.loads(mm[start:start + header_len].decode("utf-8"))
+    base = start + header_len + _pad(start + header_len)
+    n = header["rows"]
+
+    columns = {}
+    for column in header["columns"]:
+        kind, blocks = column["kind"], column["blocks"]
+        if kind in ("i8", "f8", "M8", "b1"):
+            dtype = {"i8": "<i8", "f8": "<f8", "M8": "<i8", "b1": "<u1"}[kind]
+            values = np.frombuffer(mm, dtype=dtype, count=n, offset=base + blocks[0][0])
+            if kind == "M8":
+                values = values.view("datetime64[ns]")
+            elif kind == "b1":
+                values = values.view(np.bool_)
+        elif kind == "cat":
+            codes = np.frombuffer(mm, dtype="<i4", count=n, offset=base + blocks[0][0])
+            categories = _decode_text(mm, base, blocks[1:], column["categories"])
+            # Code -1 (missing) picks the trailing None
+            values = np.append(categories, None)[codes]
+        elif kind == "str":
+            values = _decode_text(mm, base, blocks, n)
+        else:
+            values = _decode_text(mm, base, blocks, n, json.loads)
+        columns[column["name"]] = values
+    return header, columns
+
+
+def _to_frame(header, columns) -> pd.DataFrame:
+    data = {}
+    for column in header["columns"]:
+        values = pd.Series(columns[column["name"]], copy=False)
+        if column["kind"] == "M8" and column.get("tz"):
+            values = values.dt.tz_localize(column["tz"])
+        data[column["name"]] = values
+    return pd.DataFrame(data, index=pd.RangeIndex(header["rows"]))
+
+
+def read_table(path: str):
+    """
+    Snapshot file read into memory: (DataFrame, header).
+
+    For small files that may be rewritten while in use (e.g. partitions): no
+    mapping stays open on them.
+    """
+    with open(path, "rb") as f:
+        header, columns = decode_table(f.read(), path)
+    return _to_frame(header, columns), header
+
+
+def _load_snapshot(source_path: str, layout: str = None):
+    """Cached entry of the snapshot of a source (rebuilt first if stale), or None."""
+    path = snapshot_path(source_path)
+    if not os.path.exists(path):
+        return None
+    entry = _open(path)
+    if entry[1]["source"] != source_signature(source_path):
+        write_snapshot(source_path, layout)
+        entry = _open(path)
+    return entry
+
+
+def load_columns(source_path: str, layout: str = None):
+    """
+    Memory-mapped columns of a source: (header, {column: array}).
+
+    Returns None when no snapshot exists; rebuilds a stale snapshot first.
+    """
+    entry = _load_snapshot(source_path, layout)
+    return None if entry is None else (entry[1], entry[2])
+
+
+def load_frame(source_path: str, layout: str = None, tickers=None):
+    """
+    Load a data/ source as (flat DataFrame, meta).
+
+    Uses the memory-mapped snapshot when one exists, the text file otherwise.
+    `tickers` restricts the rows to those tickers (companies for reddit).
+    """
+    entry = _load_snapshot(source_path, layout)
+    if entry is None:
+        return read_text(source_path, layout, tickers)
+    header = entry[1]
+    if entry[3] is None:
+        entry[3] = _to_frame(header, entry[2])
+    # Shallow copy: callers may rename or add columns without touching the cached frame
+    df = entry[3].copy(deep=False)
+    if tickers is not None:
+        layout = layout or detect_layout(source_path)
+        if layout == "reddit":
+            df = df[df["company"].str.lower().isin([c.lower() for c in tickers])].reset_index(drop=True)
+        elif "ticker" in df.columns:
+            df = df[df["ticker"].isin(list(tickers))].reset_index(drop=True)
+    return df, header["meta"]
+
+
+def build_all(data_dir: str) -> list:
+    """Compile every known source found under data_dir."""
+    built = []
+    for root, dirs, files in os.walk(data_dir):
+        dirs[:] = [d for d in dirs if d != SNAPSHOT_DIR]
+        for name in sorted(files):
+            if name in LAYOUTS:
+                built.append(write_snapshot(os.path.join(root, name)))
+    return built
+
+
+if __name__ == "__main__":
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join("finance_api", "data")
+    for path in build_all(data_dir):
+        print(f"✅ {path}")